@@ -1,4 +1,5 @@
 import asyncio
+import time
 from datetime import datetime
 from fastapi import APIRouter, HTTPException
 from loguru import logger
@@ -10,47 +11,80 @@ from app.core.config import settings
 
 router = APIRouter()
 
-query_queue: asyncio.Queue = asyncio.Queue()
+# Bounded so a burst beyond what the workers can drain is refused up front
+query_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.query_queue_max_size))
+_workers: list[asyncio.Task] = []
+_worker_states: list[dict] = []
 _processor_running = False
 
-async def process_query_background():
+def start_query_workers() -> None:
     global _processor_running
     
     if _processor_running:
         logger.warning("Background processor already running")
         return
     
+    count = max(1, settings.query_workers)
+    _worker_states.clear()
+    _worker_states.extend(
+        {"worker": i, "state": "idle", "user_id": None, "busy_since": None, "processed": 0, "failed": 0}
+        for i in range(count)
+    )
+    _workers.extend(
+        asyncio.create_task(process_query_background(i), name=f"query-worker-{i}")
+        for i in range(count)
+    )
     _processor_running = True
-    logger.info("Background query processor started")
+    logger.info(f"Started {count} query workers")
+
+async def stop_query_workers() -> None:
+    global _processor_running
     
-    try:
-        while True:
-            try:
-                logger.debug("Waiting for query in queue...")
-                query_data = await query_queue.get()
-                logger.info(f"Processing query from user: {query_data['user_id']}")
-                
-                user_id = query_data["user_id"]
-                query = query_data["query"]
-                
-                logger.debug(f"Sending query to orchestrator: '{query}'")
-                response = await chat_orchestrator.process_query(user_id, query)
-                logger.info(f"Got response from orchestrator: {response[:100]}...")
-                
-                await send_callback_with_retry(user_id, response)
-                
-                query_queue.task_done()
-                logger.success("Query processing completed")
-                
-            except asyncio.CancelledError:
-                logger.info("Background processor cancelled")
-                break
-            except Exception as e:
-                logger.error(f"Error processing query: {e}")
-                
-    finally:
-        _processor_running = False
-        logger.info("Background query processor stopped")
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _processor_running = False
+    
+    if not query_queue.empty():
+        logger.warning(f"Dropped {query_queue.qsize()} queued queries on shutdown")
+    logger.info("Background query processor stopped")
+
+async def process_query_background(worker_id: int):
+    state = _worker_states[worker_id]
+    
+    while True:
+        try:
+            query_data = await query_queue.get()
+        except asyncio.CancelledError:
+            break
+        
+        user_id = query_data["user_id"]
+        query = query_data["query"]
+        state.update(state="busy", user_id=user_id, busy_since=time.time())
+        
+        try:
+            logger.info(f"Worker {worker_id} processing query from user: {user_id}")
+            logger.debug(f"Sending query to orchestrator: '{query}'")
+            response = await chat_orchestrator.process_query(user_id, query)
+            logger.info(f"Got response from orchestrator: {response[:100]}...")
+            
+            await send_callback_with_retry(user_id, response)
+            
+            state["processed"] += 1
+            logger.success("Query processing completed")
+            
+        except asyncio.CancelledError:
+            logger.warning(f"Worker {worker_id} cancelled while processing query from user: {user_id}")
+            break
+        except Exception as e:
+            state["failed"] += 1
+            logger.error(f"Error processing query: {e}")
+        finally:
+            state.update(state="idle", user_id=None, busy_since=None)
+            query_queue.task_done()
+    
+    state["state"] = "stopped"
 
 async def send_callback_with_retry(user_id: str, answer: str, max_retries: int = 3):
     logger.debug(f"Sending callback for user {user_id}")
@@ -95,7 +129,7 @@ async def query_endpoint(request: QueryRequest):
     try:
         logger.info(f"Received query from {request.user_id}: '{request.query}'")
         
-        await query_queue.put({
+        query_queue.put_nowait({
             "user_id": request.user_id,
             "query": request.query
         })
@@ -104,6 +138,13 @@ async def query_endpoint(request: QueryRequest):
         
         return ProcessingResponse()
     
+    except asyncio.QueueFull:
+        logger.warning(f"Query queue full ({query_queue.maxsize}), rejecting query from {request.user_id}")
+        raise HTTPException(
+            status_code=503,
+            detail="Query queue is full, retry later",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Error processing request: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
@@ -131,9 +172,19 @@ async def health_check():
 
 @router.get("/queue-status")
 async def queue_status():
+    now = time.time()
     return {
         "queue_size": query_queue.qsize(),
+        "queue_max_size": query_queue.maxsize,
         "processor_running": _processor_running,
+        "workers_busy": sum(1 for state in _worker_states if state["state"] == "busy"),
+        "workers": [
+            {
+                **state,
+                "busy_seconds": round(now - state["busy_since"], 3) if state["busy_since"] else None
+            }
+            for state in _worker_states
+        ],
         "timestamp": datetime.utcnow().isoformat(),
         "callback_url": settings.callback_url,
         "settings": {
@@ -157,7 +208,10 @@ async def system_info():
             },
             "queue": {
                 "size": query_queue.qsize(),
-                "processor_running": _processor_running
+                "max_size": query_queue.maxsize,
+                "processor_running": _processor_running,
+                "workers": len(_workers),
+                "workers_busy": sum(1 for state in _worker_states if state["state"] == "busy")
             },
             "system_status": system_status
         }
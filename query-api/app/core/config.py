@@ -15,6 +15,9 @@ class Settings(BaseSettings):
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
     llm_model: str = "qwen2.5-0.5b"
     vector_table_name: str = "document_embeddings"
+    # Concurrent queries in flight; matches vLLM's --max-num-seqs so its batch stays full
+    query_workers: int = 64
+    query_queue_max_size: int = 1000
     log_level: str = "INFO"
     
     model_config = {"env_file": ".env"}
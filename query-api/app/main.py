@@ -1,10 +1,9 @@
-import asyncio
 import sys
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
-from app.api.endpoints import router, process_query_background
+from app.api.endpoints import router, start_query_workers, stop_query_workers
 from app.agents.orchestrator import chat_orchestrator
 from app.services.llm_client import llm_client
 from app.services.rag_client import rag_client
@@ -17,12 +16,8 @@ logger.add(
     level=settings.log_level
 )
 
-_background_task = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global _background_task
-    
     logger.info("Starting application initialization...")
     
     try:
@@ -30,8 +25,8 @@ async def lifespan(app: FastAPI):
         await rag_client.initialize()
         await chat_orchestrator.initialize()
         
-        _background_task = asyncio.create_task(process_query_background())
-        logger.success("Background query processor started")
+        start_query_workers()
+        logger.success(f"Background query processor started ({settings.query_workers} workers)")
         
         logger.success("Application startup completed")
         
@@ -42,12 +37,7 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("Application shutdown...")
-    if _background_task and not _background_task.done():
-        _background_task.cancel()
-        try:
-            await _background_task
-        except asyncio.CancelledError:
-            pass
+    await stop_query_workers()
     logger.info("Application shutdown completed")
 
 app = FastAPI(
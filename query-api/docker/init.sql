@@ -18,9 +18,8 @@ CREATE TABLE IF NOT EXISTS document_embeddings (
 );
 
 -- Create indexes for better performance
-CREATE INDEX IF NOT EXISTS idx_document_embeddings_vector 
-    ON document_embeddings USING ivfflat (embedding vector_cosine_ops) 
-    WITH (lists = 100);
+-- The ANN index on the embeddings is managed by rag-service, which builds it
+-- once there is data to train on (IVFFlat centroids built on an empty table are useless)
 
 CREATE INDEX IF NOT EXISTS idx_document_embeddings_metadata 
     ON document_embeddings USING gin (metadata);
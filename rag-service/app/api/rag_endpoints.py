@@ -1,22 +1,83 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Literal
+from pydantic import BaseModel, Field
 from loguru import logger
+from app.core.config import settings
+from app.services.job_service import JobQueueFullError
 from app.services.rag_service import rag_service
-from app.utils.data_loader import DataLoader
+from app.services.vector_backend import DocumentInput, ReloadInProgressError, SearchFilters
 
 router = APIRouter()
 
 class DocumentAddRequest(BaseModel):
     documents: list[str]
 
+class DocumentItem(BaseModel):
+    id: str | None = Field(None, description="Stable caller ID (e.g. SKU); derived from the text when omitted")
+    text: str = Field(..., min_length=1)
+    metadata: dict[str, Any] = Field(default_factory=dict)
+
+class DocumentUpsertRequest(BaseModel):
+    documents: list[DocumentItem]
+
+class DocumentDeleteRequest(BaseModel):
+    ids: list[str] = Field(..., min_length=1)
+
+class SnapshotImportRequest(BaseModel):
+    path: str | None = Field(None, description="Snapshot directory on the service host; defaults to SNAPSHOT_PATH")
+
+class QueryFilters(BaseModel):
+    """Structured constraints on the brand, category, in_stock and price metadata keys"""
+    brand: list[str] | None = None
+    category: list[str] | None = None
+    in_stock: bool | None = None
+    price_min: float | None = Field(None, ge=0)
+    price_max: float | None = Field(None, ge=0)
+
+    def to_search_filters(self) -> SearchFilters:
+        return SearchFilters(**self.model_dump())
+
 class QueryRequest(BaseModel):
     query: str
     top_k: int | None = None
+    recall: Literal["fast", "balanced", "high", "exact"] | None = Field(
+        None, description="ANN recall/latency trade-off; maps to hnsw.ef_search or ivfflat.probes"
+    )
+    mode: Literal["vector", "lexical", "hybrid"] | None = Field(
+        None, description="Retrieval mode; hybrid merges full-text and vector results with reciprocal-rank fusion"
+    )
+    filters: QueryFilters | None = Field(
+        None, description="Applied inside the search, so filtered queries still return a full top_k"
+    )
+    unit: Literal["chunk", "parent"] | None = Field(
+        None, description="Return the matched chunks of long documents, or each matched document once in full"
+    )
+    rerank: bool | None = Field(
+        None, description="Re-order candidates with the cross-encoder; defaults to RERANK_ENABLED"
+    )
 
 class DocumentsResponse(BaseModel):
     documents: list[str]
     count: int
 
+class BatchQueryRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1)
+    top_k: int | None = None
+    recall: Literal["fast", "balanced", "high", "exact"] | None = None
+    mode: Literal["vector", "lexical", "hybrid"] | None = None
+    filters: QueryFilters | None = None
+    unit: Literal["chunk", "parent"] | None = None
+    rerank: bool | None = None
+
+class BatchQueryResult(BaseModel):
+    query: str
+    documents: list[str]
+    count: int
+
+class BatchQueryResponse(BaseModel):
+    results: list[BatchQueryResult]
+    count: int
+
 @router.post("/documents")
 async def add_documents(request: DocumentAddRequest):
     try:
@@ -32,30 +93,176 @@ async def add_documents(request: DocumentAddRequest):
         logger.error(f"Error adding documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/documents/upsert")
+async def upsert_documents(request: DocumentUpsertRequest):
+    try:
+        logger.info(f"Upserting {len(request.documents)} documents")
+        result = await rag_service.upsert_documents([
+            DocumentInput(text=item.text, metadata=item.metadata, node_id=item.id)
+            for item in request.documents
+        ])
+        
+        return {
+            "message": (
+                f"Upserted {len(result['node_ids'])} documents "
+                f"({result['inserted']} inserted, {result['updated']} updated, "
+                f"{result['unchanged']} unchanged)"
+            ),
+            **result
+        }
+    except Exception as e:
+        logger.error(f"Error upserting documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/documents/delete")
+async def delete_documents(request: DocumentDeleteRequest):
+    try:
+        logger.info(f"Deleting {len(request.ids)} documents")
+        deleted = await rag_service.delete_documents(request.ids)
+        
+        return {
+            "message": f"Deleted {deleted} documents",
+            "deleted": deleted
+        }
+    except Exception as e:
+        logger.error(f"Error deleting documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/documents/stream")
+async def stream_documents(request: Request):
+    """Ingest an NDJSON body, one JSON string or {"id", "text", "metadata"} object per line"""
+    try:
+        logger.info("Receiving streamed documents")
+        progress = await rag_service.ingest_stream(request.stream())
+        
+        return {
+            "message": f"Added {progress['rows_written']} documents",
+            "count": progress["rows_written"],
+            "progress": progress
+        }
+    except Exception as e:
+        logger.error(f"Error streaming documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/documents/reload")
 async def reload_default_documents():
     try:
-        logger.info("Reloading default documents")
+        logger.info("Reloading the catalog")
+        result = await rag_service.reload_documents()
         
-        await rag_service.clear_documents()
+        return {
+            "message": f"Reloaded {result['documents']} documents",
+            "count": result["documents"],
+            "reload": result
+        }
+    except ReloadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reloading documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/snapshots/import")
+async def import_snapshot(request: SnapshotImportRequest):
+    """Replace the catalog with a snapshot built by python -m app.indexer"""
+    path = request.path or settings.snapshot_path
+    if not path:
+        raise HTTPException(status_code=400, detail="No snapshot path given and SNAPSHOT_PATH is not set")
+    
+    try:
+        logger.info(f"Importing snapshot {path}")
+        result = await rag_service.import_snapshot(path)
         
-        default_docs = DataLoader.load_sample_products()
-        node_ids = await rag_service.add_documents(default_docs)
+        return {
+            "message": f"Imported {result['rows']} rows from {path} in {result['seconds']}s",
+            "snapshot": result
+        }
+    except ReloadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing snapshot: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/jobs", status_code=202)
+async def submit_ingest_job(request: DocumentUpsertRequest):
+    """Queue an upsert of the documents and return at once; poll GET /jobs/{id} for progress"""
+    try:
+        logger.info(f"Queueing ingest job for {len(request.documents)} documents")
+        job = await rag_service.submit_ingest_job("upsert", [
+            DocumentInput(text=item.text, metadata=item.metadata, node_id=item.id)
+            for item in request.documents
+        ])
         
         return {
-            "message": f"Reloaded {len(node_ids)} default documents",
-            "node_ids": node_ids,
-            "count": len(node_ids)
+            "message": f"Queued ingest job {job['id']}",
+            "job": job
         }
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
-        logger.error(f"Error reloading documents: {e}")
+        logger.error(f"Error queueing ingest job: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/jobs/reload", status_code=202)
+async def submit_reload_job():
+    try:
+        logger.info("Queueing catalog reload job")
+        job = await rag_service.submit_ingest_job("reload", source=rag_service.default_catalog())
+        
+        return {
+            "message": f"Queued reload job {job['id']}",
+            "job": job
+        }
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error queueing reload job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs")
+async def list_ingest_jobs():
+    jobs = rag_service.list_ingest_jobs()
+    return {"jobs": jobs, "count": len(jobs)}
+
+@router.get("/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    try:
+        job = await rag_service.get_ingest_job(job_id)
+    except Exception as e:
+        logger.error(f"Error getting ingest job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+@router.delete("/jobs/{job_id}")
+async def cancel_ingest_job(job_id: str):
+    try:
+        job = await rag_service.cancel_ingest_job(job_id)
+    except Exception as e:
+        logger.error(f"Error cancelling ingest job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if job is None:
+        # Only the worker process running a job can cancel it
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' is not running in this worker")
+    return job
+
 @router.post("/query", response_model=DocumentsResponse)
 async def query_documents(request: QueryRequest):
     try:
         logger.debug(f"Querying: '{request.query}' (top_k={request.top_k})")
-        documents = await rag_service.query(request.query, request.top_k)
+        documents = await rag_service.query(
+            request.query,
+            request.top_k,
+            request.recall,
+            request.mode,
+            request.filters.to_search_filters() if request.filters else None,
+            request.unit,
+            request.rerank
+        )
         
         return DocumentsResponse(
             documents=documents,
@@ -65,6 +272,47 @@ async def query_documents(request: QueryRequest):
         logger.error(f"Error querying documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/query/batch", response_model=BatchQueryResponse)
+async def query_documents_batch(request: BatchQueryRequest):
+    try:
+        logger.debug(f"Batch querying {len(request.queries)} queries (top_k={request.top_k})")
+        results = await rag_service.query_batch(
+            request.queries,
+            request.top_k,
+            request.recall,
+            request.mode,
+            request.filters.to_search_filters() if request.filters else None,
+            request.unit,
+            request.rerank
+        )
+        
+        return BatchQueryResponse(
+            results=[
+                BatchQueryResult(query=query, documents=documents, count=len(documents))
+                for query, documents in zip(request.queries, results)
+            ],
+            count=len(results)
+        )
+    except Exception as e:
+        logger.error(f"Error batch querying documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/index/rebuild")
+async def rebuild_index():
+    try:
+        logger.info("Rebuilding vector index")
+        build = await rag_service.rebuild_index()
+        
+        return {
+            "message": f"Rebuilt vector index over {build['rows']} rows in {build['seconds']}s",
+            "build": build
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rebuilding vector index: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/documents")
 async def clear_documents():
     try:
@@ -5,16 +5,97 @@ class Settings(BaseSettings):
     version: str = "0.1.0"
     api_host: str = "0.0.0.0"
     api_port: int = 8003
+    api_workers: int = 1
+    api_worker_threads: int | None = None
+    api_preload_model: bool = True
     postgres_host: str = "localhost"
     postgres_port: int = 5432
     postgres_user: str = "postgres"
     postgres_password: str = "postgres"
     postgres_db: str = "product_query_bot"
+    postgres_pool_min_size: int = 1
+    postgres_pool_max_size: int = 10
+    postgres_statement_cache_size: int = 100
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
     embedding_dimension: int = 384
+    embedding_cache_dir: str = ".cache"
+    embedding_backend: str = "sentence-transformers"
+    embedding_max_seq_length: int = 256
+    onnx_model_path: str | None = None
+    onnx_quantize: bool = True
+    onnx_threads: int = 0
+    embedding_disk_cache_enabled: bool = True
+    embedding_disk_cache_path: str | None = None
+    query_embedding_cache_enabled: bool = True
+    query_embedding_cache_size: int = 10000
+    query_embedding_cache_ttl_seconds: float = 3600.0
+    embedding_batching_enabled: bool = True
+    embedding_batch_max_size: int = 32
+    embedding_batch_max_wait_ms: float = 5.0
+    embedding_executor: str = "thread"
+    embedding_workers: int = 2
+    embedding_worker_chunk_size: int = 64
+    embedding_reserved_query_workers: int = 1
+    embedding_worker_torch_threads: int = 1
+    embedding_query_threads: int = 2
+    embedding_ingest_threads: int = 1
+    vector_store_backend: str = "pgvector"
+    numpy_store_dir: str = "data/vector_store"
+    numpy_store_flush_seconds: float = 5.0
     vector_table_name: str = "document_embeddings"
     vector_schema_name: str = "public"
     top_k: int = 5
+    vector_query_timeout_seconds: float = 5.0
+    semantic_cache_enabled: bool = False
+    semantic_cache_size: int = 2048
+    semantic_cache_threshold: float = 0.97
+    semantic_cache_ttl_seconds: float = 600.0
+    rerank_enabled: bool = False
+    rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_candidates: int = 20
+    rerank_budget_ms: float = 150.0
+    rerank_batch_size: int = 32
+    rerank_max_length: int = 256
+    rerank_cache_size: int = 50000
+    rerank_cache_ttl_seconds: float = 3600.0
+    chunking_enabled: bool = True
+    chunk_max_tokens: int = 200
+    chunk_overlap_tokens: int = 32
+    query_result_unit: str = "chunk"
+    chunk_parent_oversample: int = 3
+    dedup_enabled: bool = True
+    dedup_similarity_threshold: float = 0.95
+    dedup_filter_oversample: int = 4
+    search_mode: str = "hybrid"
+    lexical_search_config: str = "english"
+    lexical_shortcut_enabled: bool = True
+    rrf_k: int = 60
+    query_batch_chunk_size: int = 256
+    vector_quantization: str = "none"
+    vector_rerank_oversample: int = 4
+    vector_index_type: str = "hnsw"
+    vector_index_min_rows: int = 1000
+    vector_index_maintenance_work_mem: str = "256MB"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 64
+    hnsw_ef_search: int = 40
+    ivfflat_probes: int | None = None
+    vector_index_iterative_scan: str = "strict_order"
+    vector_index_status_ttl_seconds: float = 10.0
+    vector_index_build_poll_seconds: float = 5.0
+    vector_index_optimize_delay_seconds: float = 30.0
+    store_count_mode: str = "exact"
+    store_stats_refresh_seconds: float = 30.0
+    ingest_batch_size: int = 256
+    ingest_max_pending_batches: int = 2
+    catalog_path: str | None = None
+    catalog_reload_strategy: str = "swap"
+    snapshot_path: str | None = None
+    catalog_swap_lock_timeout_ms: int = 2000
+    catalog_swap_attempts: int = 5
+    ingest_job_workers: int = 1
+    ingest_job_max_queued: int = 16
+    ingest_job_retention: int = 100
     log_level: str = "INFO"
     
     model_config = {"env_file": ".env"}
@@ -23,4 +104,13 @@ class Settings(BaseSettings):
     def postgres_dsn(self) -> str:
         return f"postgresql://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
 
+    @property
+    def vector_data_table(self) -> str:
+        # Keeps the "data_" prefixed layout llama-index's PGVectorStore created
+        return f"data_{self.vector_table_name.lower()}"
+
+    @property
+    def vector_table_full_name(self) -> str:
+        return f"{self.vector_schema_name}.{self.vector_data_table}"
+
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,56 @@
+import asyncpg
+from pgvector.asyncpg import register_vector
+from loguru import logger
+from app.core.config import settings
+
+
+class Database:
+    """Shared asyncpg pool with the pgvector codecs registered on every connection"""
+
+    def __init__(self):
+        self.pool: asyncpg.Pool | None = None
+
+    async def initialize(self) -> None:
+        if self.pool is not None:
+            return
+
+        try:
+            # The vector type must exist before the codec can be registered
+            conn = await asyncpg.connect(settings.postgres_dsn)
+            try:
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            finally:
+                await conn.close()
+
+            self.pool = await asyncpg.create_pool(
+                settings.postgres_dsn,
+                min_size=settings.postgres_pool_min_size,
+                max_size=settings.postgres_pool_max_size,
+                statement_cache_size=settings.postgres_statement_cache_size,
+                init=register_vector
+            )
+            logger.success(
+                f"Database pool ready (min={settings.postgres_pool_min_size}, "
+                f"max={settings.postgres_pool_max_size})"
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to initialize database pool: {e}")
+            raise
+
+    def acquire(self):
+        if self.pool is None:
+            raise RuntimeError("Database pool is not initialized")
+        return self.pool.acquire()
+
+    async def release(self, conn) -> None:
+        await self.pool.release(conn)
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Database pool closed")
+
+
+database = Database()
@@ -0,0 +1,99 @@
+"""Offline catalog indexer: python -m app.indexer catalog.jsonl --output snapshots/catalog
+
+Embeds a catalog file across all cores and writes a portable snapshot: a
+float32 matrix, one JSON line per row (ids, texts, metadata, near-duplicate
+groups) and a manifest recording the model fingerprint. Load it into a
+service with SNAPSHOT_PATH or POST /api/v1/snapshots/import.
+
+The catalog is any file catalog_loader.iter_catalog reads: JSON Lines, CSV or
+Parquet, with a "text" field, an optional "id" and the rest as metadata.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+from loguru import logger
+from app.core.config import settings
+from app.services.catalog_loader import aiter_catalog
+from app.utils.snapshot import write_manifest
+
+
+def configure(workers: int) -> None:
+    """Point the service stack at a NumPy store and a full-width embedding pool"""
+    settings.vector_store_backend = "numpy"
+    # Only the float32 matrix is written; codes are derived when a store loads it
+    settings.vector_quantization = "none"
+    settings.semantic_cache_enabled = False
+    settings.rerank_enabled = False
+    if workers > 1:
+        settings.embedding_executor = "process"
+        settings.embedding_workers = workers
+        settings.embedding_reserved_query_workers = 0
+        settings.embedding_worker_torch_threads = 1
+
+
+async def build(source: Path, output: Path, batch_size: int) -> dict[str, Any]:
+    # Imported here: the singletons read the settings configure() just set
+    from app.services.embedding_service import embedding_service
+    from app.services.vector_store_service import chunking_config, vector_store_service
+
+    started = time.perf_counter()
+    await vector_store_service.initialize()
+
+    documents = 0
+
+    async def report(result: dict[str, Any]) -> None:
+        nonlocal documents
+        documents += len(result["node_ids"])
+        logger.info(f"Embedded {documents} documents ({documents / (time.perf_counter() - started):.0f}/s)")
+
+    try:
+        # The next batch is parsed while the current one is embedded
+        await vector_store_service.upsert_batches(aiter_catalog(source, batch_size), on_batch=report)
+    finally:
+        # Flushes the NumPy store to disk
+        await vector_store_service.close()
+        await embedding_service.close()
+
+    if documents == 0:
+        raise ValueError(f"{source} contains no documents")
+    return write_manifest(
+        output,
+        model=settings.embedding_model,
+        fingerprint=embedding_service.model_fingerprint(),
+        chunking=chunking_config(),
+        source=str(source),
+        documents=documents,
+        build_seconds=round(time.perf_counter() - started, 1),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embed a catalog file into a portable vector snapshot")
+    parser.add_argument("catalog", type=Path, help="JSON Lines, CSV or Parquet catalog file")
+    parser.add_argument("--output", type=Path, required=True, help="Snapshot directory to (re)create")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Embedding processes")
+    parser.add_argument("--batch-size", type=int, default=2048, help="Documents per upsert batch")
+    args = parser.parse_args()
+
+    configure(args.workers)
+    # Build beside the old snapshot so a failed run never leaves a half-written one
+    building = args.output.with_name(f"{args.output.name}.building")
+    shutil.rmtree(building, ignore_errors=True)
+    settings.numpy_store_dir = str(building)
+
+    manifest = asyncio.run(build(args.catalog, building, args.batch_size))
+
+    shutil.rmtree(args.output, ignore_errors=True)
+    os.replace(building, args.output)
+    logger.success(
+        f"Wrote {manifest['rows']} rows ({manifest['documents']} documents) to {args.output} "
+        f"in {manifest['build_seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,8 @@ from loguru import logger
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.services.rag_service import rag_service
+from app.services.vector_backend import ReloadInProgressError
 from app.api.rag_endpoints import router as rag_router
-from app.utils.data_loader import DataLoader
 
 logger.remove()
 logger.add(
@@ -27,11 +27,22 @@ async def lifespan(app: FastAPI):
         store_info = await rag_service.get_system_info()
         total_docs = store_info.get("vector_store", {}).get("total_documents", 0)
         
-        if total_docs == 0:
-            logger.info("Loading default documents...")
-            default_docs = DataLoader.load_sample_products()
-            node_ids = await rag_service.add_documents(default_docs)
-            logger.success(f"Loaded {len(node_ids)} default documents")
+        if total_docs == 0 and settings.snapshot_path:
+            logger.info(f"Loading vector snapshot from {settings.snapshot_path}...")
+            try:
+                result = await rag_service.import_snapshot(settings.snapshot_path)
+                logger.success(f"Loaded {result['rows']} rows from snapshot in {result['seconds']}s")
+            except ReloadInProgressError:
+                # Another pre-fork worker is importing it into the shared table
+                logger.info("Snapshot is being loaded by another worker")
+        elif total_docs == 0:
+            logger.info(f"Loading documents from {settings.catalog_path or 'the sample products'}...")
+            result = await rag_service.seed_documents()
+            if result is None:
+                # Pre-fork workers share the table; only the one holding the seed lock loads it
+                logger.info("Documents are loaded by another worker")
+            else:
+                logger.success(f"Loaded {result['documents']} documents")
         else:
             logger.info(f"Vector store contains {total_docs} documents")
         
@@ -44,6 +55,7 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("Shutting down RAG service...")
+    await rag_service.close()
 
 
 app = FastAPI(
@@ -57,10 +69,5 @@ app = FastAPI(
 app.include_router(rag_router, prefix="/api/v1")
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "app.main:app",
-        host=settings.api_host,
-        port=settings.api_port,
-        reload=False
-    )
\ No newline at end of file
+    from app.server import main
+    main()
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""Pre-fork launcher: python -m app.server
+
+With API_WORKERS > 1 the parent binds the listening socket and loads the
+embedding model, then forks the workers. The model weights are inherited
+copy-on-write, so N workers cost roughly one model's memory, and each worker
+serves requests on the shared socket with its own event loop.
+"""
+import gc
+import os
+import signal
+import sys
+import time
+import uvicorn
+from loguru import logger
+from app.core.config import settings
+
+APP = "app.main:app"
+
+
+def _validate(workers: int) -> None:
+    if settings.vector_store_backend == "numpy":
+        # Each worker would hold and flush its own diverging copy of the matrix
+        raise ValueError("API_WORKERS > 1 requires VECTOR_STORE_BACKEND=pgvector")
+    if settings.embedding_executor != "thread":
+        raise ValueError("API_WORKERS > 1 requires EMBEDDING_EXECUTOR=thread; the workers are the processes")
+
+
+def _limit_threads(threads: int) -> None:
+    """Cap intra-op parallelism so workers together use about one thread per core"""
+    if "torch" in sys.modules:
+        import torch
+        torch.set_num_threads(threads)
+
+
+def _preload_model() -> None:
+    if not settings.api_preload_model:
+        return
+    if settings.embedding_backend != "sentence-transformers":
+        # ONNX Runtime thread pools do not survive fork; each worker opens its own
+        # session instead (the int8 model is small)
+        logger.info(f"Not preloading the {settings.embedding_backend} model; workers load their own")
+        return
+
+    from app.services.embedding_service import load_configured_model
+
+    started = time.perf_counter()
+    load_configured_model()
+    # No inference here: torch's OpenMP pool must not start before the fork
+    logger.info(f"Preloaded {settings.embedding_model} in {time.perf_counter() - started:.1f}s")
+
+
+def _run_worker(config: uvicorn.Config, sock, threads: int) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _limit_threads(threads)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(config: uvicorn.Config, sock, threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(config, sock, threads)
+        except BaseException as e:
+            logger.error(f"Worker {os.getpid()} crashed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve_prefork(workers: int) -> None:
+    _validate(workers)
+    threads = settings.api_worker_threads or max(1, (os.cpu_count() or 1) // workers)
+
+    config = uvicorn.Config(APP, host=settings.api_host, port=settings.api_port)
+    sock = config.bind_socket()
+    _preload_model()
+    # Import the app (and everything it pulls in) once, before forking
+    config.load()
+    # Keep the collector from touching (and so copying) every inherited object page
+    gc.freeze()
+
+    children = {_spawn(config, sock, threads) for _ in range(workers)}
+    logger.info(f"Started {workers} workers with {threads} threads each: {sorted(children)}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+            # Avoid a tight crash loop if the app cannot start at all
+            time.sleep(1)
+            children.add(_spawn(config, sock, threads))
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def main() -> None:
+    if settings.api_workers <= 1:
+        uvicorn.run(APP, host=settings.api_host, port=settings.api_port, reload=False)
+    else:
+        serve_prefork(settings.api_workers)
+
+
+if __name__ == "__main__":
+    main()
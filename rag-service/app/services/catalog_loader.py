@@ -0,0 +1,106 @@
+import asyncio
+import csv
+import json
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator
+from loguru import logger
+from app.services.vector_backend import DocumentInput
+from app.utils.data_loader import DataLoader
+
+CATALOG_FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv", ".parquet": "parquet", ".json": "json"}
+
+
+def sample_batches(batch_size: int = 256) -> Iterator[list[DocumentInput]]:
+    """The sample products in the same batched form as a catalog file"""
+    documents = [DocumentInput(text=text) for text in DataLoader.load_sample_products()]
+    for start in range(0, len(documents), batch_size):
+        yield documents[start:start + batch_size]
+
+
+def iter_catalog(path: str | Path, batch_size: int = 256) -> Iterator[list[DocumentInput]]:
+    """Fixed-size batches of documents read lazily from a JSON Lines, CSV or Parquet catalog
+
+    Rows carry "text", an optional "id", and either a "metadata" object or
+    their remaining fields as metadata. A plain .json array is also accepted
+    but has to be read whole.
+    """
+    path = Path(path)
+    batch: list[DocumentInput] = []
+    skipped = 0
+    for row in _iter_rows(path):
+        document = _to_document(row)
+        if document is None:
+            skipped += 1
+            continue
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+    if skipped:
+        logger.warning(f"Skipped {skipped} rows without text in {path}")
+
+
+def aiter_catalog(path: str | Path, batch_size: int = 256) -> AsyncIterator[list[DocumentInput]]:
+    return aiter_batches(iter_catalog(path, batch_size))
+
+
+async def aiter_batches(batches: Iterator[list[DocumentInput]]) -> AsyncIterator[list[DocumentInput]]:
+    """Batches parsed in a worker thread one ahead of the consumer, so reading overlaps embedding"""
+    pending = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+    while True:
+        batch = await pending
+        if batch is None:
+            return
+        pending = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+        yield batch
+
+
+def _iter_rows(path: Path) -> Iterator[Any]:
+    catalog_format = CATALOG_FORMATS.get(path.suffix.lower())
+    if catalog_format is None:
+        raise ValueError(f"Unsupported catalog file {path}, expected one of {sorted(CATALOG_FORMATS)}")
+
+    if catalog_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ValueError("Reading Parquet catalogs requires pyarrow (the 'parquet' extra)") from e
+
+        # Row groups are decoded a slice at a time, never the whole table
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=4096):
+            yield from record_batch.to_pylist()
+        return
+
+    with open(path, "r", encoding="utf-8", newline="" if catalog_format == "csv" else None) as f:
+        if catalog_format == "csv":
+            yield from csv.DictReader(f)
+        elif catalog_format == "json":
+            yield from json.load(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _to_document(row: Any) -> DocumentInput | None:
+    if isinstance(row, str):
+        return DocumentInput(text=row) if row.strip() else None
+
+    text = row.get("text")
+    if not isinstance(text, str) or not text.strip():
+        return None
+    node_id = row.get("id")
+    metadata = row.get("metadata")
+    if not isinstance(metadata, dict):
+        # Flat rows (CSV columns, Parquet fields): everything else is metadata
+        metadata = {
+            key: value for key, value in row.items()
+            if key not in ("id", "text", "metadata") and value not in (None, "")
+        }
+    return DocumentInput(
+        text=text,
+        metadata=metadata,
+        node_id=str(node_id) if node_id not in (None, "") else None
+    )
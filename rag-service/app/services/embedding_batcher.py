@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+import numpy as np
+from loguru import logger
+from app.utils.metrics import Histogram
+
+
+class _PendingRequest:
+    __slots__ = ("text", "future", "enqueued_at")
+
+    def __init__(self, text: str, future: asyncio.Future):
+        self.text = text
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text encode requests into one model call"""
+
+    def __init__(
+        self,
+        encode_fn: Callable[[list[str]], Awaitable[np.ndarray]],
+        max_batch_size: int,
+        max_wait_ms: float
+    ):
+        self._encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending: list[_PendingRequest] = []
+        self._has_pending: asyncio.Event | None = None
+        self._batch_full: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_wait_ms = Histogram([0.5, 1, 2, 5, 10, 20, 50, 100, 250])
+
+    def _ensure_started(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+
+        self._has_pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Embedding batcher started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:g})"
+        )
+
+    async def submit(self, text: str) -> np.ndarray:
+        self._ensure_started()
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(_PendingRequest(text, future))
+        self._has_pending.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._batch_full.set()
+
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._has_pending.clear()
+                await self._has_pending.wait()
+
+            if len(self._pending) < self.max_batch_size and self.max_wait > 0:
+                self._batch_full.clear()
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            await self._process(batch)
+
+    async def _process(self, batch: list[_PendingRequest]) -> None:
+        batch = [request for request in batch if not request.future.done()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        for request in batch:
+            self.queue_wait_ms.observe((started - request.enqueued_at) * 1000)
+        self.batch_sizes.observe(len(batch))
+
+        try:
+            embeddings = await self._encode_fn([request.text for request in batch])
+        except Exception as e:
+            logger.error(f"Error encoding batch of {len(batch)} texts: {e}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        for request, embedding in zip(batch, embeddings):
+            if not request.future.done():
+                request.future.set_result(embedding)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for request in self._pending:
+            if not request.future.done():
+                request.future.cancel()
+        self._pending = []
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "enabled": True,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": len(self._pending),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
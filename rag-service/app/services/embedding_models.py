@@ -0,0 +1,162 @@
+import os
+from pathlib import Path
+from typing import Any
+import numpy as np
+from loguru import logger
+
+EMBEDDING_BACKENDS = ("sentence-transformers", "onnx")
+
+# Models already loaded in this process. A pre-fork parent fills this before
+# forking, so workers find the model here instead of loading their own copy
+_loaded_models: dict[tuple, Any] = {}
+
+
+def load_embedding_model(
+    backend: str,
+    model_name: str,
+    cache_dir: str,
+    threads: int = 0,
+    onnx_model_path: str | None = None,
+    quantize: bool = False,
+    max_seq_length: int = 256
+) -> Any:
+    """Model exposing encode(texts) -> float32 rows, get_sentence_embedding_dimension() and tokenizer"""
+    key = (backend, model_name, cache_dir, onnx_model_path, quantize, max_seq_length)
+    if key not in _loaded_models:
+        _loaded_models[key] = _load_embedding_model(
+            backend, model_name, cache_dir, threads, onnx_model_path, quantize, max_seq_length
+        )
+    return _loaded_models[key]
+
+
+def _load_embedding_model(
+    backend: str,
+    model_name: str,
+    cache_dir: str,
+    threads: int,
+    onnx_model_path: str | None,
+    quantize: bool,
+    max_seq_length: int
+) -> Any:
+    if backend == "sentence-transformers":
+        from sentence_transformers import SentenceTransformer
+
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name, cache_folder=f"{cache_dir}/sentence_transformers", device="cpu")
+
+    if backend == "onnx":
+        path = Path(onnx_model_path) if onnx_model_path else export_onnx_model(model_name, cache_dir, quantize)
+        return OnnxEmbeddingModel(path, model_name, cache_dir, threads=threads, max_seq_length=max_seq_length)
+
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+
+
+def export_onnx_model(model_name: str, cache_dir: str, quantize: bool = False) -> Path:
+    """Export the transformer to ONNX once (and optionally int8-quantize it); returns the cached file"""
+    directory = Path(cache_dir) / "onnx" / model_name.replace("/", "--")
+    model_path = directory / "model.onnx"
+    if not model_path.exists():
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        logger.info(f"Exporting {model_name} to ONNX at {model_path}")
+        model = AutoModel.from_pretrained(model_name, cache_dir=f"{cache_dir}/transformers")
+        model.config.return_dict = False
+        model.eval()
+        tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=f"{cache_dir}/transformers")
+        sample = tokenizer(["An example product description"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in [*input_names, "last_hidden_state"]}
+
+        directory.mkdir(parents=True, exist_ok=True)
+        # Written under a per-process name and renamed, so concurrent starts never see a partial file
+        partial = directory / f"model.onnx.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                str(partial),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        os.replace(partial, model_path)
+
+    if not quantize:
+        return model_path
+
+    quantized_path = directory / "model.int8.onnx"
+    if not quantized_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"Quantizing {model_path} to int8")
+        partial = directory / f"model.int8.onnx.{os.getpid()}.tmp"
+        # Dynamic quantization: int8 weights, activation scales computed per batch at run time
+        quantize_dynamic(str(model_path), str(partial), weight_type=QuantType.QInt8)
+        os.replace(partial, quantized_path)
+    return quantized_path
+
+
+class OnnxEmbeddingModel:
+    """ONNX Runtime port of the sentence-transformers mean-pooling + normalize pipeline"""
+
+    def __init__(
+        self,
+        path: Path,
+        model_name: str,
+        cache_dir: str,
+        threads: int = 0,
+        max_seq_length: int = 256,
+        batch_size: int = 32
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=f"{cache_dir}/transformers")
+        self.path = path
+        self.max_seq_length = max_seq_length
+        self.batch_size = batch_size
+        self._input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self._dimension: int | None = None
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = int(self.encode(["dimension probe"]).shape[1])
+        return self._dimension
+
+    def encode(self, texts: list[str], convert_to_tensor: bool = False, **kwargs) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self._dimension or 0), dtype=np.float32)
+
+        # Longest first, like sentence-transformers, so each batch pads to similar lengths
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        batches = []
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            token_embeddings = self.session.run(
+                ["last_hidden_state"],
+                {name: encoded[name].astype(np.int64) for name in self._input_names}
+            )[0]
+
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            batches.append(pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12))
+
+        embeddings = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(batches)
+        return embeddings
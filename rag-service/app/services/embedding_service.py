@@ -1,7 +1,29 @@
 import asyncio
-from sentence_transformers import SentenceTransformer
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from typing import Any
 from loguru import logger
 from app.core.config import settings
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_models import export_onnx_model, load_embedding_model
+from app.services.embedding_store import PersistentEmbeddingCache
+from app.services.embedding_workers import EmbeddingWorkerPool, INGEST_LANE, QUERY_LANE
+from app.utils.cache import LRUCache
+from app.utils.chunking import chunk_spans
+from app.utils.hashing import content_hash
+
+
+def load_configured_model() -> Any:
+    """The in-process embedding model described by settings (cached per process)"""
+    return load_embedding_model(
+        settings.embedding_backend,
+        settings.embedding_model,
+        settings.embedding_cache_dir,
+        threads=settings.onnx_threads if settings.embedding_backend == "onnx" else 0,
+        onnx_model_path=settings.onnx_model_path,
+        quantize=settings.onnx_quantize,
+        max_seq_length=settings.embedding_max_seq_length
+    )
 
 
 class EmbeddingService:
@@ -13,6 +35,25 @@ class EmbeddingService:
             cls._instance = super().__new__(cls)
             cls._instance._initialized = False
             cls._instance.model = None
+            cls._instance.tokenizer = None
+            cls._instance.worker_pool = None
+            # Thread mode: one bounded pool per lane, so queries never queue behind ingest
+            cls._instance.lane_executors = {}
+            cls._instance.disk_cache = None
+            cls._instance.query_cache = (
+                LRUCache(settings.query_embedding_cache_size, settings.query_embedding_cache_ttl_seconds)
+                if settings.query_embedding_cache_enabled
+                else None
+            )
+            cls._instance.batcher = (
+                EmbeddingBatcher(
+                    cls._instance._encode_array,
+                    max_batch_size=settings.embedding_batch_max_size,
+                    max_wait_ms=settings.embedding_batch_max_wait_ms
+                )
+                if settings.embedding_batching_enabled
+                else None
+            )
         return cls._instance
     
     async def initialize(self) -> None:
@@ -24,17 +65,64 @@ class EmbeddingService:
                 return
             
             try:
-                logger.info(f"Loading embedding model: {settings.embedding_model}")
-                
                 loop = asyncio.get_event_loop()
-                self.model = await loop.run_in_executor(
-                    None,
-                    lambda: SentenceTransformer(
-                        settings.embedding_model,
-                        cache_folder=".cache/sentence_transformers",
-                        device="cpu"
+                
+                if settings.embedding_executor == "process":
+                    # Workers hold the model; this process only needs the tokenizer
+                    from transformers import AutoTokenizer
+                    
+                    onnx_model_path = settings.onnx_model_path
+                    if settings.embedding_backend == "onnx" and onnx_model_path is None:
+                        # Export once here rather than racing in every worker
+                        onnx_model_path = str(await loop.run_in_executor(
+                            None,
+                            export_onnx_model,
+                            settings.embedding_model,
+                            settings.embedding_cache_dir,
+                            settings.onnx_quantize
+                        ))
+                    
+                    self.worker_pool = EmbeddingWorkerPool(
+                        model_name=settings.embedding_model,
+                        dimension=settings.embedding_dimension,
+                        num_workers=settings.embedding_workers,
+                        chunk_size=settings.embedding_worker_chunk_size,
+                        reserved_query_workers=settings.embedding_reserved_query_workers,
+                        torch_threads=settings.embedding_worker_torch_threads,
+                        cache_dir=settings.embedding_cache_dir,
+                        backend=settings.embedding_backend,
+                        onnx_model_path=onnx_model_path,
+                        max_seq_length=settings.embedding_max_seq_length
                     )
-                )
+                    await self.worker_pool.start()
+                    self.tokenizer = await loop.run_in_executor(
+                        None,
+                        lambda: AutoTokenizer.from_pretrained(
+                            settings.embedding_model,
+                            cache_dir=f"{settings.embedding_cache_dir}/transformers"
+                        )
+                    )
+                else:
+                    logger.info(f"Loading {settings.embedding_backend} embedding model: {settings.embedding_model}")
+                    self.model = await loop.run_in_executor(None, load_configured_model)
+                    self.tokenizer = self.model.tokenizer
+                    self.lane_executors = {
+                        QUERY_LANE: ThreadPoolExecutor(
+                            max(1, settings.embedding_query_threads), thread_name_prefix="embed-query"
+                        ),
+                        INGEST_LANE: ThreadPoolExecutor(
+                            max(1, settings.embedding_ingest_threads), thread_name_prefix="embed-ingest"
+                        ),
+                    }
+                
+                if settings.embedding_disk_cache_enabled:
+                    self.disk_cache = PersistentEmbeddingCache(
+                        settings.embedding_disk_cache_path
+                        or f"{settings.embedding_cache_dir}/embeddings.sqlite3",
+                        fingerprint=self.model_fingerprint(),
+                        dimension=settings.embedding_dimension
+                    )
+                    await self.disk_cache.initialize()
                 
                 self._initialized = True
                 logger.success("Embedding service initialized")
@@ -43,24 +131,167 @@ class EmbeddingService:
                 logger.error(f"Failed to initialize embedding service: {e}")
                 raise
     
-    async def encode(self, texts: list[str]) -> list[list[float]]:
+    async def _encode_array(self, texts: list[str], lane: str = QUERY_LANE) -> np.ndarray:
+        if self.worker_pool is not None:
+            return await self.worker_pool.encode(texts, lane)
+        
+        # Ingest batches wait for the ingest threads only; the model still shares
+        # CPU cores with queries, which only the process executor fully separates
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.lane_executors.get(lane),
+            lambda: self.model.encode(texts, convert_to_tensor=False)
+        )
+    
+    async def encode_array(self, texts: list[str], lane: str = INGEST_LANE) -> np.ndarray:
         if not self._initialized:
             await self.initialize()
         
         try:
-            loop = asyncio.get_event_loop()
-            embeddings = await loop.run_in_executor(
-                None,
-                lambda: self.model.encode(texts, convert_to_tensor=False)
-            )
-            return embeddings.tolist()
+            if self.disk_cache is not None and lane == INGEST_LANE:
+                return await self._encode_with_disk_cache(texts)
+            return await self._encode_array(texts, lane)
         except Exception as e:
             logger.error(f"Error encoding texts: {e}")
             raise
     
-    async def encode_single(self, text: str) -> list[float]:
-        embeddings = await self.encode([text])
+    async def chunk_spans(self, texts: list[str]) -> list[list[tuple[int, int]]]:
+        """Split each text into overlapping windows that fit the model's sequence length"""
+        if not self._initialized:
+            await self.initialize()
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None,
+            lambda: [
+                chunk_spans(text, self.tokenizer, settings.chunk_max_tokens, settings.chunk_overlap_tokens)
+                for text in texts
+            ]
+        )
+    
+    async def _encode_with_disk_cache(self, texts: list[str]) -> np.ndarray:
+        hashes = [content_hash(text) for text in texts]
+        vectors = await self.disk_cache.get_many(list(set(hashes)))
+        
+        # Embed each distinct missing text once, then persist it
+        missing = {h: text for h, text in zip(hashes, texts) if h not in vectors}
+        if missing:
+            encoded = await self._encode_array(list(missing.values()), INGEST_LANE)
+            await self.disk_cache.put_many(list(missing), encoded)
+            vectors.update(zip(missing, encoded))
+        
+        embeddings = np.empty((len(texts), settings.embedding_dimension), dtype=np.float32)
+        for i, h in enumerate(hashes):
+            embeddings[i] = vectors[h]
+        return embeddings
+    
+    async def encode(self, texts: list[str], lane: str = INGEST_LANE) -> list[list[float]]:
+        embeddings = await self.encode_array(texts, lane)
+        return embeddings.tolist()
+    
+    async def encode_single(self, text: str) -> np.ndarray:
+        if not self._initialized:
+            await self.initialize()
+        
+        if self.query_cache is None:
+            return await self._encode_query(text)
+        
+        key = self._normalize_query(text)
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        embedding = self._cacheable(await self._encode_query(text))
+        self.query_cache.set(key, embedding)
+        return embedding
+    
+    @staticmethod
+    def _cacheable(embedding: np.ndarray) -> np.ndarray:
+        # An owned float32 copy (~1.5 KB at 384 dims, not a view pinning its whole
+        # batch), read-only since every hit hands out the same array
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.flags.writeable = False
+        return embedding
+    
+    async def encode_queries(self, texts: list[str]) -> np.ndarray:
+        """Embed many queries with one model call, serving repeats from the query cache"""
+        if not self._initialized:
+            await self.initialize()
+        
+        if not texts:
+            return np.empty((0, settings.embedding_dimension), dtype=np.float32)
+        
+        keys = [self._normalize_query(text) for text in texts]
+        embeddings = np.empty((len(texts), settings.embedding_dimension), dtype=np.float32)
+        missing: dict[str, str] = {}
+        for i, (key, text) in enumerate(zip(keys, texts)):
+            cached = self.query_cache.get(key) if self.query_cache is not None else None
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                missing.setdefault(key, text)
+        
+        if missing:
+            encoded = dict(zip(missing, await self._encode_array(list(missing.values()), QUERY_LANE)))
+            for i, key in enumerate(keys):
+                if key in encoded:
+                    embeddings[i] = encoded[key]
+            if self.query_cache is not None:
+                for key, embedding in encoded.items():
+                    self.query_cache.set(key, self._cacheable(embedding))
+        
+        return embeddings
+    
+    async def _encode_query(self, text: str) -> np.ndarray:
+        if self.batcher is not None:
+            return await self.batcher.submit(text)
+        
+        embeddings = await self.encode_array([text], lane=QUERY_LANE)
         return embeddings[0]
+    
+    def _normalize_query(self, text: str) -> str:
+        # Only fold case for uncased tokenizers (MiniLM) so two keys never map
+        # texts with different embeddings to the same entry
+        text = " ".join(text.split())
+        if getattr(self.tokenizer, "do_lower_case", False):
+            text = text.lower()
+        return text
+    
+    def model_fingerprint(self) -> str:
+        fingerprint = f"{settings.embedding_model}|dim={settings.embedding_dimension}"
+        if settings.embedding_backend == "onnx":
+            # int8 weights shift the vectors slightly, so they must not share cached rows
+            fingerprint += f"|onnx{'-int8' if settings.onnx_quantize else ''}|{settings.onnx_model_path or 'export'}"
+        return fingerprint
+    
+    def get_info(self) -> dict[str, Any]:
+        return {
+            "initialized": self._initialized,
+            "model": settings.embedding_model,
+            "backend": settings.embedding_backend,
+            "query_cache": self.query_cache.stats() if self.query_cache is not None else {"enabled": False},
+            "batching": self.batcher.get_stats() if self.batcher is not None else {"enabled": False},
+            "executor": self.worker_pool.get_stats() if self.worker_pool is not None else {
+                "type": "thread",
+                "query_threads": settings.embedding_query_threads,
+                "ingest_threads": settings.embedding_ingest_threads,
+            },
+            "disk_cache": self.disk_cache.get_stats() if self.disk_cache is not None else {"enabled": False}
+        }
+    
+    async def close(self) -> None:
+        if self.batcher is not None:
+            await self.batcher.close()
+        if self.disk_cache is not None:
+            await self.disk_cache.close()
+            self.disk_cache = None
+        if self.worker_pool is not None:
+            await self.worker_pool.close()
+            self.worker_pool = None
+        for executor in self.lane_executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.lane_executors = {}
+        self._initialized = False
 
 
 embedding_service = EmbeddingService()
\ No newline at end of file
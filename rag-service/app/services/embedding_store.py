@@ -0,0 +1,124 @@
+import asyncio
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import Any
+import numpy as np
+from loguru import logger
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+
+class PersistentEmbeddingCache:
+    """On-disk content-hash -> float32 vector store, tied to one model fingerprint"""
+
+    def __init__(self, path: str, fingerprint: str, dimension: int):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.dimension = dimension
+        self._conn: sqlite3.Connection | None = None
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (content_hash TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+
+        row = conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != self.fingerprint:
+            if row is not None:
+                logger.warning(
+                    f"Embedding cache was built with '{row[0]}', now '{self.fingerprint}'; invalidating"
+                )
+            conn.execute("DELETE FROM embeddings")
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)",
+                (self.fingerprint,)
+            )
+        conn.commit()
+        self._conn = conn
+
+    async def initialize(self) -> None:
+        if self._conn is not None:
+            return
+
+        await asyncio.to_thread(self._open)
+        logger.info(f"Persistent embedding cache opened at {self.path} ({await self.count()} vectors)")
+
+    def _get_many(self, hashes: list[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(hashes), _LOOKUP_CHUNK):
+                chunk = hashes[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT content_hash, vector FROM embeddings WHERE content_hash IN ({placeholders})",
+                    chunk
+                )
+                for content_hash, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    if vector.shape[0] == self.dimension:
+                        found[content_hash] = vector
+        return found
+
+    async def get_many(self, hashes: list[str]) -> dict[str, np.ndarray]:
+        if not hashes:
+            return {}
+
+        found = await asyncio.to_thread(self._get_many, hashes)
+        self.hits += len(found)
+        self.misses += len(hashes) - len(found)
+        return found
+
+    def _put_many(self, items: list[tuple[str, bytes]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (content_hash, vector) VALUES (?, ?)",
+                items
+            )
+            self._conn.commit()
+
+    async def put_many(self, hashes: list[str], embeddings: np.ndarray) -> None:
+        if not hashes:
+            return
+
+        items = [
+            (content_hash, np.ascontiguousarray(embedding, dtype=np.float32).tobytes())
+            for content_hash, embedding in zip(hashes, embeddings)
+        ]
+        await asyncio.to_thread(self._put_many, items)
+        self.writes += len(items)
+
+    def _count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(self._count)
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
+
+    def get_stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "path": str(self.path),
+            "fingerprint": self.fingerprint,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
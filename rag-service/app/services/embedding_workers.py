@@ -0,0 +1,238 @@
+import asyncio
+import multiprocessing as mp
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any
+import numpy as np
+from loguru import logger
+from app.utils.metrics import Histogram
+
+QUERY_LANE = "query"
+INGEST_LANE = "ingest"
+
+# Model held by each worker process, loaded once by the pool initializer
+_worker_model = None
+
+
+def _init_worker(
+    backend: str,
+    model_name: str,
+    cache_dir: str,
+    threads: int,
+    onnx_model_path: str | None,
+    max_seq_length: int
+) -> None:
+    global _worker_model
+
+    from app.services.embedding_models import load_embedding_model
+
+    _worker_model = load_embedding_model(
+        backend,
+        model_name,
+        cache_dir,
+        threads=threads,
+        onnx_model_path=onnx_model_path,
+        max_seq_length=max_seq_length
+    )
+
+
+def _warmup_worker() -> int:
+    return _worker_model.get_sentence_embedding_dimension()
+
+
+def _encode_into_shared_memory(texts: list[str], shm_name: str, dimension: int) -> int:
+    # The parent owns the segment and unlinks it once the rows are copied out
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((len(texts), dimension), dtype=np.float32, buffer=shm.buf)
+        out[:] = _worker_model.encode(texts, convert_to_tensor=False)
+        del out
+    finally:
+        shm.close()
+    return len(texts)
+
+
+class _Job:
+    __slots__ = ("texts", "future", "enqueued_at")
+
+    def __init__(self, texts: list[str], future: asyncio.Future):
+        self.texts = texts
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingWorkerPool:
+    """Runs the embedding model in dedicated processes with query/ingest priority lanes"""
+
+    def __init__(
+        self,
+        model_name: str,
+        dimension: int,
+        num_workers: int,
+        chunk_size: int,
+        reserved_query_workers: int,
+        torch_threads: int,
+        cache_dir: str = ".cache",
+        backend: str = "sentence-transformers",
+        onnx_model_path: str | None = None,
+        max_seq_length: int = 256
+    ):
+        self.model_name = model_name
+        self.dimension = dimension
+        self.num_workers = max(1, num_workers)
+        self.chunk_size = max(1, chunk_size)
+        # Always leave at least one worker able to pick up ingest work
+        self.reserved_query_workers = min(max(0, reserved_query_workers), self.num_workers - 1)
+        self.torch_threads = max(1, torch_threads)
+        self.cache_dir = cache_dir
+        self.backend = backend
+        self.onnx_model_path = onnx_model_path
+        self.max_seq_length = max_seq_length
+        self._executor: ProcessPoolExecutor | None = None
+        self._dispatchers: list[asyncio.Task] = []
+        self._lanes: dict[str, deque[_Job]] = {QUERY_LANE: deque(), INGEST_LANE: deque()}
+        self._work_available: asyncio.Condition | None = None
+        self._completed = {QUERY_LANE: 0, INGEST_LANE: 0}
+        self._wait_ms = {
+            QUERY_LANE: Histogram([1, 5, 10, 25, 50, 100, 250, 1000]),
+            INGEST_LANE: Histogram([10, 50, 100, 250, 1000, 5000, 30000]),
+        }
+
+    async def start(self) -> None:
+        if self._executor is not None:
+            return
+
+        logger.info(
+            f"Starting {self.num_workers} embedding worker processes "
+            f"({self.reserved_query_workers} reserved for queries)"
+        )
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                self.backend,
+                self.model_name,
+                self.cache_dir,
+                self.torch_threads,
+                self.onnx_model_path,
+                self.max_seq_length
+            )
+        )
+
+        loop = asyncio.get_running_loop()
+        dimensions = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, _warmup_worker)
+            for _ in range(self.num_workers)
+        ])
+        if any(dim != self.dimension for dim in dimensions):
+            raise ValueError(
+                f"Embedding model dimension {dimensions[0]} does not match configured {self.dimension}"
+            )
+
+        self._work_available = asyncio.Condition()
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch(query_only=i < self.reserved_query_workers))
+            for i in range(self.num_workers)
+        ]
+        logger.success("Embedding worker processes ready")
+
+    async def encode(self, texts: list[str], lane: str = QUERY_LANE) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        loop = asyncio.get_running_loop()
+        jobs = [
+            _Job(texts[start:start + self.chunk_size], loop.create_future())
+            for start in range(0, len(texts), self.chunk_size)
+        ]
+
+        async with self._work_available:
+            self._lanes[lane].extend(jobs)
+            self._work_available.notify_all()
+
+        try:
+            results = await asyncio.gather(*[job.future for job in jobs])
+        except BaseException:
+            for job in jobs:
+                job.future.cancel()
+            raise
+        return results[0] if len(results) == 1 else np.vstack(results)
+
+    async def _next_job(self, query_only: bool) -> tuple[str, _Job]:
+        async with self._work_available:
+            while True:
+                if self._lanes[QUERY_LANE]:
+                    return QUERY_LANE, self._lanes[QUERY_LANE].popleft()
+                if not query_only and self._lanes[INGEST_LANE]:
+                    return INGEST_LANE, self._lanes[INGEST_LANE].popleft()
+                await self._work_available.wait()
+
+    async def _dispatch(self, query_only: bool) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            lane, job = await self._next_job(query_only)
+            if job.future.done():
+                continue
+
+            self._wait_ms[lane].observe((time.perf_counter() - job.enqueued_at) * 1000)
+            shm = shared_memory.SharedMemory(
+                create=True,
+                size=max(1, len(job.texts) * self.dimension * 4)
+            )
+            try:
+                await loop.run_in_executor(
+                    self._executor,
+                    _encode_into_shared_memory,
+                    job.texts,
+                    shm.name,
+                    self.dimension
+                )
+                view = np.ndarray((len(job.texts), self.dimension), dtype=np.float32, buffer=shm.buf)
+                result = view.copy()
+                del view
+                if not job.future.done():
+                    job.future.set_result(result)
+                self._completed[lane] += 1
+            except Exception as e:
+                logger.error(f"Embedding worker failed on {len(job.texts)} texts: {e}")
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                shm.close()
+                shm.unlink()
+
+    async def close(self) -> None:
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+
+        for lane in self._lanes.values():
+            while lane:
+                lane.popleft().future.cancel()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("Embedding worker processes stopped")
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "type": "process",
+            "backend": self.backend,
+            "workers": self.num_workers,
+            "reserved_query_workers": self.reserved_query_workers,
+            "chunk_size": self.chunk_size,
+            "lanes": {
+                lane: {
+                    "pending_chunks": len(self._lanes[lane]),
+                    "completed_chunks": self._completed[lane],
+                    "wait_ms": self._wait_ms[lane].snapshot(),
+                }
+                for lane in self._lanes
+            }
+        }
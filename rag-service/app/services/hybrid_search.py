@@ -0,0 +1,38 @@
+import re
+from dataclasses import replace
+from app.services.vector_backend import SearchResult
+from app.utils.bm25 import split_negations, tokenize
+
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+
+_IDENTIFIER = re.compile(r"^(?=.*\d)(?=.*[a-z])[a-z0-9]+(?:[-_./][a-z0-9]+)*$")
+
+
+def identifier_tokens(query: str) -> set[str]:
+    """Model numbers and SKUs the query asks for; excluded ("-s23") ones do not count"""
+    return {token for token in split_negations(query)[0].lower().split() if _IDENTIFIER.match(token)}
+
+
+def is_exact_token_query(query: str, max_tokens: int = 3) -> bool:
+    """Short queries that contain a model number or SKU (e.g. "WH-1000XM5", "s24 ultra")"""
+    return 0 < len(query.split()) <= max_tokens and bool(identifier_tokens(query))
+
+
+def matches_identifier(query: str, results: list[SearchResult]) -> bool:
+    """Whether a lexical hit contains the query's identifier, not just one of its other terms"""
+    identifiers = identifier_tokens(query)
+    return any(identifiers.intersection(tokenize(result.text)) for result in results)
+
+
+def reciprocal_rank_fusion(rankings: list[list[SearchResult]], k: int = 60) -> list[SearchResult]:
+    """Merge ranked lists by summing 1 / (k + rank); scores of the inputs are ignored"""
+    fused: dict[str, SearchResult] = {}
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            fused.setdefault(result.node_id, result)
+            scores[result.node_id] = scores.get(result.node_id, 0.0) + 1.0 / (k + rank)
+
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    # Only the score changes; parent and group links are needed to stitch chunks
+    return [replace(fused[node_id], score=scores[node_id]) for node_id in ordered]
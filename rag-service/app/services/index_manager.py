@@ -0,0 +1,306 @@
+import asyncio
+import math
+import time
+from typing import Any
+from loguru import logger
+from app.core.config import settings
+from app.core.database import database
+
+INDEX_TYPES = ("hnsw", "ivfflat", "none")
+RECALL_LEVELS = ("fast", "balanced", "high", "exact")
+
+# Multipliers applied to the configured ef_search / probes for each recall level
+_RECALL_FACTORS = {"fast": 0.5, "balanced": 1.0, "high": 4.0}
+
+
+def indexed_expression(quantization: str, dimension: int) -> tuple[str, str, str]:
+    """Indexed expression, operator class and distance operator for a storage mode"""
+    if quantization == "halfvec":
+        return f"(embedding::halfvec({dimension}))", "halfvec_cosine_ops", "<=>"
+    if quantization == "binary":
+        return f"(binary_quantize(embedding)::bit({dimension}))", "bit_hamming_ops", "<~>"
+    if quantization == "none":
+        return "embedding", "vector_cosine_ops", "<=>"
+    raise ValueError(f"pgvector cannot index '{quantization}' embeddings; use none, halfvec or binary")
+
+
+def ivfflat_lists_for(rows: int) -> int:
+    """pgvector's sizing guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond"""
+    if rows <= 1_000_000:
+        return max(1, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+class VectorIndexManager:
+    """Creates, rebuilds and tunes the ANN index on the pgvector embeddings table"""
+
+    def __init__(self, table: str, data_table: str | None = None):
+        self.table = table
+        self.index_type = settings.vector_index_type
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown vector index type '{self.index_type}', expected one of {INDEX_TYPES}")
+
+        self.quantization = settings.vector_quantization
+        self.expression, self.opclass, self.operator = indexed_expression(
+            self.quantization, settings.embedding_dimension
+        )
+        suffix = self.index_type if self.quantization == "none" else f"{self.quantization}_{self.index_type}"
+        self.index_name = f"{data_table or settings.vector_data_table}_embedding_{suffix}_idx"
+        self._qualified_index = f"{settings.vector_schema_name}.{self.index_name}"
+        self._build_lock = asyncio.Lock()
+        self._build_task: asyncio.Task | None = None
+        # Set while another worker holds the build lock and this one waits to pick up the result
+        self._follow_task: asyncio.Task | None = None
+        self._building = False
+        self._options: dict[str, int] = {}
+        self._status: dict[str, Any] = {"exists": False}
+        self._status_checked_at = 0.0
+        self._status_lock = asyncio.Lock()
+        self.last_build: dict[str, Any] | None = None
+
+    async def initialize(self) -> None:
+        await self.refresh_status()
+        await self.optimize()
+
+    async def refresh_if_stale(self) -> None:
+        """Re-read the index from the catalog once the cached status is older than its TTL
+
+        The status is per process: under the pre-fork server another worker may
+        build, rebuild or drop the index without this one taking part.
+        """
+        age = time.monotonic() - self._status_checked_at
+        if self.index_type == "none" or age < settings.vector_index_status_ttl_seconds:
+            return
+        if self._status_lock.locked():
+            # Another query is already refreshing; use the current status meanwhile
+            return
+        async with self._status_lock:
+            try:
+                await self.refresh_status()
+            except Exception as e:
+                # Searching with a slightly stale status beats failing the query
+                logger.error(f"Failed to refresh {self.index_name} status: {e}")
+                self._status_checked_at = time.monotonic()
+
+    async def refresh_status(self) -> None:
+        self._status_checked_at = time.monotonic()
+        async with database.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT c.reloptions, i.indisvalid, pg_relation_size(c.oid) AS size_bytes,
+                    i.indpred IS NOT NULL AS partial
+                FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+                WHERE c.oid = to_regclass($1)
+                """,
+                self._qualified_index
+            )
+
+        if row is None:
+            self._options = {}
+            self._status = {"exists": False}
+            return
+
+        self._options = {
+            key: int(value)
+            for key, value in (option.split("=", 1) for option in row["reloptions"] or [])
+            if value.isdigit()
+        }
+        self._status = {
+            "exists": True,
+            "valid": row["indisvalid"],
+            "partial": row["partial"],
+            "size_bytes": row["size_bytes"],
+            "options": self._options,
+        }
+
+    def _needs_build(self, rows: int) -> bool:
+        if rows < settings.vector_index_min_rows:
+            return False
+        if not self._status["exists"] or not self._status.get("valid", False):
+            return True
+        if not self._status.get("partial", False):
+            # Indexes from before near-duplicate grouping also cover non-canonical rows
+            return True
+        if self.index_type == "ivfflat":
+            # Centroids are trained once at build time; retrain when the table
+            # has grown or shrunk enough that the list count is off by 2x
+            built_lists = self._options.get("lists", 1)
+            wanted_lists = ivfflat_lists_for(rows)
+            return not (built_lists / 2 <= wanted_lists <= built_lists * 2)
+        return False
+
+    async def optimize(self) -> None:
+        """Build or rebuild the index in the background if the current row count calls for it"""
+        if self.index_type == "none" or self._build_lock.locked():
+            return
+
+        rows = await self._estimated_rows()
+
+        if self.index_type == "ivfflat" and self._status["exists"] and rows < settings.vector_index_min_rows:
+            # Too few rows left for meaningful centroids; exact scan is cheaper anyway
+            await self.drop()
+        elif self._needs_build(rows):
+            self._build_task = asyncio.create_task(self._rebuild_in_background(rows))
+
+    async def _estimated_rows(self) -> int:
+        """Row count from planner statistics, so the threshold check never scans the table"""
+        async with database.acquire() as conn:
+            # reltuples is -1 until the first (auto)ANALYZE; bulk loads and swaps analyze
+            rows = await conn.fetchval(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass($1)", self.table
+            )
+            if rows is None or rows < 0:
+                rows = await conn.fetchval(f"SELECT COUNT(*) FROM {self.table} WHERE is_canonical")
+        return rows
+
+    async def _rebuild_in_background(self, rows: int) -> None:
+        try:
+            await self.rebuild(rows, background=True)
+        except Exception:
+            # Already logged; queries fall back to the previous index or a sequential scan
+            pass
+
+    async def rebuild(self, rows: int | None = None, background: bool = False) -> dict[str, Any]:
+        if self.index_type == "none":
+            raise ValueError("Vector index type is 'none'")
+
+        async with self._build_lock:
+            if rows is None:
+                async with database.acquire() as conn:
+                    rows = await conn.fetchval(f"SELECT COUNT(*) FROM {self.table} WHERE is_canonical")
+
+            if self.index_type == "hnsw":
+                options = {"m": settings.hnsw_m, "ef_construction": settings.hnsw_ef_construction}
+            else:
+                options = {"lists": ivfflat_lists_for(rows)}
+            with_clause = ", ".join(f"{key} = {value}" for key, value in options.items())
+
+            # Build under a temporary name and swap, so queries keep using the old
+            # index (or a sequential scan) until the new one is ready
+            building = f"{self.index_name}_new"
+            started = time.perf_counter()
+            self._building = True
+            try:
+                async with database.acquire() as conn:
+                    # Pre-fork workers share the table; only one of them may build at a time
+                    if not await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", self.index_name):
+                        logger.info(f"{self.index_name} is already being built by another worker")
+                        self._follow_other_build()
+                        return {"skipped": "already being built by another worker"}
+                    if background:
+                        # Another worker may have finished the same build while this one waited
+                        await self.refresh_status()
+                        if not self._needs_build(rows):
+                            await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", self.index_name)
+                            return {"skipped": "already built by another worker"}
+
+                    logger.info(f"Building {self.index_type} index on {self.table} ({rows} rows, {with_clause})")
+                    await conn.execute(f"SET maintenance_work_mem = '{settings.vector_index_maintenance_work_mem}'")
+                    try:
+                        await conn.execute(f"DROP INDEX IF EXISTS {settings.vector_schema_name}.{building}")
+                        await conn.execute(f"""
+                            CREATE INDEX CONCURRENTLY {building} ON {self.table}
+                            USING {self.index_type} ({self.expression} {self.opclass})
+                            WITH ({with_clause})
+                            WHERE is_canonical
+                        """)
+                        async with conn.transaction():
+                            await conn.execute(f"DROP INDEX IF EXISTS {self._qualified_index}")
+                            await conn.execute(
+                                f"ALTER INDEX {settings.vector_schema_name}.{building} RENAME TO {self.index_name}"
+                            )
+                        await conn.execute(f"ANALYZE {self.table}")
+                    finally:
+                        await conn.execute("RESET maintenance_work_mem")
+                        await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", self.index_name)
+
+                self.last_build = {
+                    "rows": rows,
+                    "options": options,
+                    "seconds": round(time.perf_counter() - started, 2),
+                    "finished_at": time.time(),
+                }
+                logger.success(f"Built {self.index_name} in {self.last_build['seconds']}s")
+                return self.last_build
+
+            except Exception as e:
+                logger.error(f"Failed to build vector index: {e}")
+                raise
+            finally:
+                self._building = False
+                await self.refresh_status()
+
+    def _follow_other_build(self) -> None:
+        if self._follow_task is None or self._follow_task.done():
+            self._follow_task = asyncio.create_task(self._wait_for_other_build())
+
+    async def _wait_for_other_build(self) -> None:
+        """Poll the build lock until the worker holding it lets go, then pick up its index"""
+        try:
+            while True:
+                await asyncio.sleep(settings.vector_index_build_poll_seconds)
+                async with database.acquire() as conn:
+                    if await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", self.index_name):
+                        await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", self.index_name)
+                        break
+            await self.refresh_status()
+            logger.info(f"Picked up {self.index_name} built by another worker (exists={self._status['exists']})")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The status TTL still catches up with the other worker's build eventually
+            logger.error(f"Error waiting for {self.index_name} build: {e}")
+
+    async def drop(self) -> None:
+        async with self._build_lock:
+            async with database.acquire() as conn:
+                await conn.execute(f"DROP INDEX IF EXISTS {self._qualified_index}")
+            logger.info(f"Dropped {self.index_name}")
+            await self.refresh_status()
+
+    async def close(self) -> None:
+        for task in (self._build_task, self._follow_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+    def search_settings(self, k: int, recall: str | None = None, filtered: bool = False) -> dict[str, str]:
+        """Session settings for one query at the requested recall level"""
+        recall = recall or "balanced"
+        if recall not in RECALL_LEVELS:
+            raise ValueError(f"Unknown recall level '{recall}', expected one of {RECALL_LEVELS}")
+
+        if self.index_type == "none" or not self._status["exists"]:
+            return {}
+        if recall == "exact":
+            return {"enable_indexscan": "off"}
+
+        factor = _RECALL_FACTORS[recall]
+        iterative_scan = settings.vector_index_iterative_scan
+        if self.index_type == "hnsw":
+            # ef_search below k would cap the number of rows the index can return
+            search = {"hnsw.ef_search": str(max(k, int(settings.hnsw_ef_search * factor)))}
+            if filtered and iterative_scan != "off":
+                # Keep walking the graph until k rows pass the filter instead of
+                # returning whatever survives of the first ef_search candidates
+                search["hnsw.iterative_scan"] = iterative_scan
+            return search
+
+        lists = self._options.get("lists", 1)
+        base_probes = settings.ivfflat_probes or max(1, round(math.sqrt(lists)))
+        search = {"ivfflat.probes": str(min(lists, max(1, int(base_probes * factor))))}
+        if filtered and iterative_scan != "off":
+            # IVFFlat only supports relaxed ordering; the backend re-sorts the rows it returns
+            search["ivfflat.iterative_scan"] = "relaxed_order"
+        return search
+
+    def get_status(self) -> dict[str, Any]:
+        return {
+            "type": self.index_type,
+            "name": self.index_name,
+            "quantization": self.quantization,
+            **self._status,
+            "building": self._building,
+            "building_elsewhere": self._follow_task is not None and not self._follow_task.done(),
+            "last_build": self.last_build,
+            "default_search": self.search_settings(settings.top_k),
+        }
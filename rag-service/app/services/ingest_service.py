@@ -0,0 +1,185 @@
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator
+from loguru import logger
+from app.core.config import settings
+from app.services.vector_backend import DocumentInput
+from app.services.vector_store_service import vector_store_service
+
+# Sentinel that tells the writer the stream is exhausted
+_END_OF_STREAM = None
+
+
+class IngestProgress:
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self.rows_received = 0
+        self.rows_written = 0
+        self.rows_unchanged = 0
+        self.batches_written = 0
+        self.errors: list[str] = []
+        self.error_count = 0
+        self.status = "running"
+
+    def add_error(self, message: str) -> None:
+        self.error_count += 1
+        # Keep only the first few messages so a bad upload cannot grow memory
+        if len(self.errors) < 10:
+            self.errors.append(message)
+
+    def to_dict(self) -> dict[str, Any]:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "status": self.status,
+            "rows_received": self.rows_received,
+            "rows_written": self.rows_written,
+            "rows_unchanged": self.rows_unchanged,
+            "batches_written": self.batches_written,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows_written / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class IngestService:
+    """Streams NDJSON documents into the vector store in bounded, fixed-size batches"""
+
+    def __init__(self):
+        self.current: IngestProgress | None = None
+        self.last: IngestProgress | None = None
+
+    async def ingest_stream(self, chunks: AsyncIterator[bytes]) -> dict[str, Any]:
+        progress = IngestProgress()
+        self.current = progress
+        logger.info("Starting streaming ingest")
+
+        # A small bounded queue between parsing and embedding: when the writer
+        # falls behind, put() blocks and we stop reading the request body
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.ingest_max_pending_batches))
+        writer = asyncio.create_task(self._write_batches(queue, progress))
+
+        try:
+            async for batch in self._parse_batches(chunks, progress):
+                await self._put(queue, batch, writer)
+            await self._put(queue, _END_OF_STREAM, writer)
+            await writer
+
+            progress.status = "completed"
+            logger.success(
+                f"Streaming ingest completed: {progress.rows_written} rows "
+                f"in {progress.batches_written} batches"
+            )
+            return progress.to_dict()
+
+        except BaseException as e:
+            progress.status = "failed"
+            progress.add_error(str(e))
+            writer.cancel()
+            logger.error(f"Streaming ingest failed after {progress.rows_written} rows: {e}")
+            raise
+
+        finally:
+            progress.finished_at = time.time()
+            self.last = progress
+            self.current = None
+
+    @staticmethod
+    async def _put(queue: asyncio.Queue, item: Any, writer: asyncio.Task) -> None:
+        if writer.done():
+            writer.result()
+            raise RuntimeError("Ingest writer stopped unexpectedly")
+
+        put = asyncio.ensure_future(queue.put(item))
+        await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            # The writer stopped before draining the queue; surface its error
+            writer.result()
+            raise RuntimeError("Ingest writer stopped unexpectedly")
+
+    async def _parse_batches(
+        self,
+        chunks: AsyncIterator[bytes],
+        progress: IngestProgress
+    ) -> AsyncIterator[list[DocumentInput]]:
+        batch_size = max(1, settings.ingest_batch_size)
+        batch: list[DocumentInput] = []
+        buffer = b""
+        line_number = 0
+
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                document = self._parse_line(line, line_number, progress)
+                if document is None:
+                    continue
+                batch.append(document)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+        if buffer.strip():
+            document = self._parse_line(buffer, line_number + 1, progress)
+            if document is not None:
+                batch.append(document)
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _parse_line(line: bytes, line_number: int, progress: IngestProgress) -> DocumentInput | None:
+        line = line.strip()
+        if not line:
+            return None
+
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            progress.add_error(f"line {line_number}: invalid JSON ({e.msg})")
+            return None
+
+        if isinstance(item, str):
+            text, metadata, node_id = item, {}, None
+        elif isinstance(item, dict) and isinstance(item.get("text"), str):
+            text, metadata, node_id = item["text"], item.get("metadata") or {}, item.get("id")
+        else:
+            progress.add_error(f"line {line_number}: expected a string or an object with a 'text' field")
+            return None
+
+        if not text.strip() or not isinstance(metadata, dict):
+            progress.add_error(f"line {line_number}: empty text or non-object metadata")
+            return None
+        if node_id is not None and not isinstance(node_id, str):
+            node_id = str(node_id)
+
+        progress.rows_received += 1
+        return DocumentInput(text=text, metadata=metadata, node_id=node_id)
+
+    async def _write_batches(self, queue: asyncio.Queue, progress: IngestProgress) -> None:
+        while True:
+            batch = await queue.get()
+            if batch is _END_OF_STREAM:
+                return
+
+            result = await vector_store_service.upsert_documents(batch)
+
+            progress.rows_written += result["inserted"] + result["updated"]
+            progress.rows_unchanged += result["unchanged"]
+            progress.batches_written += 1
+            logger.info(
+                f"Ingested batch {progress.batches_written} "
+                f"({progress.rows_written} rows written)"
+            )
+
+    def get_progress(self) -> dict[str, Any]:
+        return {
+            "current": self.current.to_dict() if self.current else None,
+            "last": self.last.to_dict() if self.last else None,
+        }
+
+
+ingest_service = IngestService()
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator
+from loguru import logger
+from app.core.config import settings
+from app.core.database import database
+from app.services.ingest_service import IngestProgress
+from app.services.vector_backend import DocumentInput
+from app.services.vector_store_service import vector_store_service
+
+JOB_KINDS = ("upsert", "reload")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class IngestJob(IngestProgress):
+    def __init__(
+        self,
+        kind: str,
+        documents: list[DocumentInput] | None = None,
+        source: AsyncIterator[list[DocumentInput]] | None = None
+    ):
+        super().__init__()
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.documents = documents
+        # A streamed catalog is read while the job runs; its size is unknown until the end
+        self.source = source
+        self.rows_total = len(documents) if documents is not None else None
+        self.rows_failed = 0
+        self.submitted_at = time.time()
+        self.status = "queued"
+
+    def start(self) -> None:
+        self.started_at = time.time()
+        self.status = "running"
+
+    def finish(self, status: str) -> None:
+        self.finished_at = time.time()
+        self.status = status
+        # The payload is no longer needed once the job is done
+        self.documents, self.source = None, None
+        if status == "completed":
+            self.rows_total = self.rows_received
+
+    async def batches(self) -> AsyncIterator[list[DocumentInput]]:
+        if self.source is None:
+            batch_size = max(1, settings.ingest_batch_size)
+            for start in range(0, len(self.documents), batch_size):
+                batch = self.documents[start:start + batch_size]
+                self.rows_received += len(batch)
+                yield batch
+            return
+
+        async for batch in self.source:
+            self.rows_received += len(batch)
+            yield batch
+
+    def to_dict(self) -> dict[str, Any]:
+        done = self.rows_written + self.rows_unchanged + self.rows_failed
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            **super().to_dict(),
+            "rows_total": self.rows_total,
+            "rows_done": done,
+            "rows_failed": self.rows_failed,
+            "progress": (
+                round(done / self.rows_total, 4) if self.rows_total
+                else 1.0 if self.rows_total == 0 else None
+            ),
+            "submitted_at": self.submitted_at,
+            "queued_seconds": round(
+                (self.started_at if self.status != "queued" else time.time()) - self.submitted_at, 3
+            ),
+        }
+
+
+class IngestJobService:
+    """Runs document loads as background jobs on a bounded pool of worker tasks"""
+
+    def __init__(self):
+        self.jobs: OrderedDict[str, IngestJob] = OrderedDict()
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._running: dict[str, asyncio.Task] = {}
+        # Under the pre-fork server a poll may land on a worker that did not run the
+        # job, so snapshots are also written to a small table every worker can read
+        self._shared = settings.vector_store_backend == "pgvector"
+        self._table = f"{settings.vector_schema_name}.{settings.vector_data_table}_jobs"
+        self._table_ready = False
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"ingest-job-worker-{i}")
+            for i in range(max(1, settings.ingest_job_workers))
+        ]
+        logger.info(f"Started {len(self._workers)} ingest job workers")
+        if settings.embedding_executor != "process":
+            logger.warning(
+                "Ingest jobs embed on the ingest thread pool, which shares CPU cores with queries; "
+                "set EMBEDDING_EXECUTOR=process to keep query latency flat during ingest"
+            )
+
+    async def submit(
+        self,
+        kind: str,
+        documents: list[DocumentInput] | None = None,
+        source: AsyncIterator[list[DocumentInput]] | None = None
+    ) -> dict[str, Any]:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}', expected one of {JOB_KINDS}")
+        if (documents is None) == (source is None):
+            raise ValueError("An ingest job needs either documents or a source")
+        await self.start()
+
+        queued = sum(1 for job in self.jobs.values() if job.status == "queued")
+        if queued >= settings.ingest_job_max_queued:
+            raise JobQueueFullError(f"{queued} ingest jobs are already queued; retry later")
+
+        job = IngestJob(kind, documents, source)
+        self.jobs[job.id] = job
+        self._prune()
+        await self._publish(job)
+        self._queue.put_nowait(job)
+        logger.info(
+            f"Queued {kind} job {job.id} with "
+            f"{f'{len(documents)} documents' if documents is not None else 'a streamed catalog'}"
+        )
+        return job.to_dict()
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.status != "queued":
+                # Cancelled while waiting
+                continue
+
+            # Each job runs in its own task so cancelling it leaves the worker alive
+            task = asyncio.create_task(self._run(job))
+            self._running[job.id] = task
+            try:
+                await asyncio.wait({task})
+            finally:
+                self._running.pop(job.id, None)
+
+            if task.cancelled():
+                job.finish("cancelled")
+                await self._publish(job)
+                logger.info(f"Ingest job {job.id} cancelled after {job.rows_written} rows")
+
+    async def _run(self, job: IngestJob) -> None:
+        job.start()
+        await self._publish(job)
+        logger.info(f"Running {job.kind} job {job.id}")
+
+        try:
+            if job.kind == "reload":
+                # All or nothing: a failed batch aborts the reload and the live catalog stays
+                async def on_batch(result: dict[str, Any]) -> None:
+                    job.rows_written += result["inserted"] + result["updated"]
+                    job.rows_unchanged += result["unchanged"]
+                    job.batches_written += 1
+                    await self._publish(job)
+
+                await vector_store_service.reload_catalog(job.batches(), on_batch)
+            else:
+                await self._upsert_batches(job)
+
+            await vector_store_service.optimize()
+            job.finish("failed" if job.rows_failed and job.rows_failed == job.rows_received else "completed")
+            await self._publish(job)
+            logger.success(
+                f"Ingest job {job.id} finished: {job.rows_written} written, "
+                f"{job.rows_unchanged} unchanged, {job.rows_failed} failed"
+            )
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.add_error(str(e))
+            job.finish("failed")
+            await self._publish(job)
+            logger.error(f"Ingest job {job.id} failed: {e}")
+
+    async def _upsert_batches(self, job: IngestJob) -> None:
+        start = 0
+        async for batch in job.batches():
+            try:
+                # Document embedding goes through the ingest lane of the
+                # embedding executor, behind the workers reserved for queries
+                result = await vector_store_service.upsert_documents(batch)
+                job.rows_written += result["inserted"] + result["updated"]
+                job.rows_unchanged += result["unchanged"]
+                job.batches_written += 1
+            except Exception as e:
+                # One bad batch should not throw away the rest of the load
+                job.rows_failed += len(batch)
+                job.add_error(f"rows {start}-{start + len(batch) - 1}: {e}")
+                logger.error(f"Ingest job {job.id} batch at row {start} failed: {e}")
+            start += len(batch)
+            await self._publish(job)
+
+    async def cancel(self, job_id: str) -> dict[str, Any] | None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+
+        if job.status == "queued":
+            job.finish("cancelled")
+            await self._publish(job)
+        elif job.id in self._running:
+            self._running[job.id].cancel()
+        return job.to_dict()
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - settings.ingest_job_retention)]:
+            del self.jobs[job_id]
+
+    async def _ensure_table(self) -> None:
+        async with database.acquire() as conn:
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self._table} (
+                    id VARCHAR PRIMARY KEY,
+                    snapshot JSONB NOT NULL,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """)
+        self._table_ready = True
+
+    async def _publish(self, job: IngestJob) -> None:
+        if not self._shared:
+            return
+
+        try:
+            if not self._table_ready:
+                await self._ensure_table()
+            async with database.acquire() as conn:
+                await conn.execute(
+                    f"""
+                    INSERT INTO {self._table} (id, snapshot, updated_at) VALUES ($1, $2::jsonb, now())
+                    ON CONFLICT (id) DO UPDATE SET snapshot = EXCLUDED.snapshot, updated_at = now()
+                    """,
+                    job.id,
+                    json.dumps(job.to_dict())
+                )
+                if job.status in FINISHED_STATUSES:
+                    await conn.execute(
+                        f"""
+                        DELETE FROM {self._table} WHERE id IN (
+                            SELECT id FROM {self._table}
+                            ORDER BY updated_at DESC OFFSET $1
+                        )
+                        """,
+                        settings.ingest_job_retention
+                    )
+        except Exception as e:
+            # Progress reporting must never fail the load itself
+            logger.error(f"Error publishing ingest job {job.id}: {e}")
+
+    async def get_job(self, job_id: str) -> dict[str, Any] | None:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if not self._shared:
+            return None
+
+        try:
+            if not self._table_ready:
+                await self._ensure_table()
+            async with database.acquire() as conn:
+                snapshot = await conn.fetchval(f"SELECT snapshot FROM {self._table} WHERE id = $1", job_id)
+            return json.loads(snapshot) if snapshot is not None else None
+        except Exception as e:
+            logger.error(f"Error reading ingest job {job_id}: {e}")
+            raise
+
+    def list_jobs(self) -> list[dict[str, Any]]:
+        return [job.to_dict() for job in reversed(self.jobs.values())]
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "queued": sum(1 for job in self.jobs.values() if job.status == "queued"),
+            "running": len(self._running),
+        }
+
+    async def close(self) -> None:
+        tasks = [*self._running.values(), *self._workers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._running = {}
+
+        for job in self.jobs.values():
+            if job.status in ("queued", "running"):
+                job.add_error("service shut down before the job finished")
+                job.finish("failed")
+                await self._publish(job)
+
+
+ingest_job_service = IngestJobService()
@@ -0,0 +1,668 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+import numpy as np
+from loguru import logger
+from app.core.config import settings
+from app.services.vector_backend import (
+    DocumentRecord,
+    SearchFilters,
+    SearchResult,
+    StoredDocument,
+    VectorBackend,
+    filter_columns,
+)
+from app.utils.bm25 import BM25Index
+from app.utils.chunking import stitch_chunks
+from app.utils.quantization import QUANTIZATION_MODES, approximate_scores, code_width, quantize
+from app.utils.snapshot import Snapshot, publish_store, store_files, store_version, versioned_files
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_k_search_scores(
+    scores: np.ndarray,
+    k: int,
+    mask: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Best k scores, skipping rows where mask is False"""
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    k = min(k, scores.shape[0])
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    if mask is not None:
+        order = order[np.isfinite(scores[order])]
+    return order, scores[order]
+
+
+def top_k_search(
+    matrix: np.ndarray,
+    query: np.ndarray,
+    k: int,
+    mask: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Exact cosine top-k over L2-normalized rows: one matrix-vector product plus argpartition"""
+    if k <= 0 or matrix.shape[0] == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    return top_k_search_scores(matrix @ query, k, mask)
+
+
+def top_k_batch_search(
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    mask: np.ndarray | None = None,
+    max_block_bytes: int = 256 * 2**20
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Exact top-k for many queries with one matrix-matrix product per block of queries"""
+    if k <= 0 or matrix.shape[0] == 0:
+        return [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in range(len(queries))]
+
+    k = min(k, matrix.shape[0])
+    # Bound the (queries x rows) score block rather than materializing it for every query at once
+    block = max(1, max_block_bytes // (matrix.shape[0] * 4))
+    results = []
+    for start in range(0, len(queries), block):
+        scores = queries[start:start + block] @ matrix.T
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        if k < scores.shape[1]:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        rows = np.take_along_axis(candidates, order, axis=1)
+        ranked = np.take_along_axis(candidate_scores, order, axis=1)
+        if mask is None:
+            results.extend(zip(rows, ranked))
+        else:
+            results.extend((r[np.isfinite(s)], s[np.isfinite(s)]) for r, s in zip(rows, ranked))
+    return results
+
+
+def quantized_top_k_search(
+    matrix: np.ndarray,
+    codes: np.ndarray,
+    query: np.ndarray,
+    k: int,
+    mode: str,
+    oversample: int,
+    mask: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Shortlist k * oversample rows by their compressed codes, then re-rank them exactly"""
+    if k <= 0 or codes.shape[0] == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    candidates, _ = top_k_search_scores(approximate_scores(codes, query, mode), k * oversample, mask)
+    # Only the shortlisted rows of the full-precision matrix are read
+    exact = matrix[candidates] @ query
+    order = np.argsort(-exact, kind="stable")[:k]
+    return candidates[order], exact[order]
+
+
+class NumpyVectorBackend(VectorBackend):
+    """In-process exact search over a contiguous float32 matrix, persisted as a memory-mappable .npy"""
+
+    name = "numpy"
+
+    def __init__(self, directory: str | None = None):
+        self.directory = Path(directory or settings.numpy_store_dir)
+        self.dimension = settings.embedding_dimension
+        self.quantization = settings.vector_quantization
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode '{self.quantization}', expected one of {QUANTIZATION_MODES}")
+        self._vectors = np.empty((0, self.dimension), dtype=np.float32)
+        self._codes = self._empty_codes(0)
+        self._size = 0
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._metadata: list[dict] = []
+        self._hashes: list[str | None] = []
+        self._groups: list[str] = []
+        self._canonical: list[bool] = []
+        self._parents: list[str] = []
+        self._children: dict[str, set[str]] = {}
+        self._canonical_mask: np.ndarray | None = None
+        self._mask_stale = False
+        # Columnar copies of the filterable metadata, built on the first filtered query
+        self._attributes: dict[str, np.ndarray] | None = None
+        self._rows: dict[str, int] = {}
+        # Only canonical rows are indexed, matching what vector search can return
+        self._lexical = BM25Index()
+        self._dirty = False
+        # Generation of the files on disk; each save writes the next one beside it
+        self._version = 0
+        # The matrix a save is reading; a write copies it first rather than change it mid-save
+        self._saving: np.ndarray | None = None
+        self._save_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+        self._cleanup_task: asyncio.Task | None = None
+        self._loaded_from_mmap = False
+
+    def _empty_codes(self, rows: int) -> np.ndarray | None:
+        if self.quantization == "none":
+            return None
+        return np.empty((rows, code_width(self.quantization, self.dimension)), dtype=np.uint8)
+
+    @property
+    def _vectors_path(self) -> Path:
+        return store_files(self.directory)[0]
+
+    @property
+    def _documents_path(self) -> Path:
+        return store_files(self.directory)[1]
+
+    async def initialize(self) -> None:
+        started = time.perf_counter()
+        await asyncio.to_thread(self._load)
+        logger.info(
+            f"NumPy vector backend ready with {self._size} vectors from {self.directory} "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+
+    def _load(self) -> None:
+        self._version = store_version(self.directory) or 0
+        if not self._vectors_path.exists() or not self._documents_path.exists():
+            return
+
+        # Read-only mapping: pages are faulted in on first search, so startup is
+        # O(metadata) and the matrix is shared through the page cache
+        vectors = np.load(self._vectors_path, mmap_mode="r")
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Stored vectors have shape {vectors.shape}, expected (*, {self.dimension})"
+            )
+
+        with open(self._documents_path, "r", encoding="utf-8") as f:
+            for line in f:
+                document = json.loads(line)
+                self._rows[document["node_id"]] = len(self._ids)
+                self._ids.append(document["node_id"])
+                self._texts.append(document["text"])
+                self._metadata.append(document.get("metadata") or {})
+                self._hashes.append(document.get("content_hash"))
+                self._groups.append(document.get("group_id") or document["node_id"])
+                self._canonical.append(document.get("is_canonical", True))
+                self._parents.append(document.get("parent_id") or document["node_id"])
+                self._children.setdefault(self._parents[-1], set()).add(document["node_id"])
+                if self._canonical[-1]:
+                    self._lexical.add(document["node_id"], document["text"])
+
+        if len(self._ids) != vectors.shape[0]:
+            raise ValueError(
+                f"{self._documents_path} has {len(self._ids)} documents but "
+                f"{self._vectors_path} has {vectors.shape[0]} vectors"
+            )
+
+        self._vectors = vectors
+        self._size = vectors.shape[0]
+        self._loaded_from_mmap = True
+        self._mask_stale = True
+        if self.quantization != "none":
+            # Codes are cheap to derive, so only the full-precision matrix is persisted
+            self._codes = self._empty_codes(self._size)
+            for start in range(0, self._size, 65536):
+                self._codes[start:start + 65536] = quantize(vectors[start:start + 65536], self.quantization)
+
+    def _ensure_capacity(self, size: int) -> None:
+        # The mapped file is read-only and a matrix being saved must not change under
+        # the save; the first write moves either into a growable buffer of its own
+        if self._loaded_from_mmap or self._vectors is self._saving or size > self._vectors.shape[0]:
+            capacity = max(size, 1024, int(self._vectors.shape[0] * 1.5))
+            grown = np.empty((capacity, self.dimension), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+            self._loaded_from_mmap = False
+            if self._codes is not None and capacity > self._codes.shape[0]:
+                grown_codes = self._empty_codes(capacity)
+                grown_codes[:self._size] = self._codes[:self._size]
+                self._codes = grown_codes
+
+    def _mask(self) -> np.ndarray | None:
+        """Boolean filter of canonical rows, or None while every row is canonical"""
+        if self._mask_stale:
+            mask = np.fromiter(self._canonical, dtype=bool, count=self._size)
+            self._canonical_mask = None if mask.all() else mask
+            self._mask_stale = False
+        return self._canonical_mask
+
+    def _filter_mask(self, filters: SearchFilters | None) -> np.ndarray | None:
+        """Rows matching the filters, group members included, or the canonical mask without filters"""
+        if filters is None or filters.is_empty():
+            return self._mask()
+
+        if self._attributes is None:
+            columns = [filter_columns(metadata) for metadata in self._metadata[:self._size]]
+            brands, categories, in_stock, prices = zip(*columns) if columns else ((), (), (), ())
+            self._attributes = {
+                "brand": np.array(brands, dtype=object),
+                "category": np.array(categories, dtype=object),
+                # -1 marks documents without the field, so they never match either value
+                "in_stock": np.array([-1 if value is None else int(value) for value in in_stock], dtype=np.int8),
+                "price": np.array([np.nan if value is None else value for value in prices], dtype=np.float64),
+            }
+
+        # Not restricted to canonical rows: a variant may match where its canonical row
+        # does not, and query() keeps the best match of each group afterwards
+        mask = np.ones(self._size, dtype=bool)
+        if filters.brand:
+            mask &= np.isin(self._attributes["brand"], filters.brand)
+        if filters.category:
+            mask &= np.isin(self._attributes["category"], filters.category)
+        if filters.in_stock is not None:
+            mask &= self._attributes["in_stock"] == int(filters.in_stock)
+        # NaN prices compare False, so unpriced documents drop out of price ranges
+        if filters.price_min is not None:
+            mask &= self._attributes["price"] >= filters.price_min
+        if filters.price_max is not None:
+            mask &= self._attributes["price"] <= filters.price_max
+        return mask
+
+    async def get_existing(self, parent_ids: list[str]) -> dict[str, StoredDocument]:
+        existing = {}
+        for parent_id in parent_ids:
+            for node_id in self._children.get(parent_id, ()):
+                row = self._rows[node_id]
+                existing[node_id] = StoredDocument(
+                    content_hash=self._hashes[row],
+                    metadata=self._metadata[row],
+                    group_id=self._groups[row],
+                    is_canonical=self._canonical[row],
+                    parent_id=parent_id
+                )
+        return existing
+
+    async def get_parent_texts(self, parent_ids: list[str]) -> dict[str, str]:
+        return {
+            parent_id: stitch_chunks([
+                (self._metadata[row].get("chunk_start", 0), self._texts[row])
+                for row in (self._rows[node_id] for node_id in self._children[parent_id])
+            ])
+            for parent_id in parent_ids
+            if parent_id in self._children
+        }
+
+    def _link_parent(self, node_id: str, parent_id: str) -> None:
+        self._children.setdefault(parent_id, set()).add(node_id)
+
+    def _unlink_parent(self, node_id: str, parent_id: str) -> None:
+        children = self._children.get(parent_id)
+        if children is not None:
+            children.discard(node_id)
+            if not children:
+                del self._children[parent_id]
+
+    async def upsert(self, records: list[DocumentRecord]) -> int:
+        if not records:
+            return 0
+
+        new_records = sum(1 for record in records if record.node_id not in self._rows)
+        self._ensure_capacity(self._size + new_records)
+        embeddings = normalize_rows(np.stack([record.embedding for record in records]))
+        codes = quantize(embeddings, self.quantization) if self._codes is not None else None
+
+        inserted = 0
+        for position, (record, embedding) in enumerate(zip(records, embeddings)):
+            parent_id = record.parent_id or record.node_id
+            row = self._rows.get(record.node_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._rows[record.node_id] = row
+                self._ids.append(record.node_id)
+                self._texts.append(record.text)
+                self._metadata.append(record.metadata)
+                self._hashes.append(record.content_hash)
+                self._groups.append(record.group_id or record.node_id)
+                self._canonical.append(record.is_canonical)
+                self._parents.append(parent_id)
+                inserted += 1
+            else:
+                self._texts[row] = record.text
+                self._metadata[row] = record.metadata
+                self._hashes[row] = record.content_hash
+                self._groups[row] = record.group_id or record.node_id
+                self._canonical[row] = record.is_canonical
+                self._unlink_parent(record.node_id, self._parents[row])
+                self._parents[row] = parent_id
+            self._link_parent(record.node_id, parent_id)
+            self._vectors[row] = embedding
+            if codes is not None:
+                self._codes[row] = codes[position]
+            if record.is_canonical:
+                self._lexical.add(record.node_id, record.text)
+            else:
+                self._lexical.remove(record.node_id)
+
+        self._mask_stale = True
+        self._attributes = None
+        self._mark_dirty()
+        return inserted
+
+    async def update_metadata(self, updates: list[tuple[str, dict]]) -> None:
+        for node_id, metadata in updates:
+            row = self._rows.get(node_id)
+            if row is not None:
+                self._metadata[row] = metadata
+        if updates:
+            self._attributes = None
+            self._mark_dirty()
+
+    async def delete(self, node_ids: list[str]) -> int:
+        rows = sorted((self._rows[node_id] for node_id in set(node_ids) if node_id in self._rows), reverse=True)
+        if not rows:
+            return 0
+
+        self._ensure_capacity(self._size)
+        for row in rows:
+            # Move the last row into the hole so the matrix stays contiguous
+            last = self._size - 1
+            del self._rows[self._ids[row]]
+            self._lexical.remove(self._ids[row])
+            self._unlink_parent(self._ids[row], self._parents[row])
+            if row != last:
+                self._vectors[row] = self._vectors[last]
+                if self._codes is not None:
+                    self._codes[row] = self._codes[last]
+                self._ids[row] = self._ids[last]
+                self._texts[row] = self._texts[last]
+                self._metadata[row] = self._metadata[last]
+                self._hashes[row] = self._hashes[last]
+                self._groups[row] = self._groups[last]
+                self._canonical[row] = self._canonical[last]
+                self._parents[row] = self._parents[last]
+                self._rows[self._ids[row]] = row
+            self._ids.pop()
+            self._texts.pop()
+            self._metadata.pop()
+            self._hashes.pop()
+            self._groups.pop()
+            self._canonical.pop()
+            self._parents.pop()
+            self._size -= 1
+
+        self._mask_stale = True
+        self._attributes = None
+        self._mark_dirty()
+        return len(rows)
+
+    async def repair_groups(self, group_ids: list[str]) -> None:
+        wanted = set(group_ids)
+        if not wanted:
+            return
+
+        has_canonical = {
+            group for group, canonical in zip(self._groups, self._canonical) if canonical and group in wanted
+        }
+        for row, group in enumerate(self._groups):
+            if group in wanted and group not in has_canonical:
+                # Rows are not ordered by age here, so the first remaining member is promoted
+                self._canonical[row] = True
+                self._lexical.add(self._ids[row], self._texts[row])
+                has_canonical.add(group)
+                self._mask_stale = True
+                self._mark_dirty()
+
+    async def clear(self) -> None:
+        self._vectors = np.empty((0, self.dimension), dtype=np.float32)
+        self._codes = self._empty_codes(0)
+        self._size = 0
+        self._ids, self._texts, self._metadata, self._hashes = [], [], [], []
+        self._groups, self._canonical, self._parents = [], [], []
+        self._children = {}
+        self._canonical_mask, self._mask_stale = None, False
+        self._attributes = None
+        self._rows = {}
+        self._lexical.clear()
+        self._loaded_from_mmap = False
+        self._mark_dirty()
+
+    async def count(self, estimate: bool = False) -> int:
+        return self._size
+
+    async def query(
+        self,
+        embedding: np.ndarray | list[float],
+        k: int,
+        recall: str | None = None,
+        filters: SearchFilters | None = None
+    ) -> list[SearchResult]:
+        query = normalize_rows(np.asarray(embedding, dtype=np.float32))
+        mask = self._filter_mask(filters)
+        limit = self._search_limit(k, filters)
+        if self._codes is None or recall == "exact":
+            rows, scores = top_k_search(self._vectors[:self._size], query, limit, mask)
+        else:
+            rows, scores = quantized_top_k_search(
+                self._vectors[:self._size],
+                self._codes[:self._size],
+                query,
+                limit,
+                self.quantization,
+                settings.vector_rerank_oversample,
+                mask
+            )
+        return self._to_results(*self._best_per_group(rows, scores, k))
+
+    async def query_batch(
+        self,
+        embeddings: np.ndarray,
+        k: int,
+        recall: str | None = None,
+        filters: SearchFilters | None = None
+    ) -> list[list[SearchResult]]:
+        queries = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        if self._codes is not None and recall != "exact":
+            return [await self.query(query, k, recall=recall, filters=filters) for query in queries]
+
+        return [
+            self._to_results(*self._best_per_group(rows, scores, k))
+            for rows, scores in top_k_batch_search(
+                self._vectors[:self._size], queries, self._search_limit(k, filters), self._filter_mask(filters)
+            )
+        ]
+
+    @staticmethod
+    def _search_limit(k: int, filters: SearchFilters | None) -> int:
+        # Filtered searches see every group member, so shortlist extra rows to fold back into k groups
+        if filters is None or filters.is_empty():
+            return k
+        return k * settings.dedup_filter_oversample
+
+    def _best_per_group(self, rows: np.ndarray, scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """First (best-scoring) row of each group among rows sorted by score, at most k of them"""
+        if self._mask() is None:
+            # Every row is canonical, i.e. alone in its group
+            return rows[:k], scores[:k]
+        keep: list[int] = []
+        seen: set[str] = set()
+        for i, row in enumerate(rows.tolist()):
+            if self._groups[row] not in seen:
+                seen.add(self._groups[row])
+                keep.append(i)
+                if len(keep) == k:
+                    break
+        return rows[keep], scores[keep]
+
+    def _to_results(self, rows: np.ndarray, scores: np.ndarray) -> list[SearchResult]:
+        return [
+            SearchResult(
+                node_id=self._ids[row],
+                text=self._texts[row],
+                score=float(score),
+                metadata=self._metadata[row],
+                group_id=self._groups[row],
+                parent_id=self._parents[row]
+            )
+            for row, score in zip(rows.tolist(), scores.tolist())
+        ]
+
+    async def lexical_query(self, query: str, k: int, filters: SearchFilters | None = None) -> list[SearchResult]:
+        accept = None
+        if filters is not None and not filters.is_empty():
+            mask = self._filter_mask(filters)
+            accept = lambda node_id: bool(mask[self._rows[node_id]])
+        return [
+            SearchResult(
+                node_id=node_id,
+                text=self._texts[self._rows[node_id]],
+                score=score,
+                metadata=self._metadata[self._rows[node_id]],
+                group_id=self._groups[self._rows[node_id]],
+                parent_id=self._parents[self._rows[node_id]]
+            )
+            for node_id, score in self._lexical.search(query, k, accept)
+        ]
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        # Coalesce bursts of small writes (e.g. a streamed ingest) into one save;
+        # writes that land during a save are picked up by another round
+        while True:
+            await asyncio.sleep(settings.numpy_store_flush_seconds)
+            await self.flush()
+            if not self._dirty:
+                return
+
+    async def flush(self) -> None:
+        async with self._save_lock:
+            if not self._dirty:
+                return
+
+            self._dirty = False
+            # Only references are taken on the event loop: the lists are shallow-copied
+            # and the matrix is shared copy-on-write; the save thread does the heavy work
+            self._saving = self._vectors
+            columns = (
+                self._ids[:], self._texts[:], self._metadata[:], self._hashes[:],
+                self._groups[:], self._canonical[:], self._parents[:]
+            )
+            self._version += 1
+            save = asyncio.get_running_loop().run_in_executor(
+                None, self._save, self._version, self._saving[:self._size], columns
+            )
+            try:
+                await asyncio.shield(save)
+            except asyncio.CancelledError:
+                # The thread keeps writing regardless; hold the lock until it is done so
+                # close() and discard() never return while a save is still in flight
+                await asyncio.wait({save})
+                raise
+            except Exception:
+                # Nothing new was published; the next flush writes everything again
+                self._dirty = True
+                raise
+            finally:
+                self._saving = None
+
+    def _save(self, version: int, vectors: np.ndarray, columns: tuple[list, ...]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        vectors_path, documents_path = versioned_files(self.directory, version)
+
+        # Versioned files are written beside the current ones and published by one
+        # rename of the pointer, so a crash at any point leaves a matching pair
+        with open(vectors_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+            f.flush()
+            os.fsync(f.fileno())
+        with open(documents_path, "w", encoding="utf-8") as f:
+            for node_id, text, metadata, content_hash, group_id, canonical, parent_id in zip(*columns):
+                f.write(json.dumps({
+                    "node_id": node_id,
+                    "text": text,
+                    "metadata": metadata,
+                    "content_hash": content_hash,
+                    "group_id": group_id,
+                    "is_canonical": canonical,
+                    "parent_id": parent_id
+                }) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        publish_store(self.directory, version)
+        logger.debug(f"Saved {vectors.shape[0]} vectors to {self.directory} (version {version})")
+
+    async def create_shadow(self) -> "NumpyVectorBackend":
+        shadow = NumpyVectorBackend(f"{self.directory}.shadow")
+        # Left behind by a reload that did not finish
+        await asyncio.to_thread(shutil.rmtree, shadow.directory, True)
+        return shadow
+
+    async def swap_in(self, shadow: "NumpyVectorBackend") -> "NumpyVectorBackend":
+        # Both stores are fully persisted before their directories trade places
+        await shadow.close()
+        await self.close()
+        retired = Path(f"{self.directory}.retired")
+
+        def relocate() -> None:
+            shutil.rmtree(retired, ignore_errors=True)
+            if self.directory.exists():
+                os.replace(self.directory, retired)
+            if shadow.directory.exists():
+                os.replace(shadow.directory, self.directory)
+
+        await asyncio.to_thread(relocate)
+        shadow.directory = self.directory
+        logger.success(f"Swapped {shadow._size} vectors into {self.directory}")
+        # Queries switch over when the service replaces its backend with the shadow
+        shadow._cleanup_task = asyncio.create_task(asyncio.to_thread(shutil.rmtree, retired, True))
+        return shadow
+
+    async def load_snapshot(self, snapshot: Snapshot) -> int:
+        def copy() -> None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            version = (store_version(self.directory) or 0) + 1
+            vectors_path, documents_path = versioned_files(self.directory, version)
+            shutil.copyfile(snapshot.vectors_path, vectors_path)
+            shutil.copyfile(snapshot.documents_path, documents_path)
+            publish_store(self.directory, version)
+
+        # A snapshot is already in the store's on-disk format: copy the files and map them
+        await asyncio.to_thread(copy)
+        await asyncio.to_thread(self._load)
+        return self._size
+
+    async def discard(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        # Waits out a save in flight, which would otherwise recreate the directory
+        async with self._save_lock:
+            self._dirty = False
+            await asyncio.to_thread(shutil.rmtree, self.directory, True)
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        # Waits for a save the cancelled task had in flight, then writes what is left
+        await self.flush()
+        if self._cleanup_task is not None:
+            await self._cleanup_task
+
+    def get_info(self) -> dict[str, Any]:
+        return {
+            "backend": self.name,
+            "directory": str(self.directory),
+            "vectors": self._size,
+            "matrix_bytes": self._size * self.dimension * 4,
+            "quantization": self.quantization,
+            "code_bytes": self._size * code_width(self.quantization, self.dimension) if self._codes is not None else 0,
+            "memory_mapped": self._loaded_from_mmap,
+        }
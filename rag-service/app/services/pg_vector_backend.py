@@ -0,0 +1,729 @@
+import asyncio
+import json
+import time
+import asyncpg
+import numpy as np
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+from loguru import logger
+from app.core.config import settings
+from app.core.database import database
+from app.services.index_manager import VectorIndexManager
+from app.services.vector_backend import (
+    FILTER_FIELDS,
+    DocumentRecord,
+    SearchFilters,
+    SearchResult,
+    StoredDocument,
+    ReloadInProgressError,
+    VectorBackend,
+    filter_columns,
+)
+from app.utils.bm25 import split_negations
+from app.utils.chunking import stitch_chunks
+from app.utils.snapshot import Snapshot
+
+# Rows per COPY when loading a snapshot
+_SNAPSHOT_COPY_ROWS = 10000
+
+
+class PGVectorBackend(VectorBackend):
+    """pgvector storage and similarity search issued directly over the shared asyncpg pool"""
+
+    name = "pgvector"
+
+    def __init__(self, data_table: str | None = None):
+        self.data_table = data_table or settings.vector_data_table
+        self.table = f"{settings.vector_schema_name}.{self.data_table}"
+        self.index = VectorIndexManager(self.table, self.data_table)
+        # Held by a shadow catalog from create_shadow until it is swapped in or discarded
+        self._reload_conn = None
+        self._drop_task: asyncio.Task | None = None
+        self.last_swap: dict[str, Any] | None = None
+
+    @staticmethod
+    def _filter_clause(
+        filters: SearchFilters | None,
+        first_param: int,
+        canonical_only: bool = True
+    ) -> tuple[str, list]:
+        """Extra WHERE conditions on the promoted metadata columns, numbered from first_param"""
+        # Values are always bound, so the SQL text only varies with which filters
+        # are set and asyncpg's statement cache keeps reusing the prepared plan
+        conditions = ["is_canonical"] if canonical_only else []
+        args: list = []
+        if filters is not None:
+            for column, operator, value in (
+                ("brand", "= ANY({}::varchar[])", filters.brand or None),
+                ("category", "= ANY({}::varchar[])", filters.category or None),
+                ("in_stock", "= {}", filters.in_stock),
+                ("price", ">= {}", filters.price_min),
+                ("price", "<= {}", filters.price_max),
+            ):
+                if value is not None:
+                    args.append(value)
+                    conditions.append(f"{column} {operator.format(f'${first_param + len(args) - 1}')}")
+        return " AND ".join(conditions) or "TRUE", args
+
+    def _search_sql(self, query_vector: str, limit: str, where: str, candidates: str | None = None) -> str:
+        if candidates is None:
+            return f"""
+                SELECT node_id, text, metadata_, group_id, parent_id, 1 - (embedding <=> {query_vector}) AS score
+                FROM {self.table}
+                WHERE {where}
+                ORDER BY embedding <=> {query_vector}
+                LIMIT {limit}
+            """
+        # Compressed modes walk the (much smaller) quantized index for an
+        # oversampled shortlist, then re-rank it on the full-precision column.
+        # The ORDER BY must repeat the indexed expression for the index to be used
+        return f"""
+            SELECT node_id, text, metadata_, group_id, parent_id, 1 - (embedding <=> {query_vector}) AS score
+            FROM (
+                SELECT node_id, text, metadata_, group_id, parent_id, embedding
+                FROM {self.table}
+                WHERE {where}
+                ORDER BY {self._quantized_distance(query_vector)}
+                LIMIT {candidates}
+            ) candidates
+            ORDER BY embedding <=> {query_vector}
+            LIMIT {limit}
+        """
+
+    @staticmethod
+    def _best_per_group(candidates_sql: str, limit: str) -> str:
+        # Fold the shortlist back to the closest row of each near-duplicate group
+        return f"""
+            SELECT node_id, text, metadata_, group_id, parent_id, score
+            FROM (
+                SELECT *, row_number() OVER (
+                    PARTITION BY COALESCE(group_id, node_id) ORDER BY score DESC
+                ) AS group_rank
+                FROM ({candidates_sql}) shortlist
+            ) ranked
+            WHERE group_rank = 1
+            ORDER BY score DESC
+            LIMIT {limit}
+        """
+
+    def _quantized_distance(self, query_vector: str) -> str:
+        dimension = settings.embedding_dimension
+        if self.index.quantization == "halfvec":
+            return f"embedding::halfvec({dimension}) <=> {query_vector}::vector::halfvec({dimension})"
+        return f"binary_quantize(embedding)::bit({dimension}) <~> binary_quantize({query_vector}::vector)"
+
+    def _lexical_search_sql(self, query_text: str, excluded_text: str, limit: str, where: str) -> str:
+        # OR the positive terms together so documents matching more of them rank
+        # higher, instead of websearch's all-terms-required semantics. Exclusions
+        # ("-refurbished") are split off beforehand: OR-ed in as "| !term" they
+        # would match nearly every row
+        config = settings.lexical_search_config
+        return f"""
+            SELECT node_id, text, metadata_, group_id, parent_id, ts_rank_cd(text_search, search.query) AS score
+            FROM {self.table}, (
+                SELECT
+                    replace(plainto_tsquery('{config}', {query_text})::text, ' & ', ' | ')::tsquery AS query,
+                    replace(plainto_tsquery('{config}', {excluded_text})::text, ' & ', ' | ')::tsquery AS excluded
+            ) search
+            WHERE {where} AND text_search @@ search.query
+                AND NOT (numnode(search.excluded) > 0 AND text_search @@ search.excluded)
+            ORDER BY score DESC
+            LIMIT {limit}
+        """
+
+    @staticmethod
+    def _batched(source: str, per_query_sql: str) -> str:
+        # Every query in the batch gets its own index scan through the LATERAL join
+        return f"""
+            SELECT q.ord, r.node_id, r.text, r.metadata_, r.group_id, r.parent_id, r.score
+            FROM {source}
+            CROSS JOIN LATERAL ({per_query_sql}) r
+            ORDER BY q.ord, r.score DESC
+        """
+
+    async def initialize(self) -> None:
+        await database.initialize()
+        await self._ensure_table()
+        await self.index.initialize()
+        logger.info(f"pgvector backend ready on {self.table}")
+
+    async def _ensure_table(self) -> None:
+        # Same layout llama-index's PGVectorStore creates, so existing data is reused as-is
+        async with database.acquire() as conn:
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    id BIGSERIAL PRIMARY KEY,
+                    text VARCHAR NOT NULL,
+                    metadata_ JSON,
+                    node_id VARCHAR,
+                    embedding VECTOR({settings.embedding_dimension})
+                )
+            """)
+            await conn.execute(f"ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS content_hash VARCHAR")
+            await conn.execute(f"ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS group_id VARCHAR")
+            await conn.execute(
+                f"ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS is_canonical BOOLEAN NOT NULL DEFAULT TRUE"
+            )
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS {self.data_table}_group_id_idx
+                ON {self.table} (group_id)
+            """)
+            await conn.execute(f"""
+                ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS text_search TSVECTOR
+                GENERATED ALWAYS AS (to_tsvector('{settings.lexical_search_config}', text)) STORED
+            """)
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS {self.data_table}_text_search_idx
+                ON {self.table} USING gin (text_search) WHERE is_canonical
+            """)
+            await self._ensure_filter_columns(conn)
+            await self._ensure_parent_column(conn)
+            
+            node_id_index = f"{self.data_table}_node_id_key"
+            exists = await conn.fetchval(
+                "SELECT to_regclass($1) IS NOT NULL",
+                f"{settings.vector_schema_name}.{node_id_index}"
+            )
+            if not exists:
+                # Older rows may repeat node IDs; keep the newest before enforcing uniqueness
+                async with conn.transaction():
+                    await conn.execute(f"""
+                        DELETE FROM {self.table} a USING {self.table} b
+                        WHERE a.node_id = b.node_id AND a.id < b.id
+                    """)
+                    await conn.execute(f"CREATE UNIQUE INDEX {node_id_index} ON {self.table} (node_id)")
+                logger.info(f"Created unique node_id index on {self.table}")
+
+    async def _ensure_filter_columns(self, conn) -> None:
+        """Promote the filterable metadata fields to typed, indexed columns"""
+        promoted = await conn.fetchval(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = $1 AND table_name = $2 AND column_name = 'price'
+            )
+            """,
+            settings.vector_schema_name,
+            self.data_table
+        )
+        if not promoted:
+            await self._promote_filter_columns(conn)
+
+        # Not partial: filtered searches also match non-canonical group members.
+        # Replaces the canonical-only indexes earlier versions created
+        for column in FILTER_FIELDS:
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS {self.data_table}_{column}_filter_idx
+                ON {self.table} ({column})
+            """)
+            await conn.execute(f"DROP INDEX IF EXISTS {settings.vector_schema_name}.{self.data_table}_{column}_idx")
+
+    async def _promote_filter_columns(self, conn) -> None:
+        async with conn.transaction():
+            await conn.execute(f"""
+                ALTER TABLE {self.table}
+                    ADD COLUMN IF NOT EXISTS brand VARCHAR,
+                    ADD COLUMN IF NOT EXISTS category VARCHAR,
+                    ADD COLUMN IF NOT EXISTS in_stock BOOLEAN,
+                    ADD COLUMN IF NOT EXISTS price DOUBLE PRECISION
+            """)
+            # Backfill in Python so existing rows are normalized exactly like new writes
+            rows = await conn.fetch(f"SELECT id, metadata_ FROM {self.table} WHERE metadata_ IS NOT NULL")
+            if rows:
+                await conn.executemany(
+                    f"UPDATE {self.table} SET brand = $2, category = $3, in_stock = $4, price = $5 WHERE id = $1",
+                    [(row["id"], *filter_columns(json.loads(row["metadata_"]))) for row in rows]
+                )
+        logger.info(f"Promoted {', '.join(FILTER_FIELDS)} metadata to indexed columns on {self.table}")
+
+    async def _ensure_parent_column(self, conn) -> None:
+        exists = await conn.fetchval(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = $1 AND table_name = $2 AND column_name = 'parent_id'
+            )
+            """,
+            settings.vector_schema_name,
+            self.data_table
+        )
+        if exists:
+            return
+
+        async with conn.transaction():
+            await conn.execute(f"ALTER TABLE {self.table} ADD COLUMN parent_id VARCHAR")
+            # Rows stored before chunking are whole documents, i.e. their own parent
+            await conn.execute(f"UPDATE {self.table} SET parent_id = node_id")
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS {self.data_table}_parent_id_idx
+                ON {self.table} (parent_id)
+            """)
+        logger.info(f"Added parent_id column to {self.table}")
+
+    async def get_existing(self, parent_ids: list[str]) -> dict[str, StoredDocument]:
+        if not parent_ids:
+            return {}
+
+        async with database.acquire() as conn:
+            rows = await conn.fetch(
+                f"""
+                SELECT node_id, content_hash, metadata_, group_id, is_canonical, parent_id
+                FROM {self.table} WHERE parent_id = ANY($1::varchar[])
+                """,
+                parent_ids
+            )
+        return {
+            row["node_id"]: StoredDocument(
+                content_hash=row["content_hash"],
+                metadata=json.loads(row["metadata_"]) if row["metadata_"] else {},
+                group_id=row["group_id"],
+                is_canonical=row["is_canonical"],
+                parent_id=row["parent_id"]
+            )
+            for row in rows
+        }
+
+    async def get_parent_texts(self, parent_ids: list[str]) -> dict[str, str]:
+        if not parent_ids:
+            return {}
+
+        async with database.acquire() as conn:
+            rows = await conn.fetch(
+                f"""
+                SELECT parent_id, text, COALESCE((metadata_->>'chunk_start')::int, 0) AS chunk_start
+                FROM {self.table} WHERE parent_id = ANY($1::varchar[])
+                """,
+                parent_ids
+            )
+        chunks: dict[str, list[tuple[int, str]]] = {}
+        for row in rows:
+            chunks.setdefault(row["parent_id"], []).append((row["chunk_start"], row["text"]))
+        return {parent_id: stitch_chunks(parent_chunks) for parent_id, parent_chunks in chunks.items()}
+
+    async def upsert(self, records: list[DocumentRecord]) -> int:
+        if not records:
+            return 0
+
+        async with database.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(f"""
+                    CREATE TEMP TABLE _upsert_staging (
+                        node_id VARCHAR,
+                        text VARCHAR,
+                        metadata_ JSON,
+                        embedding VECTOR({settings.embedding_dimension}),
+                        content_hash VARCHAR,
+                        group_id VARCHAR,
+                        is_canonical BOOLEAN,
+                        parent_id VARCHAR,
+                        brand VARCHAR,
+                        category VARCHAR,
+                        in_stock BOOLEAN,
+                        price DOUBLE PRECISION
+                    ) ON COMMIT DROP
+                """)
+                await conn.copy_records_to_table(
+                    "_upsert_staging",
+                    records=[
+                        (
+                            record.node_id,
+                            record.text,
+                            json.dumps(record.metadata),
+                            record.embedding,
+                            record.content_hash,
+                            record.group_id or record.node_id,
+                            record.is_canonical,
+                            record.parent_id or record.node_id,
+                            *filter_columns(record.metadata)
+                        )
+                        for record in records
+                    ],
+                    columns=[
+                        "node_id", "text", "metadata_", "embedding", "content_hash", "group_id", "is_canonical",
+                        "parent_id", *FILTER_FIELDS
+                    ]
+                )
+                inserted = await conn.fetch(f"""
+                    INSERT INTO {self.table} (
+                        node_id, text, metadata_, embedding, content_hash, group_id, is_canonical,
+                        parent_id, brand, category, in_stock, price
+                    )
+                    SELECT node_id, text, metadata_, embedding, content_hash, group_id, is_canonical,
+                        parent_id, brand, category, in_stock, price
+                    FROM _upsert_staging
+                    ON CONFLICT (node_id) DO UPDATE SET
+                        text = EXCLUDED.text,
+                        metadata_ = EXCLUDED.metadata_,
+                        embedding = EXCLUDED.embedding,
+                        content_hash = EXCLUDED.content_hash,
+                        group_id = EXCLUDED.group_id,
+                        is_canonical = EXCLUDED.is_canonical,
+                        parent_id = EXCLUDED.parent_id,
+                        brand = EXCLUDED.brand,
+                        category = EXCLUDED.category,
+                        in_stock = EXCLUDED.in_stock,
+                        price = EXCLUDED.price
+                    RETURNING (xmax = 0) AS inserted
+                """)
+
+        return sum(1 for row in inserted if row["inserted"])
+
+    async def update_metadata(self, updates: list[tuple[str, dict]]) -> None:
+        if not updates:
+            return
+
+        columns = [filter_columns(metadata) for _, metadata in updates]
+        async with database.acquire() as conn:
+            await conn.execute(
+                f"""
+                UPDATE {self.table} AS t SET
+                    metadata_ = u.metadata_::json,
+                    brand = u.brand,
+                    category = u.category,
+                    in_stock = u.in_stock,
+                    price = u.price
+                FROM unnest(
+                    $1::varchar[], $2::text[], $3::varchar[], $4::varchar[], $5::boolean[], $6::float8[]
+                ) AS u(node_id, metadata_, brand, category, in_stock, price)
+                WHERE t.node_id = u.node_id
+                """,
+                [node_id for node_id, _ in updates],
+                [json.dumps(metadata) for _, metadata in updates],
+                *(list(values) for values in zip(*columns))
+            )
+
+    async def delete(self, node_ids: list[str]) -> int:
+        if not node_ids:
+            return 0
+
+        async with database.acquire() as conn:
+            status = await conn.execute(
+                f"DELETE FROM {self.table} WHERE node_id = ANY($1::varchar[])",
+                node_ids
+            )
+        return int(status.split()[-1])
+
+    async def repair_groups(self, group_ids: list[str]) -> None:
+        if not group_ids:
+            return
+
+        async with database.acquire() as conn:
+            # Promote the oldest remaining member of every group left without a canonical row
+            await conn.execute(
+                f"""
+                UPDATE {self.table} SET is_canonical = TRUE
+                WHERE id IN (
+                    SELECT DISTINCT ON (group_id) id FROM {self.table} t
+                    WHERE group_id = ANY($1::varchar[])
+                        AND NOT EXISTS (
+                            SELECT 1 FROM {self.table} c WHERE c.group_id = t.group_id AND c.is_canonical
+                        )
+                    ORDER BY group_id, id
+                )
+                """,
+                group_ids
+            )
+
+    async def clear(self) -> None:
+        async with database.acquire() as conn:
+            await conn.execute(f"DELETE FROM {self.table}")
+
+    async def count(self, estimate: bool = False) -> int:
+        async with database.acquire() as conn:
+            if estimate:
+                # Planner statistics: free to read, refreshed by (auto)ANALYZE.
+                # reltuples is -1 until the table has been analyzed once
+                reltuples = await conn.fetchval(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass($1)",
+                    self.table
+                )
+                if reltuples is not None and reltuples >= 0:
+                    return reltuples
+            return await conn.fetchval(f"SELECT COUNT(*) FROM {self.table}")
+
+    @staticmethod
+    def _to_result(row) -> SearchResult:
+        return SearchResult(
+            node_id=row["node_id"],
+            text=row["text"],
+            score=float(row["score"]),
+            metadata=json.loads(row["metadata_"]) if row["metadata_"] else {},
+            group_id=row["group_id"],
+            parent_id=row["parent_id"]
+        )
+
+    def _plan_search(
+        self,
+        query_vector: str,
+        k: int,
+        recall: str | None,
+        filters: SearchFilters | None
+    ) -> tuple[str, list, dict[str, str]]:
+        """Search SQL for one query vector, the args after the vector and k, and session settings"""
+        if filters is not None and not filters.is_empty():
+            # A group member can match the filters when its canonical row does not,
+            # so filter every row first and only then keep the best one per group.
+            # The partial ANN index does not cover this, the filter column indexes do
+            candidates = k * settings.dedup_filter_oversample
+            where, filter_args = self._filter_clause(filters, 4, canonical_only=False)
+            sql = self._best_per_group(self._search_sql(query_vector, "$3", where), "$2")
+            return sql, [candidates, *filter_args], self.index.search_settings(candidates, recall, filtered=True)
+
+        quantized = self.index.quantization != "none" and recall != "exact"
+        candidates = k * settings.vector_rerank_oversample if quantized else k
+        search_settings = self.index.search_settings(candidates, recall)
+        if quantized:
+            return self._search_sql(query_vector, "$2", "is_canonical", candidates="$3"), [candidates], search_settings
+        return self._search_sql(query_vector, "$2", "is_canonical"), [], search_settings
+
+    async def _fetch_with_settings(self, search_settings: dict[str, str], sql: str, *args) -> list:
+        async with database.acquire() as conn:
+            async with conn.transaction():
+                # SET LOCAL scopes the knobs to this query's transaction, so pooled
+                # connections never leak one request's setting into the next
+                for name, value in search_settings.items():
+                    await conn.execute(f"SET LOCAL {name} = {value}")
+                return await conn.fetch(sql, *args, timeout=settings.vector_query_timeout_seconds)
+
+    async def query(
+        self,
+        embedding: np.ndarray | list[float],
+        k: int,
+        recall: str | None = None,
+        filters: SearchFilters | None = None
+    ) -> list[SearchResult]:
+        await self.index.refresh_if_stale()
+        sql, args, search_settings = self._plan_search("$1", k, recall, filters)
+        rows = await self._fetch_with_settings(
+            search_settings, sql, np.asarray(embedding, dtype=np.float32), k, *args
+        )
+        # Relaxed iterative scans may hand back rows slightly out of order
+        return sorted((self._to_result(row) for row in rows), key=lambda result: result.score, reverse=True)
+
+    async def query_batch(
+        self,
+        embeddings: np.ndarray,
+        k: int,
+        recall: str | None = None,
+        filters: SearchFilters | None = None
+    ) -> list[list[SearchResult]]:
+        if len(embeddings) == 0:
+            return []
+
+        # Vectors travel as text literals because the pgvector codec only covers scalar values
+        literals = ["[" + ",".join(map(str, embedding.tolist())) + "]" for embedding in np.asarray(embeddings)]
+        await self.index.refresh_if_stale()
+        per_query_sql, args, search_settings = self._plan_search("q.query_embedding", k, recall, filters)
+        sql = self._batched("unnest($1::text[]::vector[]) WITH ORDINALITY AS q(query_embedding, ord)", per_query_sql)
+        rows = await self._fetch_with_settings(search_settings, sql, literals, k, *args)
+        return self._group_by_query(rows, len(literals))
+
+    async def lexical_query(self, query: str, k: int, filters: SearchFilters | None = None) -> list[SearchResult]:
+        positive, excluded = split_negations(query)
+        # Like the GIN index, lexical search only reaches canonical rows
+        where, args = self._filter_clause(filters, 4)
+        async with database.acquire() as conn:
+            rows = await conn.fetch(
+                self._lexical_search_sql("$1", "$3", "$2", where),
+                positive,
+                k,
+                excluded,
+                *args,
+                timeout=settings.vector_query_timeout_seconds
+            )
+        return [self._to_result(row) for row in rows]
+
+    async def lexical_query_batch(
+        self,
+        queries: list[str],
+        k: int,
+        filters: SearchFilters | None = None
+    ) -> list[list[SearchResult]]:
+        if not queries:
+            return []
+
+        where, args = self._filter_clause(filters, 4)
+        sql = self._batched(
+            "unnest($1::text[], $3::text[]) WITH ORDINALITY AS q(query_text, excluded_text, ord)",
+            self._lexical_search_sql("q.query_text", "q.excluded_text", "$2", where)
+        )
+        positive, excluded = zip(*(split_negations(query) for query in queries))
+        async with database.acquire() as conn:
+            rows = await conn.fetch(
+                sql, list(positive), k, list(excluded), *args, timeout=settings.vector_query_timeout_seconds
+            )
+        return self._group_by_query(rows, len(queries))
+
+    def _group_by_query(self, rows: list, num_queries: int) -> list[list[SearchResult]]:
+        results: list[list[SearchResult]] = [[] for _ in range(num_queries)]
+        for row in rows:
+            results[row["ord"] - 1].append(self._to_result(row))
+        return results
+
+    async def optimize(self) -> None:
+        await self.index.optimize()
+
+    @asynccontextmanager
+    async def exclusive(self, name: str) -> AsyncIterator[bool]:
+        # Session-level advisory lock: pre-fork workers on the same table contend for it
+        key = f"{self.table}:{name}"
+        async with database.acquire() as conn:
+            acquired = await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", key)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", key)
+
+    async def create_shadow(self) -> "PGVectorBackend":
+        shadow = PGVectorBackend(f"{self.data_table}_shadow")
+        conn = await database.acquire()
+        try:
+            # Pre-fork workers share the shadow table; only one reload may run at a time
+            if not await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", shadow.table):
+                raise ReloadInProgressError("A catalog reload is already in progress in another worker")
+            # Left behind by a reload that did not finish
+            await conn.execute(f"DROP TABLE IF EXISTS {shadow.table}")
+        except BaseException:
+            await database.release(conn)
+            raise
+
+        shadow._reload_conn = conn
+        try:
+            await shadow._ensure_table()
+            await shadow.index.refresh_status()
+        except BaseException:
+            await shadow.discard()
+            raise
+        logger.info(f"Created shadow catalog {shadow.table}")
+        return shadow
+
+    async def _rename_indexes(self, conn, table: str, old_prefix: str, new_prefix: str) -> None:
+        # Index names are unique per schema, so they follow the table they belong to
+        names = await conn.fetch(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = $1 AND tablename = $2",
+            settings.vector_schema_name,
+            table
+        )
+        for row in names:
+            name = row["indexname"]
+            if name.startswith(f"{old_prefix}_"):
+                await conn.execute(
+                    f"ALTER INDEX {settings.vector_schema_name}.{name} RENAME TO {new_prefix}{name[len(old_prefix):]}"
+                )
+
+    async def swap_in(self, shadow: "PGVectorBackend") -> "PGVectorBackend":
+        started = time.perf_counter()
+        rows = await shadow.count()
+        # Index the new catalog before it takes any traffic
+        if shadow.index.index_type != "none" and rows >= settings.vector_index_min_rows:
+            await shadow.index.rebuild(rows)
+
+        retired = f"{self.data_table}_retired"
+        conn = shadow._reload_conn
+        await conn.execute(f"ANALYZE {shadow.table}")
+        await conn.execute(f"DROP TABLE IF EXISTS {settings.vector_schema_name}.{retired}")
+
+        for attempt in range(1, settings.catalog_swap_attempts + 1):
+            try:
+                # Renames are catalog-only and commit together: every query sees
+                # either the old table or the new one under the live name
+                async with conn.transaction():
+                    # Queue behind long queries only briefly; queries arriving meanwhile wait on us
+                    await conn.execute(f"SET LOCAL lock_timeout = '{settings.catalog_swap_lock_timeout_ms}ms'")
+                    await conn.execute(f"ALTER TABLE {self.table} RENAME TO {retired}")
+                    await self._rename_indexes(conn, retired, self.data_table, retired)
+                    await conn.execute(f"ALTER TABLE {shadow.table} RENAME TO {self.data_table}")
+                    await self._rename_indexes(conn, self.data_table, shadow.data_table, self.data_table)
+                break
+            except asyncpg.LockNotAvailableError:
+                if attempt == settings.catalog_swap_attempts:
+                    raise
+                logger.warning(f"Catalog swap attempt {attempt} timed out waiting for locks; retrying")
+                await asyncio.sleep(0.1 * attempt)
+
+        await shadow._release_reload_conn()
+        await self.index.refresh_status()
+        self.last_swap = {
+            "rows": rows,
+            "swap_seconds": round(time.perf_counter() - started, 2),
+            "finished_at": time.time(),
+        }
+        logger.success(f"Swapped {rows} rows into {self.table}")
+        # Dropping a table only unlinks its files, with no DELETE or VACUUM
+        self._drop_task = asyncio.create_task(self._drop_retired(retired))
+        return self
+
+    async def _drop_retired(self, retired: str) -> None:
+        try:
+            async with database.acquire() as conn:
+                await conn.execute(f"DROP TABLE IF EXISTS {settings.vector_schema_name}.{retired}")
+            logger.info(f"Dropped retired catalog {retired}")
+        except Exception as e:
+            # The next swap drops it before reusing the name
+            logger.error(f"Error dropping retired catalog {retired}: {e}")
+
+    async def _release_reload_conn(self) -> None:
+        if self._reload_conn is None:
+            return
+        conn, self._reload_conn = self._reload_conn, None
+        try:
+            await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", self.table)
+        finally:
+            await database.release(conn)
+
+    async def discard(self) -> None:
+        await self.index.close()
+        try:
+            async with database.acquire() as conn:
+                await conn.execute(f"DROP TABLE IF EXISTS {self.table}")
+        finally:
+            await self._release_reload_conn()
+
+    async def load_snapshot(self, snapshot: Snapshot) -> int:
+        vectors = snapshot.vectors()
+        batches = snapshot.iter_batches(_SNAPSHOT_COPY_ROWS)
+        loaded = 0
+        async with database.acquire() as conn:
+            while True:
+                # JSON parsing stays off the event loop; the matrix is read straight from the mapping
+                documents = await asyncio.to_thread(next, batches, None)
+                if documents is None:
+                    break
+                await conn.copy_records_to_table(
+                    self.data_table,
+                    schema_name=settings.vector_schema_name,
+                    records=[
+                        (
+                            document["node_id"],
+                            document["text"],
+                            json.dumps(document.get("metadata") or {}),
+                            vectors[loaded + i],
+                            document.get("content_hash"),
+                            document.get("group_id") or document["node_id"],
+                            document.get("is_canonical", True),
+                            document.get("parent_id") or document["node_id"],
+                            *filter_columns(document.get("metadata") or {})
+                        )
+                        for i, document in enumerate(documents)
+                    ],
+                    columns=[
+                        "node_id", "text", "metadata_", "embedding", "content_hash", "group_id", "is_canonical",
+                        "parent_id", *FILTER_FIELDS
+                    ]
+                )
+                loaded += len(documents)
+                logger.debug(f"Copied {loaded}/{snapshot.rows} snapshot rows into {self.table}")
+        return loaded
+
+    async def close(self) -> None:
+        await self.index.close()
+        await database.close()
+
+    def get_info(self) -> dict[str, Any]:
+        return {
+            "backend": self.name,
+            "table": self.table,
+            "index": self.index.get_status(),
+            "last_swap": self.last_swap,
+        }
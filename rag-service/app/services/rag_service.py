@@ -1,8 +1,12 @@
-from typing import Any
+from typing import Any, AsyncIterator
 from loguru import logger
 from app.core.config import settings
+from app.services.catalog_loader import aiter_batches, aiter_catalog, sample_batches
 from app.services.vector_store_service import vector_store_service
 from app.services.embedding_service import embedding_service
+from app.services.ingest_service import ingest_service
+from app.services.job_service import ingest_job_service
+from app.services.vector_backend import DocumentInput, SearchFilters
 
 
 class RAGService:
@@ -30,19 +34,128 @@ class RAGService:
         if not self._initialized:
             await self.initialize()
         
-        return await vector_store_service.add_documents(documents)
+        node_ids = await vector_store_service.add_documents(documents)
+        # Small writes: one deferred index check covers a burst of them
+        vector_store_service.schedule_optimize()
+        return node_ids
     
-    async def query(self, query: str, top_k: int | None = None) -> list[str]:
+    async def upsert_documents(self, documents: list[DocumentInput]) -> dict[str, Any]:
         if not self._initialized:
             await self.initialize()
         
-        return await vector_store_service.query_documents(query, top_k)
+        result = await vector_store_service.upsert_documents(documents)
+        vector_store_service.schedule_optimize()
+        return result
+    
+    async def delete_documents(self, node_ids: list[str]) -> int:
+        if not self._initialized:
+            await self.initialize()
+        
+        deleted = await vector_store_service.delete_documents(node_ids)
+        vector_store_service.schedule_optimize()
+        return deleted
+    
+    async def ingest_stream(self, chunks: AsyncIterator[bytes]) -> dict[str, Any]:
+        if not self._initialized:
+            await self.initialize()
+        
+        progress = await ingest_service.ingest_stream(chunks)
+        await vector_store_service.optimize()
+        return progress
+    
+    async def submit_ingest_job(
+        self,
+        kind: str,
+        documents: list[DocumentInput] | None = None,
+        source: AsyncIterator[list[DocumentInput]] | None = None
+    ) -> dict[str, Any]:
+        if not self._initialized:
+            await self.initialize()
+        
+        return await ingest_job_service.submit(kind, documents, source)
+    
+    async def get_ingest_job(self, job_id: str) -> dict[str, Any] | None:
+        return await ingest_job_service.get_job(job_id)
+    
+    async def cancel_ingest_job(self, job_id: str) -> dict[str, Any] | None:
+        return await ingest_job_service.cancel(job_id)
+    
+    def list_ingest_jobs(self) -> list[dict[str, Any]]:
+        return ingest_job_service.list_jobs()
+    
+    async def query(
+        self,
+        query: str,
+        top_k: int | None = None,
+        recall: str | None = None,
+        mode: str | None = None,
+        filters: SearchFilters | None = None,
+        unit: str | None = None,
+        rerank: bool | None = None
+    ) -> list[str]:
+        if not self._initialized:
+            await self.initialize()
+        
+        return await vector_store_service.query_documents(query, top_k, recall, mode, filters, unit, rerank)
+    
+    async def query_batch(
+        self,
+        queries: list[str],
+        top_k: int | None = None,
+        recall: str | None = None,
+        mode: str | None = None,
+        filters: SearchFilters | None = None,
+        unit: str | None = None,
+        rerank: bool | None = None
+    ) -> list[list[str]]:
+        if not self._initialized:
+            await self.initialize()
+        
+        return await vector_store_service.query_documents_batch(queries, top_k, recall, mode, filters, unit, rerank)
+    
+    def default_catalog(self) -> AsyncIterator[list[DocumentInput]]:
+        """Batches streamed from CATALOG_PATH, or the built-in sample products when it is unset"""
+        if settings.catalog_path:
+            return aiter_catalog(settings.catalog_path, settings.ingest_batch_size)
+        return aiter_batches(sample_batches(settings.ingest_batch_size))
+    
+    async def seed_documents(self) -> dict[str, Any] | None:
+        if not self._initialized:
+            await self.initialize()
+        
+        result = await vector_store_service.seed_catalog(self.default_catalog())
+        if result is not None:
+            await vector_store_service.optimize()
+        return result
+    
+    async def reload_documents(self, batches: AsyncIterator[list[DocumentInput]] | None = None) -> dict[str, Any]:
+        if not self._initialized:
+            await self.initialize()
+        
+        result = await vector_store_service.reload_catalog(batches or self.default_catalog())
+        await vector_store_service.optimize()
+        return result
+    
+    async def import_snapshot(self, path: str) -> dict[str, Any]:
+        if not self._initialized:
+            await self.initialize()
+        
+        result = await vector_store_service.import_snapshot(path)
+        await vector_store_service.optimize()
+        return result
     
     async def clear_documents(self) -> None:
         if not self._initialized:
             await self.initialize()
         
         await vector_store_service.clear_store()
+        await vector_store_service.optimize()
+    
+    async def rebuild_index(self) -> dict[str, Any]:
+        if not self._initialized:
+            await self.initialize()
+        
+        return await vector_store_service.rebuild_index()
     
     async def get_system_info(self) -> dict[str, Any]:
         if not self._initialized:
@@ -55,8 +168,15 @@ class RAGService:
                 "top_k": settings.top_k,
                 "embedding_model": settings.embedding_model,
             },
-            "vector_store": store_info
+            "embedding_service": embedding_service.get_info(),
+            "vector_store": store_info,
+            "ingest": {**ingest_service.get_progress(), "jobs": ingest_job_service.get_stats()}
         }
+    
+    async def close(self) -> None:
+        await ingest_job_service.close()
+        await embedding_service.close()
+        await vector_store_service.close()
 
 
 # Global instance
@@ -0,0 +1,155 @@
+import asyncio
+import dataclasses
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+import numpy as np
+from loguru import logger
+from app.core.config import settings
+from app.services.vector_backend import SearchResult
+from app.utils.cache import LRUCache
+from app.utils.hashing import content_hash
+from app.utils.metrics import Histogram
+
+
+class RerankService:
+    """Re-orders search candidates with a cross-encoder, within a fixed latency budget"""
+
+    _instance = None
+    _lock = asyncio.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.model = None
+            cls._instance.score_cache = LRUCache(
+                settings.rerank_cache_size,
+                ttl_seconds=settings.rerank_cache_ttl_seconds
+            )
+            # One scoring thread: a backlog shows up as budget timeouts instead of
+            # stealing cores from the embedding model
+            cls._instance._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+            cls._instance._initialized = False
+            cls._instance.reranked = 0
+            cls._instance.timeouts = 0
+            cls._instance.latency_ms = Histogram([5, 10, 25, 50, 100, 150, 250, 500, 1000])
+        return cls._instance
+
+    async def initialize(self) -> None:
+        if self._initialized:
+            return
+
+        async with self._lock:
+            if self._initialized:
+                return
+
+            try:
+                from sentence_transformers import CrossEncoder
+
+                logger.info(f"Loading re-ranking model: {settings.rerank_model}")
+                loop = asyncio.get_event_loop()
+                self.model = await loop.run_in_executor(
+                    self._executor,
+                    lambda: CrossEncoder(
+                        settings.rerank_model,
+                        max_length=settings.rerank_max_length,
+                        device="cpu",
+                        cache_folder=f"{settings.embedding_cache_dir}/sentence_transformers"
+                    )
+                )
+                self._initialized = True
+                logger.success("Re-ranking model loaded")
+
+            except Exception as e:
+                logger.error(f"Failed to load re-ranking model: {e}")
+                raise
+
+    @staticmethod
+    def _cache_key(query: str, result: SearchResult) -> tuple[str, str, str]:
+        # The text hash keeps a re-ingested document from reusing its old score
+        return " ".join(query.split()), result.node_id, content_hash(result.text)
+
+    async def rerank(self, query: str, results: list[SearchResult]) -> list[SearchResult]:
+        return (await self.rerank_batch([query], [results]))[0]
+
+    async def rerank_batch(self, queries: list[str], ranked: list[list[SearchResult]]) -> list[list[SearchResult]]:
+        """Candidates re-ordered by cross-encoder score, or in their original order if the budget runs out"""
+        try:
+            if not self._initialized:
+                await self.initialize()
+        except Exception:
+            # Already logged; serve the retrieval order rather than failing the query
+            return ranked
+
+        started = time.perf_counter()
+        keys = [[self._cache_key(query, result) for result in results] for query, results in zip(queries, ranked)]
+        scores = [[self.score_cache.get(key) for key in query_keys] for query_keys in keys]
+
+        missing = [
+            (i, j)
+            for i, query_scores in enumerate(scores)
+            for j, score in enumerate(query_scores)
+            if score is None
+        ]
+        if missing:
+            pairs = [(queries[i], ranked[i][j].text) for i, j in missing]
+            loop = asyncio.get_event_loop()
+            scoring = loop.run_in_executor(
+                self._executor,
+                lambda: self.model.predict(pairs, batch_size=settings.rerank_batch_size, show_progress_bar=False)
+            )
+            # Scores that arrive after the deadline still warm the cache for next time
+            scoring.add_done_callback(lambda done: self._store_scores(done, [keys[i][j] for i, j in missing]))
+
+            try:
+                fresh = await asyncio.wait_for(asyncio.shield(scoring), timeout=settings.rerank_budget_ms / 1000)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                logger.warning(f"Re-ranking {len(pairs)} pairs exceeded {settings.rerank_budget_ms:g} ms")
+                return ranked
+            except Exception as e:
+                logger.error(f"Error re-ranking results: {e}")
+                return ranked
+
+            for (i, j), score in zip(missing, np.asarray(fresh, dtype=np.float32).tolist()):
+                scores[i][j] = score
+
+        self.reranked += len(queries)
+        self.latency_ms.observe((time.perf_counter() - started) * 1000)
+        return [
+            [
+                dataclasses.replace(result, score=score)
+                for score, _, result in sorted(
+                    zip(query_scores, range(len(results)), results),
+                    key=lambda item: (-item[0], item[1])
+                )
+            ]
+            for results, query_scores in zip(ranked, scores)
+        ]
+
+    def _store_scores(self, done: asyncio.Future, keys: list[tuple[str, str, str]]) -> None:
+        if done.cancelled() or done.exception() is not None:
+            return
+        for key, score in zip(keys, np.asarray(done.result(), dtype=np.float32).tolist()):
+            self.score_cache.set(key, score)
+
+    def get_info(self) -> dict[str, Any]:
+        return {
+            "enabled": settings.rerank_enabled,
+            "loaded": self._initialized,
+            "model": settings.rerank_model,
+            "candidates": settings.rerank_candidates,
+            "budget_ms": settings.rerank_budget_ms,
+            "reranked_queries": self.reranked,
+            "timeouts": self.timeouts,
+            "latency_ms": self.latency_ms.snapshot(),
+            "score_cache": self.score_cache.stats(),
+        }
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._initialized = False
+
+
+rerank_service = RerankService()
@@ -0,0 +1,201 @@
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+import numpy as np
+from app.utils.snapshot import Snapshot
+
+
+@dataclass
+class DocumentInput:
+    text: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+    node_id: str | None = None
+
+
+@dataclass
+class DocumentRecord:
+    node_id: str
+    text: str
+    embedding: np.ndarray
+    metadata: dict[str, Any] = field(default_factory=dict)
+    content_hash: str | None = None
+    # Near-duplicates share a group; only the canonical member is returned by searches
+    group_id: str | None = None
+    is_canonical: bool = True
+    # Chunks of a long document link back to it; whole documents are their own parent
+    parent_id: str | None = None
+
+
+@dataclass
+class StoredDocument:
+    content_hash: str | None
+    metadata: dict[str, Any]
+    group_id: str | None = None
+    is_canonical: bool = True
+    parent_id: str | None = None
+
+
+# Metadata keys promoted to indexed columns so searches can filter on them
+FILTER_FIELDS = ("brand", "category", "in_stock", "price")
+
+
+def _label(value: Any) -> str | None:
+    if value is None:
+        return None
+    return str(value).strip().lower() or None
+
+
+def filter_columns(metadata: dict[str, Any]) -> tuple[str | None, str | None, bool | None, float | None]:
+    """Normalized (brand, category, in_stock, price) taken from a document's metadata"""
+    in_stock = metadata.get("in_stock")
+    if isinstance(in_stock, str):
+        in_stock = in_stock.strip().lower() in ("true", "1", "yes")
+    try:
+        price = float(metadata["price"]) if metadata.get("price") is not None else None
+    except (TypeError, ValueError):
+        price = None
+    return (
+        _label(metadata.get("brand")),
+        _label(metadata.get("category")),
+        bool(in_stock) if in_stock is not None else None,
+        price
+    )
+
+
+@dataclass
+class SearchFilters:
+    brand: list[str] | None = None
+    category: list[str] | None = None
+    in_stock: bool | None = None
+    price_min: float | None = None
+    price_max: float | None = None
+
+    def __post_init__(self):
+        # Stored labels are lower-cased by filter_columns
+        if self.brand:
+            self.brand = [brand.strip().lower() for brand in self.brand]
+        if self.category:
+            self.category = [category.strip().lower() for category in self.category]
+
+    def is_empty(self) -> bool:
+        return (
+            not self.brand
+            and not self.category
+            and self.in_stock is None
+            and self.price_min is None
+            and self.price_max is None
+        )
+
+
+@dataclass
+class SearchResult:
+    node_id: str
+    text: str
+    score: float
+    metadata: dict[str, Any] = field(default_factory=dict)
+    group_id: str | None = None
+    parent_id: str | None = None
+
+
+class ReloadInProgressError(RuntimeError):
+    pass
+
+
+class VectorBackend(ABC):
+    """Storage and similarity search behind VectorStoreService"""
+
+    name: str = "base"
+
+    @abstractmethod
+    async def initialize(self) -> None: ...
+
+    @abstractmethod
+    async def get_existing(self, parent_ids: list[str]) -> dict[str, StoredDocument]:
+        """Stored rows (whole documents or their chunks) of the given documents, keyed by row node ID"""
+
+    @abstractmethod
+    async def get_parent_texts(self, parent_ids: list[str]) -> dict[str, str]:
+        """Full text of the given documents, stitched back together from their chunks"""
+
+    @abstractmethod
+    async def upsert(self, records: list[DocumentRecord]) -> int:
+        """Insert or replace by node_id; returns how many rows were new"""
+
+    @abstractmethod
+    async def update_metadata(self, updates: list[tuple[str, dict]]) -> None: ...
+
+    @abstractmethod
+    async def delete(self, node_ids: list[str]) -> int: ...
+
+    @abstractmethod
+    async def repair_groups(self, group_ids: list[str]) -> None:
+        """Make sure every listed group that still has members has exactly one canonical row"""
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+    @abstractmethod
+    async def count(self, estimate: bool = False) -> int: ...
+
+    @abstractmethod
+    async def query(
+        self,
+        embedding: np.ndarray | list[float],
+        k: int,
+        recall: str | None = None,
+        filters: SearchFilters | None = None
+    ) -> list[SearchResult]:
+        """Top-k canonical rows by cosine similarity; recall trades accuracy for latency on ANN backends"""
+
+    @abstractmethod
+    async def lexical_query(self, query: str, k: int, filters: SearchFilters | None = None) -> list[SearchResult]:
+        """Top-k by full-text relevance, for exact terms such as model numbers"""
+
+    async def query_batch(
+        self,
+        embeddings: np.ndarray,
+        k: int,
+        recall: str | None = None,
+        filters: SearchFilters | None = None
+    ) -> list[list[SearchResult]]:
+        """Top-k for each row of embeddings; backends override this to search them all at once"""
+        return [await self.query(embedding, k, recall=recall, filters=filters) for embedding in embeddings]
+
+    async def lexical_query_batch(
+        self,
+        queries: list[str],
+        k: int,
+        filters: SearchFilters | None = None
+    ) -> list[list[SearchResult]]:
+        return [await self.lexical_query(query, k, filters=filters) for query in queries]
+
+    async def optimize(self) -> None:
+        """Maintenance after bulk writes, such as (re)building ANN indexes"""
+
+    @asynccontextmanager
+    async def exclusive(self, name: str) -> AsyncIterator[bool]:
+        """Whether this process won `name` among every process sharing the store, held for the block"""
+        # A store private to one process has nobody to contend with
+        yield True
+
+    async def create_shadow(self) -> "VectorBackend":
+        """An empty, initialized store of the same kind to build a replacement catalog in"""
+        raise NotImplementedError(f"The {self.name} backend cannot build a shadow catalog")
+
+    async def swap_in(self, shadow: "VectorBackend") -> "VectorBackend":
+        """Atomically replace this catalog with the shadow's; returns the backend now serving it"""
+        raise NotImplementedError(f"The {self.name} backend cannot swap catalogs")
+
+    async def discard(self) -> None:
+        """Remove a shadow catalog that will not be swapped in"""
+
+    async def load_snapshot(self, snapshot: Snapshot) -> int:
+        """Bulk-load a prebuilt snapshot into this (empty) store; returns the row count"""
+        raise NotImplementedError(f"The {self.name} backend cannot load snapshots")
+
+    async def close(self) -> None:
+        pass
+
+    def get_info(self) -> dict[str, Any]:
+        return {"backend": self.name}
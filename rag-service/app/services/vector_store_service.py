@@ -1,14 +1,78 @@
-from llama_index.core.schema import TextNode
-from llama_index.vector_stores.postgres import PGVectorStore
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable
+import numpy as np
 from loguru import logger
 from app.core.config import settings
 from app.services.embedding_service import embedding_service
-import asyncpg
+from app.services.pg_vector_backend import PGVectorBackend
+from app.services.numpy_vector_backend import NumpyVectorBackend
+from app.services.rerank_service import rerank_service
+from app.services.hybrid_search import (
+    SEARCH_MODES,
+    is_exact_token_query,
+    matches_identifier,
+    reciprocal_rank_fusion,
+)
+from app.services.vector_backend import (
+    DocumentInput,
+    DocumentRecord,
+    ReloadInProgressError,
+    SearchFilters,
+    SearchResult,
+    VectorBackend,
+)
+from app.utils.hashing import content_hash, document_id
+from app.utils.semantic_cache import SemanticCache, is_cacheable_query
+from app.utils.snapshot import open_snapshot
+
+
+RESULT_UNITS = ("chunk", "parent")
+RELOAD_STRATEGIES = ("swap", "clear")
+
+
+def chunking_config() -> dict[str, Any]:
+    """How documents are split into rows; recorded in snapshots built under these settings"""
+    return {
+        "enabled": settings.chunking_enabled,
+        "max_tokens": settings.chunk_max_tokens,
+        "overlap_tokens": settings.chunk_overlap_tokens,
+    }
+
+
+def create_backend(name: str) -> VectorBackend:
+    backends = {
+        PGVectorBackend.name: PGVectorBackend,
+        NumpyVectorBackend.name: NumpyVectorBackend,
+    }
+    if name not in backends:
+        raise ValueError(f"Unknown vector store backend '{name}', expected one of {sorted(backends)}")
+    return backends[name]()
+
 
 class VectorStoreService:
     def __init__(self):
-        self.vector_store = None
+        self.backend = create_backend(settings.vector_store_backend)
         self._initialized = False
+        # Document count kept current by ingest/clear and re-read from the
+        # database every store_stats_refresh_seconds
+        self._document_count: int | None = None
+        self._count_refreshed_at = 0.0
+        self._count_source = "unknown"
+        self._count_lock = asyncio.Lock()
+        self._reload_lock = asyncio.Lock()
+        self._optimize_task: asyncio.Task | None = None
+        self._search_counts = {mode: 0 for mode in SEARCH_MODES}
+        self._embeddings_skipped = 0
+        # Bumped by every catalog write; cached results from older generations are ignored
+        self._generation = 0
+        self.result_cache = SemanticCache(
+            settings.semantic_cache_size,
+            settings.embedding_dimension,
+            settings.semantic_cache_threshold,
+            ttl_seconds=settings.semantic_cache_ttl_seconds
+        ) if settings.semantic_cache_enabled else None
     
     async def initialize(self) -> None:
         if self._initialized:
@@ -18,17 +82,10 @@ class VectorStoreService:
             logger.info("Initializing vector store")
             
             await embedding_service.initialize()
-            
-            self.vector_store = PGVectorStore.from_params(
-                database=settings.postgres_db,
-                host=settings.postgres_host,
-                password=settings.postgres_password,
-                port=settings.postgres_port,
-                user=settings.postgres_user,
-                table_name=settings.vector_table_name,
-                embed_dim=settings.embedding_dimension,
-                schema_name=settings.vector_schema_name
-            )
+            await self.backend.initialize()
+            if settings.rerank_enabled:
+                # Load up front so the first query is not charged for it
+                await rerank_service.initialize()
             
             self._initialized = True
             logger.success("Vector store initialized")
@@ -37,71 +94,286 @@ class VectorStoreService:
             logger.error(f"Failed to initialize vector store: {e}")
             raise
     
-    async def add_documents(self, documents: list[str]) -> list[str]:
+    @staticmethod
+    def _build_metadata(document: DocumentInput, chunk: tuple[int, int, int] | None = None) -> dict[str, Any]:
+        metadata = {
+            **document.metadata,
+            "doc_length": len(document.text),
+            "doc_preview": document.text[:100]
+        }
+        if chunk is not None:
+            index, count, start = chunk
+            metadata.update(chunk=index, chunk_count=count, chunk_start=start)
+        # Round-trip through JSON so it compares equal to what the backend returns
+        return json.loads(json.dumps(metadata))
+    
+    async def _split_documents(self, by_id: dict[str, DocumentInput]) -> list[tuple[str, str, str, dict]]:
+        """(node_id, parent_id, text, metadata) rows to store for each document"""
+        if not settings.chunking_enabled:
+            return [
+                (node_id, node_id, document.text, self._build_metadata(document))
+                for node_id, document in by_id.items()
+            ]
+        
+        spans = await embedding_service.chunk_spans([document.text for document in by_id.values()])
+        rows = []
+        for (parent_id, document), document_spans in zip(by_id.items(), spans):
+            if len(document_spans) == 1:
+                # Documents that fit the model are stored whole, exactly as before chunking
+                rows.append((parent_id, parent_id, document.text, self._build_metadata(document)))
+                continue
+            for index, (start, end) in enumerate(document_spans):
+                rows.append((
+                    f"{parent_id}#{index}",
+                    parent_id,
+                    document.text[start:end],
+                    self._build_metadata(document, (index, len(document_spans), start))
+                ))
+        return rows
+    
+    async def upsert_documents(
+        self,
+        documents: list[DocumentInput],
+        backend: VectorBackend | None = None
+    ) -> dict[str, Any]:
+        """Insert or update documents by node ID, re-embedding only changed text"""
         if not self._initialized:
             await self.initialize()
         
-        try:
-            logger.info(f"Adding {len(documents)} documents")
-            
-            embeddings = await embedding_service.encode(documents)
+        # A shadow catalog being built by reload_catalog is written the same way
+        live = backend is None
+        backend = backend or self.backend
+        
+        # The last occurrence of an ID within one call wins
+        by_id: dict[str, DocumentInput] = {}
+        for document in documents:
+            by_id[document.node_id or document_id(document.text)] = document
+        
+        existing = await backend.get_existing(list(by_id))
+        rows = await self._split_documents(by_id)
+        
+        # Unchanged chunks of an edited document keep their embeddings
+        to_embed: list[tuple[str, str, str, str, dict]] = []
+        metadata_only: list[tuple[str, dict]] = []
+        unchanged = 0
+        for node_id, parent_id, text, metadata in rows:
+            text_hash = content_hash(text)
+            current = existing.get(node_id)
             
-            nodes = [
-                TextNode(
-                    text=doc,
-                    id_=f"doc_{hash(doc[:50])}_{i}",
+            if current is None or current.content_hash != text_hash:
+                to_embed.append((node_id, parent_id, text, text_hash, metadata))
+            elif current.metadata != metadata:
+                metadata_only.append((node_id, metadata))
+            else:
+                unchanged += 1
+        
+        # Chunks left over from a longer previous version of a document
+        row_ids = {node_id for node_id, _, _, _ in rows}
+        stale = [node_id for node_id in existing if node_id not in row_ids]
+        if stale:
+            removed = await backend.delete(stale)
+            if live:
+                self._adjust_count(-removed)
+        
+        inserted = 0
+        if to_embed:
+            embeddings = await embedding_service.encode_array([text for _, _, text, _, _ in to_embed])
+            groups = await self._assign_groups(
+                [(node_id, parent_id) for node_id, parent_id, _, _, _ in to_embed], embeddings, backend
+            )
+            records = [
+                DocumentRecord(
+                    node_id=node_id,
+                    text=text,
                     embedding=embedding,
-                    metadata={
-                        "doc_index": i,
-                        "doc_length": len(doc),
-                        "doc_preview": doc[:100]
-                    }
+                    metadata=metadata,
+                    content_hash=text_hash,
+                    group_id=group_id,
+                    is_canonical=is_canonical,
+                    parent_id=parent_id
                 )
-                for i, (doc, embedding) in enumerate(zip(documents, embeddings))
+                for (node_id, parent_id, text, text_hash, metadata), embedding, (group_id, is_canonical)
+                in zip(to_embed, embeddings, groups)
             ]
+            inserted = await backend.upsert(records)
+            if live:
+                self._adjust_count(inserted)
             
-            node_ids = self.vector_store.add(nodes)
-            logger.success(f"Added {len(node_ids)} documents")
-            return node_ids
+            # A re-embedded canonical row that joined another group leaves its old group without one
+            await backend.repair_groups([
+                current.group_id
+                for record in records
+                if (current := existing.get(record.node_id)) is not None
+                and current.is_canonical
+                and current.group_id
+                and (current.group_id != record.group_id or not record.is_canonical)
+            ])
+        
+        await backend.repair_groups([
+            current.group_id
+            for node_id in stale
+            if (current := existing[node_id]).is_canonical and current.group_id
+        ])
+        
+        await backend.update_metadata(metadata_only)
+        if live and (to_embed or metadata_only or stale):
+            self._generation += 1
+        
+        return {
+            "node_ids": list(by_id),
+            "inserted": inserted,
+            "updated": len(to_embed) - inserted + len(metadata_only),
+            "unchanged": unchanged,
+            "embedded": len(to_embed),
+            "chunks": len(rows),
+            "removed_chunks": len(stale)
+        }
+    
+    async def _assign_groups(
+        self,
+        rows: list[tuple[str, str]],
+        embeddings: np.ndarray,
+        backend: VectorBackend
+    ) -> list[tuple[str, bool]]:
+        """Group each whole document with the most similar canonical one, stored or in this batch
+
+        Chunks of longer documents are never grouped: shared boilerplate (warranty
+        or shipping text) would otherwise hide one product's chunk behind another's.
+        """
+        if not settings.dedup_enabled:
+            return [(node_id, True) for node_id, _ in rows]
+        
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        # A few neighbours, since a re-embedded document may find its own stale
+        # row first and chunks of other documents are passed over
+        neighbours = await backend.query_batch(vectors, 4)
+        batch_ids = {node_id for node_id, _ in rows}
+        
+        assignments: list[tuple[str, bool]] = []
+        batch_canonicals: list[int] = []
+        for i, (node_id, parent_id) in enumerate(rows):
+            if parent_id != node_id:
+                assignments.append((node_id, True))
+                continue
+            
+            best_group, best_score = None, settings.dedup_similarity_threshold
+            for result in neighbours[i]:
+                if (result.parent_id or result.node_id) != result.node_id:
+                    continue
+                if result.node_id not in batch_ids and result.score >= best_score:
+                    best_group, best_score = result.group_id or result.node_id, result.score
+            
+            if batch_canonicals:
+                similarities = vectors[batch_canonicals] @ vectors[i]
+                best = int(np.argmax(similarities))
+                if similarities[best] >= best_score:
+                    best_group = rows[batch_canonicals[best]][0]
+            
+            if best_group is None:
+                assignments.append((node_id, True))
+                batch_canonicals.append(i)
+            else:
+                assignments.append((best_group, False))
+        
+        return assignments
+    
+    async def add_documents(self, documents: list[str]) -> list[str]:
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            logger.info(f"Adding {len(documents)} documents")
+            
+            result = await self.upsert_documents([DocumentInput(text=doc) for doc in documents])
+            
+            logger.success(
+                f"Added {len(result['node_ids'])} documents "
+                f"({result['inserted']} new, {result['unchanged']} unchanged)"
+            )
+            return result["node_ids"]
             
         except Exception as e:
             logger.error(f"Error adding documents: {e}")
             raise
     
-    async def query_documents(self, query: str, top_k: int | None = None) -> list[str]:
+    async def delete_documents(self, node_ids: list[str]) -> int:
         if not self._initialized:
             await self.initialize()
         
         try:
-            k = min(top_k or settings.top_k, 10)
-            logger.debug(f"Querying: '{query}' (top_k={k})")
-            
-            query_embedding = await embedding_service.encode_single(query)
-            
-            from llama_index.core.vector_stores import VectorStoreQuery
+            # Documents may be stored as several chunks; remove all of them
+            existing = await self.backend.get_existing(node_ids)
+            deleted = await self.backend.delete(list(existing))
+            self._adjust_count(-deleted)
+            self._generation += 1
+            await self.backend.repair_groups([
+                document.group_id for document in existing.values() if document.is_canonical and document.group_id
+            ])
+            logger.info(f"Deleted {deleted} documents")
+            return deleted
             
-            vector_query = VectorStoreQuery(
-                query_embedding=query_embedding,
-                similarity_top_k=k * 2,
-                mode="default"
+        except Exception as e:
+            logger.error(f"Error deleting documents: {e}")
+            raise
+    
+    async def query_documents(
+        self,
+        query: str,
+        top_k: int | None = None,
+        recall: str | None = None,
+        mode: str | None = None,
+        filters: SearchFilters | None = None,
+        unit: str | None = None,
+        rerank: bool | None = None
+    ) -> list[str]:
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            k = min(top_k or settings.top_k, 10)
+            mode = mode or settings.search_mode
+            unit = unit or settings.query_result_unit
+            rerank = settings.rerank_enabled if rerank is None else rerank
+            logger.debug(
+                f"Querying: '{query}' (top_k={k}, mode={mode}, unit={unit}, rerank={rerank}, filters={filters})"
             )
             
-            result = self.vector_store.query(vector_query)
+            self._check_mode(mode)
+            search_k = self._search_k(k, unit, rerank)
+            self._search_counts[mode] += 1
             
-            documents = []
-            seen_texts = set()
+            # Model numbers, sizes and prices embed almost identically ("iphone 14 pro"
+            # vs "iphone 15 pro"), so queries with numbers never touch the cache
+            use_cache = self.result_cache is not None and mode != "lexical" and is_cacheable_query(query)
+            if use_cache:
+                cache_params = (k, mode, recall, unit, rerank, repr(filters))
+                generation = self._generation
+                query_embedding = await embedding_service.encode_single(query)
+                cached = self.result_cache.get(query_embedding, cache_params, generation)
+                if cached is not None:
+                    logger.debug(f"Semantic cache hit for '{query}'")
+                    return list(cached)
+                started = time.perf_counter()
             
-            for node in result.nodes:
-                doc_text = node.text.strip()
-                doc_key = doc_text[:50].lower().strip()
-                
-                if doc_key not in seen_texts and len(doc_text) > 20:
-                    documents.append(doc_text)
-                    seen_texts.add(doc_key)
-                    
-                    if len(documents) >= k:
-                        break
+            if mode == "lexical":
+                results = await self.backend.lexical_query(query, search_k, filters)
+            elif mode == "vector":
+                results = await self._vector_search(query, search_k, recall, filters)
+            else:
+                results = await self._hybrid_search(query, search_k, recall, filters)
             
+            if rerank:
+                results = await rerank_service.rerank(query, results)
+            documents = (await self._to_documents([results], k, unit))[0]
+            if use_cache:
+                self.result_cache.set(
+                    query_embedding,
+                    cache_params,
+                    generation,
+                    list(documents),
+                    cost_ms=(time.perf_counter() - started) * 1000
+                )
             logger.debug(f"Retrieved {len(documents)} documents")
             return documents
             
@@ -109,42 +381,363 @@ class VectorStoreService:
             logger.error(f"Error querying vector store: {e}")
             return []
     
+    async def query_documents_batch(
+        self,
+        queries: list[str],
+        top_k: int | None = None,
+        recall: str | None = None,
+        mode: str | None = None,
+        filters: SearchFilters | None = None,
+        unit: str | None = None,
+        rerank: bool | None = None
+    ) -> list[list[str]]:
+        """Answer many queries with one embedding call and one search statement per chunk"""
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            k = min(top_k or settings.top_k, 10)
+            mode = mode or settings.search_mode
+            unit = unit or settings.query_result_unit
+            rerank = settings.rerank_enabled if rerank is None else rerank
+            self._check_mode(mode)
+            search_k = self._search_k(k, unit, rerank)
+            self._search_counts[mode] += len(queries)
+            logger.debug(f"Batch querying {len(queries)} queries (top_k={k}, mode={mode}, unit={unit})")
+            
+            documents: list[list[str]] = []
+            for start in range(0, len(queries), settings.query_batch_chunk_size):
+                chunk = queries[start:start + settings.query_batch_chunk_size]
+                if mode == "lexical":
+                    ranked = await self.backend.lexical_query_batch(chunk, search_k, filters)
+                elif mode == "vector":
+                    ranked = await self._vector_search_batch(chunk, search_k, recall, filters)
+                else:
+                    ranked = await self._hybrid_search_batch(chunk, search_k, recall, filters)
+                if rerank:
+                    ranked = await rerank_service.rerank_batch(chunk, ranked)
+                documents.extend(await self._to_documents(ranked, k, unit))
+            
+            return documents
+            
+        except Exception as e:
+            logger.error(f"Error batch querying vector store: {e}")
+            raise
+    
+    @staticmethod
+    def _check_mode(mode: str) -> None:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+    
+    @staticmethod
+    def _search_k(k: int, unit: str, rerank: bool) -> int:
+        if unit not in RESULT_UNITS:
+            raise ValueError(f"Unknown result unit '{unit}', expected one of {RESULT_UNITS}")
+        # Several of the top chunks may share a parent, so over-fetch to still fill k parents
+        search_k = k * settings.chunk_parent_oversample if unit == "parent" else k
+        # The cross-encoder can only promote documents that made the candidate set
+        return max(search_k, settings.rerank_candidates) if rerank else search_k
+    
+    async def _to_documents(self, ranked: list[list[SearchResult]], k: int, unit: str) -> list[list[str]]:
+        """Matched chunk texts, or the texts of their distinct parents in rank order"""
+        if unit == "chunk":
+            return [[result.text for result in results[:k]] for results in ranked]
+        
+        best: list[dict[str, SearchResult]] = []
+        for results in ranked:
+            parents: dict[str, SearchResult] = {}
+            for result in results:
+                if len(parents) == k:
+                    break
+                parents.setdefault(result.parent_id or result.node_id, result)
+            best.append(parents)
+        
+        # Whole documents are their own parent; only chunked ones need stitching
+        texts = await self.backend.get_parent_texts(list({
+            parent_id
+            for parents in best
+            for parent_id, result in parents.items()
+            if "chunk_count" in result.metadata
+        }))
+        return [
+            [texts.get(parent_id, result.text) for parent_id, result in parents.items()]
+            for parents in best
+        ]
+    
+    async def _vector_search(
+        self,
+        query: str,
+        k: int,
+        recall: str | None,
+        filters: SearchFilters | None
+    ) -> list[SearchResult]:
+        query_embedding = await embedding_service.encode_single(query)
+        return await self.backend.query(query_embedding, k, recall=recall, filters=filters)
+    
+    async def _vector_search_batch(
+        self,
+        queries: list[str],
+        k: int,
+        recall: str | None,
+        filters: SearchFilters | None
+    ) -> list[list[SearchResult]]:
+        if not queries:
+            return []
+        embeddings = await embedding_service.encode_queries(queries)
+        return await self.backend.query_batch(embeddings, k, recall=recall, filters=filters)
+    
+    async def _hybrid_search(
+        self,
+        query: str,
+        k: int,
+        recall: str | None,
+        filters: SearchFilters | None
+    ) -> list[SearchResult]:
+        if settings.lexical_shortcut_enabled and is_exact_token_query(query):
+            # Model numbers and SKUs are matched far better lexically; when the
+            # identifier itself is found, the embedding model is not needed at all.
+            # Hits on the other terms alone ("battery") do not count
+            lexical = await self.backend.lexical_query(query, k, filters)
+            if matches_identifier(query, lexical):
+                self._embeddings_skipped += 1
+                return lexical
+            vector = await self._vector_search(query, k, recall, filters)
+            return reciprocal_rank_fusion([vector, lexical], k=settings.rrf_k)[:k]
+        
+        lexical, vector = await asyncio.gather(
+            self.backend.lexical_query(query, k, filters),
+            self._vector_search(query, k, recall, filters)
+        )
+        return reciprocal_rank_fusion([vector, lexical], k=settings.rrf_k)[:k]
+    
+    async def _hybrid_search_batch(
+        self,
+        queries: list[str],
+        k: int,
+        recall: str | None,
+        filters: SearchFilters | None
+    ) -> list[list[SearchResult]]:
+        exact_token = [settings.lexical_shortcut_enabled and is_exact_token_query(query) for query in queries]
+        needs_vector = [i for i in range(len(queries)) if not exact_token[i]]
+        
+        # Encode the ordinary queries while the lexical batch runs
+        lexical, embeddings = await asyncio.gather(
+            self.backend.lexical_query_batch(queries, k, filters),
+            embedding_service.encode_queries([queries[i] for i in needs_vector])
+        )
+        
+        # Same shortcut as single queries: exact-token queries with lexical hits skip the encoder
+        fallback = [i for i in range(len(queries)) if exact_token[i] and not matches_identifier(queries[i], lexical[i])]
+        if fallback:
+            embeddings = np.concatenate([
+                embeddings,
+                await embedding_service.encode_queries([queries[i] for i in fallback])
+            ])
+            needs_vector += fallback
+        self._embeddings_skipped += len(queries) - len(needs_vector)
+        vector = (
+            await self.backend.query_batch(embeddings, k, recall=recall, filters=filters) if needs_vector else []
+        )
+        
+        results = list(lexical)
+        for i, vector_results in zip(needs_vector, vector):
+            results[i] = reciprocal_rank_fusion([vector_results, lexical[i]], k=settings.rrf_k)[:k]
+        return results
+    
     async def clear_store(self) -> None:
         if not self._initialized:
             await self.initialize()
         
         try:
-            conn = await asyncpg.connect(settings.postgres_dsn)
-            try:
-                table_full_name = f"{settings.vector_schema_name}.{settings.vector_table_name}"
-                await conn.execute(f"DELETE FROM {table_full_name}")
-                logger.info("Vector store cleared")
-            finally:
-                await conn.close()
+            await self.backend.clear()
+            self._generation += 1
+            self._document_count = 0
+            self._count_source = "cleared"
+            self._count_refreshed_at = time.monotonic()
+            logger.info("Vector store cleared")
                 
         except Exception as e:
             logger.error(f"Error clearing vector store: {e}")
             raise
     
-    async def get_store_info(self) -> dict[str, any]:
+    async def upsert_batches(
+        self,
+        batches: AsyncIterable[list[DocumentInput]],
+        backend: VectorBackend | None = None,
+        on_batch: Callable[[dict[str, Any]], Awaitable[None]] | None = None
+    ) -> dict[str, Any]:
+        """Upsert a stream of document batches; only running totals are kept, so memory stays flat"""
+        totals = {"documents": 0, "inserted": 0, "updated": 0, "unchanged": 0, "chunks": 0}
+        async for batch in batches:
+            result = await self.upsert_documents(batch, backend=backend)
+            totals["documents"] += len(result["node_ids"])
+            for key in ("inserted", "updated", "unchanged", "chunks"):
+                totals[key] += result[key]
+            if on_batch is not None:
+                await on_batch(result)
+        return totals
+    
+    async def seed_catalog(self, batches: AsyncIterable[list[DocumentInput]]) -> dict[str, Any] | None:
+        """Load the batches into an empty store; None when another worker seeds (or seeded) it"""
         if not self._initialized:
             await self.initialize()
         
+        async with self.backend.exclusive("seed") as acquired:
+            if not acquired:
+                return None
+            # The store may have been seeded since the caller found it empty
+            if await self.backend.count():
+                return None
+            return await self.upsert_batches(batches)
+    
+    async def reload_catalog(
+        self,
+        batches: AsyncIterable[list[DocumentInput]],
+        on_batch: Callable[[dict[str, Any]], Awaitable[None]] | None = None
+    ) -> dict[str, Any]:
+        """Replace the whole catalog with the streamed batches, by default without queries ever seeing it half-loaded"""
+        if not self._initialized:
+            await self.initialize()
+        
+        strategy = settings.catalog_reload_strategy
+        if strategy not in RELOAD_STRATEGIES:
+            raise ValueError(f"Unknown catalog reload strategy '{strategy}', expected one of {RELOAD_STRATEGIES}")
+        if self._reload_lock.locked():
+            raise ReloadInProgressError("A catalog reload is already in progress")
+        
+        async with self._reload_lock:
+            started = time.perf_counter()
+            logger.info(f"Reloading catalog ({strategy})")
+            
+            if strategy == "clear":
+                await self.clear_store()
+                totals = await self.upsert_batches(batches, on_batch=on_batch)
+            else:
+                totals = await self._replace_catalog(lambda shadow: self.upsert_batches(batches, shadow, on_batch))
+            
+            await self.get_document_count(refresh=True)
+            seconds = round(time.perf_counter() - started, 2)
+            logger.success(f"Reloaded catalog: {self._document_count} rows in {seconds}s")
+            return {**totals, "strategy": strategy, "rows": self._document_count, "seconds": seconds}
+    
+    async def _replace_catalog(self, build: Callable[[VectorBackend], Awaitable[Any]]) -> Any:
+        # Build beside the live catalog; queries keep reading it until the swap
+        shadow = await self.backend.create_shadow()
         try:
-            conn = await asyncpg.connect(settings.postgres_dsn)
-            try:
-                table_full_name = f"{settings.vector_schema_name}.{settings.vector_table_name}"
-                count_result = await conn.fetchval(f"SELECT COUNT(*) FROM {table_full_name}")
-                
-                return {
-                    "table_name": settings.vector_table_name,
-                    "schema_name": settings.vector_schema_name,
-                    "embedding_dimension": settings.embedding_dimension,
-                    "total_documents": count_result or 0,
-                    "initialized": self._initialized
-                }
-            finally:
-                await conn.close()
+            built = await build(shadow)
+            self.backend = await self.backend.swap_in(shadow)
+        except BaseException as e:
+            logger.error(f"Catalog replacement failed, keeping the live catalog: {e}")
+            await shadow.discard()
+            raise
+        self._generation += 1
+        return built
+    
+    async def import_snapshot(self, path: str) -> dict[str, Any]:
+        """Replace the catalog with a prebuilt snapshot, skipping embedding entirely"""
+        if not self._initialized:
+            await self.initialize()
+        
+        snapshot = open_snapshot(path)
+        snapshot.check(embedding_service.model_fingerprint(), settings.embedding_dimension)
+        if snapshot.manifest.get("chunking") != chunking_config():
+            # Still searchable; documents updated later are just split differently
+            logger.warning(
+                f"Snapshot chunking {snapshot.manifest.get('chunking')} differs from the service's {chunking_config()}"
+            )
+        if self._reload_lock.locked():
+            raise ReloadInProgressError("A catalog reload is already in progress")
+        
+        async with self._reload_lock:
+            started = time.perf_counter()
+            logger.info(f"Importing snapshot {path} ({snapshot.rows} rows)")
+            rows = await self._replace_catalog(lambda shadow: shadow.load_snapshot(snapshot))
+            await self.get_document_count(refresh=True)
+            seconds = round(time.perf_counter() - started, 2)
+            logger.success(f"Imported {rows} snapshot rows in {seconds}s")
+            return {"path": path, "rows": rows, "seconds": seconds, "manifest": snapshot.manifest}
+    
+    def schedule_optimize(self) -> None:
+        """Coalesce index maintenance after small writes into one check per delay"""
+        if self._optimize_task is None or self._optimize_task.done():
+            self._optimize_task = asyncio.create_task(self._optimize_later())
+    
+    async def _optimize_later(self) -> None:
+        await asyncio.sleep(settings.vector_index_optimize_delay_seconds)
+        try:
+            await self.optimize()
+        except Exception as e:
+            logger.warning(f"Deferred index check failed: {e}")
+    
+    async def optimize(self) -> None:
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            await self.backend.optimize()
+        except Exception as e:
+            # Index maintenance must never fail the write that triggered it
+            logger.error(f"Error optimizing vector store: {e}")
+    
+    async def rebuild_index(self) -> dict[str, Any]:
+        if not self._initialized:
+            await self.initialize()
+        
+        index = getattr(self.backend, "index", None)
+        if index is None:
+            raise ValueError(f"The {self.backend.name} backend has no ANN index to rebuild")
+        return await index.rebuild()
+    
+    def _adjust_count(self, delta: int) -> None:
+        if self._document_count is not None:
+            self._document_count = max(0, self._document_count + delta)
+    
+    async def get_document_count(self, refresh: bool = False) -> int:
+        if not self._initialized:
+            await self.initialize()
+        
+        age = time.monotonic() - self._count_refreshed_at
+        if not refresh and self._document_count is not None and age < settings.store_stats_refresh_seconds:
+            return self._document_count
+        
+        async with self._count_lock:
+            # Another caller may have refreshed while we waited for the lock
+            age = time.monotonic() - self._count_refreshed_at
+            if refresh or self._document_count is None or age >= settings.store_stats_refresh_seconds:
+                estimate = settings.store_count_mode == "estimate"
+                self._document_count = await self.backend.count(estimate=estimate)
+                self._count_source = "estimate" if estimate else "exact"
+                self._count_refreshed_at = time.monotonic()
+        
+        return self._document_count
+    
+    async def get_store_info(self, refresh: bool = False) -> dict[str, Any]:
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            count = await self.get_document_count(refresh=refresh)
+            
+            return {
+                "table_name": settings.vector_table_name,
+                "schema_name": settings.vector_schema_name,
+                "embedding_dimension": settings.embedding_dimension,
+                "backend": self.backend.get_info(),
+                "search": {
+                    "default_mode": settings.search_mode,
+                    "queries": dict(self._search_counts),
+                    "embeddings_skipped": self._embeddings_skipped,
+                    "rerank": rerank_service.get_info(),
+                    "result_cache": (
+                        {**self.result_cache.stats(), "generation": self._generation}
+                        if self.result_cache is not None else {"enabled": False}
+                    ),
+                },
+                "total_documents": count,
+                "count_source": self._count_source,
+                "count_age_seconds": round(time.monotonic() - self._count_refreshed_at, 1),
+                "initialized": self._initialized
+            }
                 
         except Exception as e:
             logger.error(f"Error getting store info: {e}")
@@ -152,9 +745,15 @@ class VectorStoreService:
                 "table_name": settings.vector_table_name,
                 "schema_name": settings.vector_schema_name,
                 "embedding_dimension": settings.embedding_dimension,
-                "total_documents": 0,
+                "total_documents": self._document_count or 0,
                 "initialized": self._initialized,
                 "error": str(e)
             }
+    
+    async def close(self) -> None:
+        if self._optimize_task is not None and not self._optimize_task.done():
+            self._optimize_task.cancel()
+        await rerank_service.close()
+        await self.backend.close()
 
-vector_store_service = VectorStoreService()
\ No newline at end of file
+vector_store_service = VectorStoreService()
@@ -0,0 +1,102 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Callable
+
+# Keeps model numbers and SKUs ("wh-1000xm5", "s24") whole and also indexes their parts
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+# Websearch-style exclusions: "-refurbished" or -"open box", but not the dash inside "wh-1000xm5"
+_NEGATION = re.compile(r'(?:^|(?<=\s))-("[^"]*"|[^\s"]+)')
+
+
+def split_negations(query: str) -> tuple[str, str]:
+    """Terms to match and terms to exclude; only the former may make a document match"""
+    negated = [term.strip('"') for term in _NEGATION.findall(query)]
+    positive = _NEGATION.sub(" ", query).replace('"', " ")
+    return " ".join(positive.split()), " ".join(negated)
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        parts = re.split(r"[-_./]", token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """Incremental Okapi BM25 over documents keyed by node ID"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[str, int]] = {}
+        self._lengths: dict[str, int] = {}
+        self._terms: dict[str, list[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, node_id: str, text: str) -> None:
+        if node_id in self._lengths:
+            self.remove(node_id)
+
+        terms = Counter(tokenize(text))
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[node_id] = frequency
+        length = sum(terms.values())
+        self._terms[node_id] = list(terms)
+        self._lengths[node_id] = length
+        self._total_length += length
+
+    def remove(self, node_id: str) -> None:
+        length = self._lengths.pop(node_id, None)
+        if length is None:
+            return
+
+        self._total_length -= length
+        for term in self._terms.pop(node_id):
+            del self._postings[term][node_id]
+            if not self._postings[term]:
+                del self._postings[term]
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._lengths.clear()
+        self._terms.clear()
+        self._total_length = 0
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        accept: Callable[[str], bool] | None = None
+    ) -> list[tuple[str, float]]:
+        if not self._lengths or k <= 0:
+            return []
+
+        positive, negated = split_negations(query)
+        excluded: set[str] = set()
+        for term in tokenize(negated):
+            excluded.update(self._postings.get(term, ()))
+
+        documents = len(self._lengths)
+        average_length = self._total_length / documents
+        scores: dict[str, float] = {}
+        for term in set(tokenize(positive)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for node_id, frequency in postings.items():
+                if node_id in excluded:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[node_id] / average_length)
+                scores[node_id] = scores.get(node_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        candidates = scores.items() if accept is None else (item for item in scores.items() if accept(item[0]))
+        return heapq.nlargest(k, candidates, key=lambda item: item[1])
@@ -0,0 +1,41 @@
+from typing import Any
+
+
+def chunk_spans(text: str, tokenizer: Any, max_tokens: int, overlap: int) -> list[tuple[int, int]]:
+    """Character spans of overlapping windows of at most max_tokens word-pieces each
+
+    Spans are contiguous (every character belongs to at least one chunk), so the
+    original text can be rebuilt from the chunks with stitch_chunks.
+    """
+    if max_tokens <= overlap:
+        raise ValueError(f"Chunk size ({max_tokens} tokens) must be larger than the overlap ({overlap} tokens)")
+
+    offsets = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        truncation=False,
+        verbose=False
+    )["offset_mapping"]
+    if len(offsets) <= max_tokens:
+        return [(0, len(text))]
+
+    spans = []
+    step = max_tokens - overlap
+    for first in range(0, len(offsets), step):
+        last = first + max_tokens
+        # Each chunk runs up to where the next token starts, keeping the whitespace between
+        start = 0 if first == 0 else offsets[first][0]
+        end = offsets[last][0] if last < len(offsets) else len(text)
+        spans.append((start, end))
+        if last >= len(offsets):
+            break
+    return spans
+
+
+def stitch_chunks(chunks: list[tuple[int, str]]) -> str:
+    """Rebuild a document from (character start, text) chunks, dropping the overlaps"""
+    text = ""
+    for start, chunk in sorted(chunks, key=lambda chunk: chunk[0]):
+        text += chunk[len(text) - start:]
+    return text
@@ -0,0 +1,11 @@
+import hashlib
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of the document text, stable across processes and restarts"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def document_id(text: str) -> str:
+    """Content-derived node ID used when the caller does not supply one"""
+    return f"doc_{content_hash(text)[:32]}"
@@ -0,0 +1,49 @@
+from bisect import bisect_left
+from threading import Lock
+from typing import Any
+
+
+class Histogram:
+    """Fixed-bucket histogram for reporting distributions in /system-info"""
+
+    def __init__(self, buckets: list[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+
+        target = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self._counts):
+            seen += bucket_count
+            if seen >= target:
+                return bound
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            buckets = {f"le_{bound:g}": count for bound, count in zip(self.buckets, counts)}
+            buckets["inf"] = counts[-1]
+            return {
+                "count": self.count,
+                "mean": round(self.total / self.count, 3) if self.count else 0.0,
+                "p50": self.quantile(0.5),
+                "p99": self.quantile(0.99),
+                "max": round(self.max, 3),
+                "buckets": buckets,
+            }
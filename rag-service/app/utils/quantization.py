@@ -0,0 +1,58 @@
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "halfvec", "int8", "binary")
+
+_SCORE_BLOCK_ROWS = 16384
+
+# Set bits per byte value, for Hamming distance over np.packbits codes
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def code_width(mode: str, dimension: int) -> int:
+    """Bytes per vector stored in the given mode"""
+    return {
+        "none": dimension * 4,
+        "halfvec": dimension * 2,
+        # int8 codes plus one float32 scale per row
+        "int8": dimension + 4,
+        "binary": (dimension + 7) // 8,
+    }[mode]
+
+
+def quantize(vectors: np.ndarray, mode: str) -> np.ndarray:
+    """Compress float32 rows; int8 rows carry their float32 scale in the last 4 bytes"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if mode == "halfvec":
+        return vectors.astype(np.float16)
+    if mode == "int8":
+        scales = np.maximum(np.abs(vectors).max(axis=-1, keepdims=True), 1e-12) / 127.0
+        codes = np.round(vectors / scales).astype(np.int8)
+        return np.concatenate([codes.view(np.uint8), scales.astype(np.float32).view(np.uint8)], axis=-1)
+    if mode == "binary":
+        return np.packbits(vectors > 0, axis=-1)
+    raise ValueError(f"Unknown quantization mode '{mode}', expected one of {QUANTIZATION_MODES[1:]}")
+
+
+def approximate_scores(codes: np.ndarray, query: np.ndarray, mode: str) -> np.ndarray:
+    """Similarity of each compressed row to a float32 query; higher is closer"""
+    # Blocks bound the float temporaries numpy creates when upcasting the codes
+    if codes.shape[0] > _SCORE_BLOCK_ROWS:
+        return np.concatenate([
+            _approximate_scores(codes[start:start + _SCORE_BLOCK_ROWS], query, mode)
+            for start in range(0, codes.shape[0], _SCORE_BLOCK_ROWS)
+        ])
+    return _approximate_scores(codes, query, mode)
+
+
+def _approximate_scores(codes: np.ndarray, query: np.ndarray, mode: str) -> np.ndarray:
+    # Widening to float32 first lets the product run through BLAS
+    if mode == "halfvec":
+        return codes.astype(np.float32) @ query
+    if mode == "int8":
+        values = codes[:, :-4].view(np.int8).astype(np.float32)
+        scales = codes[:, -4:].copy().view(np.float32)[:, 0]
+        return (values @ query) * scales
+    if mode == "binary":
+        distances = _POPCOUNT[np.bitwise_xor(codes, np.packbits(query > 0))].sum(axis=-1, dtype=np.int32)
+        return -distances.astype(np.float32)
+    raise ValueError(f"Unknown quantization mode '{mode}', expected one of {QUANTIZATION_MODES[1:]}")
@@ -0,0 +1,134 @@
+import re
+import time
+from typing import Any, Hashable
+import numpy as np
+from app.utils.metrics import Histogram
+
+_NUMBER_WORDS = re.compile(
+    r"\b(?:zero|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|"
+    r"twenty|thirty|forty|fifty|hundred|thousand|million|first|second|third)\b"
+)
+
+
+def is_cacheable_query(query: str) -> bool:
+    """Queries with a number ("iphone 15 pro", "pixel 8 case", "under $500") embed almost
+    identically to the same query with another number, so they are never served from cache
+    """
+    query = query.lower()
+    return not any(character.isdigit() for character in query) and not _NUMBER_WORDS.search(query)
+
+
+class SemanticCache:
+    """Results keyed by query embedding; a lookup hits when a cached query is similar enough
+
+    Entries remember their search parameters and catalog generation, so bumping
+    the generation invalidates everything at once.
+    """
+
+    def __init__(self, max_size: int, dimension: int, threshold: float, ttl_seconds: float | None = None):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._vectors = np.zeros((max(max_size, 0), dimension), dtype=np.float32)
+        self._params: list[Hashable] = []
+        self._values: list[Any] = []
+        self._generations = np.zeros(max(max_size, 0), dtype=np.int64)
+        self._created = np.zeros(max(max_size, 0), dtype=np.float64)
+        self._last_used = np.zeros(max(max_size, 0), dtype=np.int64)
+        self._cost_ms: list[float] = []
+        self._clock = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self.lookup_ms = Histogram([0.1, 0.25, 0.5, 1, 2, 5, 10])
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray | list[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def get(self, embedding: np.ndarray | list[float], params: Hashable, generation: int) -> Any:
+        if not self._values:
+            self.misses += 1
+            return None
+
+        started = time.perf_counter()
+        size = len(self._values)
+        # Exact scan: at a few thousand rows one matrix-vector product beats any index
+        scores = self._vectors[:size] @ self._normalize(embedding)
+        valid = scores >= self.threshold
+        valid &= self._generations[:size] == generation
+        if self.ttl_seconds is not None:
+            valid &= self._created[:size] > time.monotonic() - self.ttl_seconds
+
+        slot = None
+        for candidate in np.flatnonzero(valid)[np.argsort(-scores[valid])]:
+            if self._params[candidate] == params:
+                slot = int(candidate)
+                break
+        lookup_ms = (time.perf_counter() - started) * 1000
+        self.lookup_ms.observe(lookup_ms)
+
+        if slot is None:
+            self.misses += 1
+            return None
+
+        self._clock += 1
+        self._last_used[slot] = self._clock
+        self.hits += 1
+        self.saved_ms += max(0.0, self._cost_ms[slot] - lookup_ms)
+        return self._values[slot]
+
+    def set(
+        self,
+        embedding: np.ndarray | list[float],
+        params: Hashable,
+        generation: int,
+        value: Any,
+        cost_ms: float
+    ) -> None:
+        if self.max_size <= 0:
+            return
+
+        size = len(self._values)
+        if size < self.max_size:
+            slot = size
+            self._params.append(params)
+            self._values.append(value)
+            self._cost_ms.append(cost_ms)
+        else:
+            # Evict invalidated or expired entries first, then the least recently used
+            stale = self._generations != generation
+            if self.ttl_seconds is not None:
+                stale |= self._created <= time.monotonic() - self.ttl_seconds
+            slot = int(np.argmin(np.where(stale, -1, self._last_used)))
+            self._params[slot] = params
+            self._values[slot] = value
+            self._cost_ms[slot] = cost_ms
+
+        self._clock += 1
+        self._vectors[slot] = self._normalize(embedding)
+        self._generations[slot] = generation
+        self._created[slot] = time.monotonic()
+        self._last_used[slot] = self._clock
+
+    def clear(self) -> None:
+        self._params, self._values, self._cost_ms = [], [], []
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._values),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_ms_total": round(self.saved_ms, 1),
+            "saved_ms_per_hit": round(self.saved_ms / self.hits, 2) if self.hits else 0.0,
+            "lookup_ms": self.lookup_ms.snapshot(),
+        }
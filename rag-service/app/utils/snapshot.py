@@ -0,0 +1,139 @@
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+# Same layout as the NumPy backend's store, so a snapshot directory is also a loadable store
+VECTORS_NAME = "vectors.npy"
+DOCUMENTS_NAME = "documents.jsonl"
+# Names the current generation of versioned store files; absent in stores saved unversioned
+STORE_POINTER_NAME = "store.json"
+
+
+def versioned_files(path: Path, version: int) -> tuple[Path, Path]:
+    return path / f"vectors.{version}.npy", path / f"documents.{version}.jsonl"
+
+
+def store_version(path: str | Path) -> int | None:
+    pointer = Path(path) / STORE_POINTER_NAME
+    if not pointer.exists():
+        return None
+    with open(pointer, "r", encoding="utf-8") as f:
+        return int(json.load(f)["version"])
+
+
+def store_files(path: str | Path) -> tuple[Path, Path]:
+    """Vectors and documents files of the store generation the pointer names"""
+    path = Path(path)
+    version = store_version(path)
+    if version is None:
+        return path / VECTORS_NAME, path / DOCUMENTS_NAME
+    return versioned_files(path, version)
+
+
+def publish_store(path: str | Path, version: int) -> None:
+    """Point readers at a fully written generation with one rename, then drop the others"""
+    path = Path(path)
+    partial = path / f"{STORE_POINTER_NAME}.tmp"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump({"version": version}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path / STORE_POINTER_NAME)
+
+    current = set(versioned_files(path, version))
+    stale = [*path.glob("vectors.*.npy"), *path.glob("documents.*.jsonl"), path / VECTORS_NAME, path / DOCUMENTS_NAME]
+    for file in stale:
+        if file not in current:
+            # Readers that mapped an older generation keep it until they unmap it
+            file.unlink(missing_ok=True)
+
+
+@dataclass
+class Snapshot:
+    """A directory holding a float32 embedding matrix, one JSON line per row, and a manifest"""
+
+    path: Path
+    manifest: dict[str, Any]
+
+    @property
+    def vectors_path(self) -> Path:
+        return store_files(self.path)[0]
+
+    @property
+    def documents_path(self) -> Path:
+        return store_files(self.path)[1]
+
+    @property
+    def rows(self) -> int:
+        return self.manifest["rows"]
+
+    def vectors(self) -> np.ndarray:
+        # Memory-mapped: rows are paged in as they are copied out, never all at once
+        return np.load(self.vectors_path, mmap_mode="r")
+
+    def iter_documents(self) -> Iterator[dict[str, Any]]:
+        with open(self.documents_path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def iter_batches(self, size: int) -> Iterator[list[dict[str, Any]]]:
+        batch: list[dict[str, Any]] = []
+        for document in self.iter_documents():
+            batch.append(document)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def check(self, fingerprint: str, dimension: int) -> None:
+        """Refuse snapshots embedded by a different model; their vectors would not match queries"""
+        if self.manifest.get("fingerprint") != fingerprint:
+            raise ValueError(
+                f"Snapshot {self.path} was built with '{self.manifest.get('fingerprint')}', "
+                f"but this service embeds with '{fingerprint}'"
+            )
+        if self.manifest.get("dimension") != dimension:
+            raise ValueError(f"Snapshot {self.path} has dimension {self.manifest.get('dimension')}, expected {dimension}")
+
+
+def write_manifest(path: str | Path, **fields: Any) -> dict[str, Any]:
+    """Written last, so a directory with a manifest always holds a complete snapshot"""
+    path = Path(path)
+    vectors = np.load(store_files(path)[0], mmap_mode="r")
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "rows": int(vectors.shape[0]),
+        "dimension": int(vectors.shape[1]),
+        "created_at": time.time(),
+        **fields,
+    }
+    partial = path / f"{MANIFEST_NAME}.tmp"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(partial, path / MANIFEST_NAME)
+    return manifest
+
+
+def open_snapshot(path: str | Path) -> Snapshot:
+    path = Path(path)
+    manifest_path = path / MANIFEST_NAME
+    if not manifest_path.exists():
+        raise ValueError(f"{path} is not a complete snapshot (no {MANIFEST_NAME})")
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest.get('version')}, expected {SNAPSHOT_VERSION}")
+
+    snapshot = Snapshot(path=path, manifest=manifest)
+    vectors = snapshot.vectors()
+    if vectors.shape != (manifest["rows"], manifest["dimension"]) or vectors.dtype != np.float32:
+        raise ValueError(f"{snapshot.vectors_path} does not match its manifest")
+    return snapshot
@@ -0,0 +1,156 @@
+"""Throughput, latency, memory and fidelity of the embedding backends.
+
+    python benchmarks/embedding_backend_benchmark.py
+    python benchmarks/embedding_backend_benchmark.py --input products.txt --threads 4 --batch-size 64
+
+Each backend (PyTorch sentence-transformers, ONNX Runtime fp32, ONNX Runtime
+dynamic int8) runs in its own subprocess so peak RSS is measured in isolation.
+Reports sentences/sec for batched encoding, p50/p99 latency of single-query
+encodes, peak RSS, and the cosine similarity of each backend's vectors to the
+PyTorch ones. The ONNX variants need the "onnx" extra installed.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.embedding_models import load_embedding_model  # noqa: E402
+
+VARIANTS = {
+    "torch": {"backend": "sentence-transformers", "quantize": False},
+    "onnx": {"backend": "onnx", "quantize": False},
+    "onnx-int8": {"backend": "onnx", "quantize": True},
+}
+
+
+def sample_texts(count: int, seed: int) -> list[str]:
+    rng = np.random.default_rng(seed)
+    brands = ["Sony", "Samsung", "Apple", "Bose", "LG", "Dell", "Lenovo", "Anker"]
+    kinds = ["wireless headphones", "4K smart TV", "laptop", "phone charger", "soundbar", "tablet", "smartwatch"]
+    features = [
+        "active noise cancellation", "30-hour battery life", "USB-C fast charging", "OLED display",
+        "Dolby Atmos", "16GB RAM", "water resistance", "Bluetooth 5.3", "HDR10+", "2TB SSD",
+    ]
+    return [
+        f"{rng.choice(brands)} {rng.choice(kinds)} with "
+        + ", ".join(rng.choice(features, size=int(rng.integers(1, 6)), replace=False))
+        for _ in range(count)
+    ]
+
+
+def run_variant(args: argparse.Namespace) -> None:
+    variant = VARIANTS[args.variant]
+    texts = Path(args.texts_file).read_text(encoding="utf-8").splitlines()
+
+    started = time.perf_counter()
+    model = load_embedding_model(
+        variant["backend"],
+        args.model,
+        args.cache_dir,
+        threads=args.threads,
+        quantize=variant["quantize"]
+    )
+    load_seconds = time.perf_counter() - started
+
+    model.encode(texts[:args.batch_size])
+    started = time.perf_counter()
+    embeddings = np.concatenate([
+        np.asarray(model.encode(texts[start:start + args.batch_size]), dtype=np.float32)
+        for start in range(0, len(texts), args.batch_size)
+    ])
+    throughput = len(texts) / (time.perf_counter() - started)
+
+    latencies = []
+    for text in texts[:args.queries]:
+        started = time.perf_counter()
+        model.encode([text])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    np.save(args.output, embeddings)
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "sentences_per_second": throughput,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--cache-dir", default=".cache")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--input", help="Text file with one document per line; synthetic products otherwise")
+    parser.add_argument("--texts", type=int, default=2000, help="Number of synthetic texts")
+    parser.add_argument("--queries", type=int, default=200, help="Single-text encodes for latency")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads; 0 = library default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--variant", help=argparse.SUPPRESS)
+    parser.add_argument("--texts-file", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args)
+        return
+
+    with tempfile.TemporaryDirectory() as scratch:
+        texts_file = Path(args.input) if args.input else Path(scratch) / "texts.txt"
+        if not args.input:
+            texts_file.write_text("\n".join(sample_texts(args.texts, args.seed)), encoding="utf-8")
+
+        results, embeddings = {}, {}
+        for name in args.variants:
+            output = Path(scratch) / f"{name}.npy"
+            completed = subprocess.run(
+                [
+                    sys.executable, __file__,
+                    "--variant", name,
+                    "--texts-file", str(texts_file),
+                    "--output", str(output),
+                    "--model", args.model,
+                    "--cache-dir", args.cache_dir,
+                    "--queries", str(args.queries),
+                    "--batch-size", str(args.batch_size),
+                    "--threads", str(args.threads),
+                ],
+                capture_output=True,
+                text=True
+            )
+            if completed.returncode != 0:
+                error = completed.stderr.strip().splitlines() or [f"exit code {completed.returncode}"]
+                print(f"{name:>10}  failed: {error[-1]}")
+                continue
+            results[name] = json.loads(completed.stdout.strip().splitlines()[-1])
+            embeddings[name] = np.load(output)
+
+    reference = embeddings.get("torch")
+    print(
+        f"{'variant':>10}  {'load s':>7}  {'sent/s':>8}  {'p50 ms':>7}  {'p99 ms':>7}  {'RSS MiB':>8}  "
+        "cosine vs torch"
+    )
+    for name, result in results.items():
+        agreement = "-"
+        if reference is not None:
+            a = embeddings[name] / np.linalg.norm(embeddings[name], axis=1, keepdims=True)
+            b = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+            cosines = (a * b).sum(axis=1)
+            agreement = f"mean={cosines.mean():.4f} min={cosines.min():.4f}"
+        print(
+            f"{name:>10}  {result['load_seconds']:7.1f}  {result['sentences_per_second']:8.1f}  "
+            f"{result['p50_ms']:7.2f}  {result['p99_ms']:7.2f}  {result['peak_rss_mib']:8.0f}  {agreement}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import asyncio
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.numpy_vector_backend import NumpyVectorBackend
+from app.services.vector_backend import DocumentRecord, SearchFilters
+from app.services.vector_store_service import VectorStoreService
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_quantization", "none")
+    monkeypatch.setattr(settings, "dedup_enabled", True)
+    service = VectorStoreService()
+    service.backend = NumpyVectorBackend(str(tmp_path / "store"))
+    return service
+
+
+def vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(settings.embedding_dimension).astype(np.float32)
+
+
+def test_whole_documents_join_a_near_duplicate_group(service):
+    asyncio.run(service.backend.upsert([DocumentRecord("listing-a", "Anker battery pack", vector(1))]))
+    groups = asyncio.run(service._assign_groups([("listing-b", "listing-b")], vector(1)[None], service.backend))
+    assert groups == [("listing-a", False)]
+
+
+def test_shared_boilerplate_chunks_stay_canonical(service):
+    warranty = vector(2)
+    asyncio.run(service.backend.upsert([
+        DocumentRecord("phone#1", "Two-year warranty, free shipping", warranty, parent_id="phone")
+    ]))
+    # The same boilerplate chunk in another product, and twice within one batch
+    groups = asyncio.run(service._assign_groups(
+        [("laptop#1", "laptop"), ("tablet#2", "tablet")], np.stack([warranty, warranty]), service.backend
+    ))
+    assert groups == [("laptop#1", True), ("tablet#2", True)]
+
+    # A whole document is not hidden behind another product's chunk either
+    groups = asyncio.run(service._assign_groups([("warranty-card", "warranty-card")], warranty[None], service.backend))
+    assert groups == [("warranty-card", True)]
+
+
+def test_filters_reach_variants_hidden_behind_their_canonical_row(service):
+    galaxy = vector(3)
+    asyncio.run(service.backend.upsert([
+        DocumentRecord(
+            "s24-black", "Galaxy S24 Ultra 256GB Black", galaxy,
+            metadata={"brand": "Samsung", "in_stock": False}, group_id="s24-black"
+        ),
+        DocumentRecord(
+            "s24-violet", "Galaxy S24 Ultra 256GB Violet", galaxy + 0.01,
+            metadata={"brand": "Samsung", "in_stock": True}, group_id="s24-black", is_canonical=False
+        ),
+        DocumentRecord("pixel-9", "Pixel 9 Pro 128GB", vector(4), metadata={"brand": "Google", "in_stock": True}),
+    ]))
+
+    # Unfiltered, the group is represented by its canonical row only
+    results = asyncio.run(service.backend.query(galaxy, 3))
+    assert [result.node_id for result in results] == ["s24-black", "pixel-9"]
+
+    in_stock = SearchFilters(in_stock=True)
+    results = asyncio.run(service.backend.query(galaxy, 3, filters=in_stock))
+    assert [result.node_id for result in results] == ["s24-violet", "pixel-9"]
+    [batched] = asyncio.run(service.backend.query_batch(galaxy[None], 3, filters=in_stock))
+    assert [result.node_id for result in batched] == ["s24-violet", "pixel-9"]
+
+    # Both members match: the group still shows up once, as its closest row
+    results = asyncio.run(service.backend.query(galaxy, 3, filters=SearchFilters(brand=["samsung"])))
+    assert [result.node_id for result in results] == ["s24-black"]
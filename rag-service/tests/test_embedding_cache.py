@@ -0,0 +1,49 @@
+import asyncio
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services import embedding_service as embedding_module
+
+
+class CountingModel:
+    tokenizer = None
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, convert_to_tensor=False):
+        self.calls += 1
+        return np.random.default_rng(len(texts)).random((len(texts), settings.embedding_dimension), dtype=np.float32)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_executor", "thread")
+    monkeypatch.setattr(settings, "embedding_disk_cache_enabled", False)
+    model = CountingModel()
+    monkeypatch.setattr(embedding_module, "load_configured_model", lambda: model)
+    service = embedding_module.embedding_service
+    service.query_cache.clear()
+    yield service, model
+    asyncio.run(service.close())
+    service.model = None
+    service.query_cache.clear()
+
+
+def test_cached_query_embeddings_are_compact_float32(service):
+    service, model = service
+
+    async def scenario():
+        first = await service.encode_single("noise cancelling headphones")
+        second = await service.encode_single("noise  cancelling headphones")
+        batch = await service.encode_queries(["noise cancelling headphones", "usb-c charger"])
+        return first, second, batch
+
+    first, second, batch = asyncio.run(scenario())
+    # Stored as one float32 array, not a tuple of Python floats
+    assert second is first
+    assert first.dtype == np.float32 and first.nbytes == settings.embedding_dimension * 4
+    assert not first.flags.writeable and first.base is None
+    np.testing.assert_array_equal(batch[0], first)
+    assert isinstance(service.query_cache.get("usb-c charger"), np.ndarray)
+    assert model.calls == 2
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services import embedding_service as embedding_module
+from app.services.embedding_workers import INGEST_LANE, QUERY_LANE
+
+
+class SlowModel:
+    """Ingest batches hold their thread for a while; queries are quick"""
+
+    tokenizer = None
+
+    def __init__(self):
+        self.threads: dict[str, str] = {}
+
+    def encode(self, texts, convert_to_tensor=False):
+        self.threads[texts[0]] = threading.current_thread().name
+        if texts[0].startswith("ingest"):
+            time.sleep(0.3)
+        return np.zeros((len(texts), settings.embedding_dimension), dtype=np.float32)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_executor", "thread")
+    monkeypatch.setattr(settings, "embedding_disk_cache_enabled", False)
+    monkeypatch.setattr(settings, "embedding_ingest_threads", 1)
+    model = SlowModel()
+    monkeypatch.setattr(embedding_module, "load_configured_model", lambda: model)
+    service = embedding_module.embedding_service
+    yield service, model
+    asyncio.run(service.close())
+    service.model = None
+
+
+def test_queries_do_not_queue_behind_ingest(service):
+    service, model = service
+
+    async def scenario():
+        await service.initialize()
+        # Two ingest batches saturate the single ingest thread for ~0.6s
+        ingest = asyncio.gather(*(service._encode_array([f"ingest {i}"], INGEST_LANE) for i in range(2)))
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        await service._encode_array(["query"], QUERY_LANE)
+        query_seconds = time.perf_counter() - started
+        await ingest
+        return query_seconds
+
+    assert asyncio.run(scenario()) < 0.2
+    assert model.threads["query"].startswith("embed-query")
+    assert {model.threads["ingest 0"], model.threads["ingest 1"]} == {"embed-ingest_0"}
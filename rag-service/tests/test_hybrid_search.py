@@ -0,0 +1,108 @@
+import asyncio
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.hybrid_search import is_exact_token_query, matches_identifier, reciprocal_rank_fusion
+from app.services.numpy_vector_backend import NumpyVectorBackend
+from app.services.vector_backend import DocumentRecord, SearchResult
+from app.services.vector_store_service import VectorStoreService
+from app.utils.bm25 import BM25Index, split_negations
+
+CATALOG = [
+    "Samsung Galaxy S24 Ultra phone with a 5000 mAh battery",
+    "Anker portable battery pack, 20000 mAh",
+    "Refurbished Anker battery pack",
+]
+
+
+def test_split_negations():
+    assert split_negations('battery -refurbished -"open box"') == ("battery", "refurbished open box")
+    # The dash inside a model number is not an exclusion
+    assert split_negations("wh-1000xm5") == ("wh-1000xm5", "")
+
+
+def test_excluded_terms_never_match():
+    index = BM25Index()
+    for i, text in enumerate(CATALOG):
+        index.add(f"doc{i}", text)
+    hits = [node_id for node_id, _ in index.search("battery -refurbished", 10)]
+    assert "doc2" not in hits and {"doc0", "doc1"} <= set(hits)
+    # A query made only of exclusions matches nothing rather than everything
+    assert index.search("-refurbished", 10) == []
+
+
+def test_identifier_must_be_among_the_hits():
+    hits = [SearchResult(node_id="doc1", text=CATALOG[1], score=1.0)]
+    assert is_exact_token_query("s99 battery")
+    assert not matches_identifier("s99 battery", hits)
+    assert matches_identifier("s24 battery", [SearchResult(node_id="doc0", text=CATALOG[0], score=1.0)])
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_quantization", "none")
+    monkeypatch.setattr(settings, "lexical_shortcut_enabled", True)
+    service = VectorStoreService()
+    service.backend = NumpyVectorBackend(str(tmp_path / "store"))
+    rng = np.random.default_rng(0)
+    asyncio.run(service.backend.upsert([
+        DocumentRecord(f"doc{i}", text, rng.standard_normal(settings.embedding_dimension).astype(np.float32))
+        for i, text in enumerate(CATALOG)
+    ]))
+
+    service.vector_searches = 0
+
+    async def vector_search(query, k, recall, filters):
+        service.vector_searches += 1
+        return []
+
+    monkeypatch.setattr(service, "_vector_search", vector_search)
+    return service
+
+
+def test_shortcut_skips_the_encoder_when_the_identifier_matches(service):
+    results = asyncio.run(service._hybrid_search("s24 battery", 3, None, None))
+    assert service.vector_searches == 0
+    assert results[0].node_id == "doc0"
+
+
+def test_shortcut_falls_back_when_only_other_terms_match(service):
+    # "battery" matches, the unknown model number does not: vector search still runs
+    asyncio.run(service._hybrid_search("s99 battery", 3, None, None))
+    assert service.vector_searches == 1
+
+
+def test_fusion_keeps_parent_and_group_links():
+    chunk = SearchResult(
+        node_id="manual#1", text="b", score=0.8, metadata={"chunk_index": 1}, group_id="manual#1", parent_id="manual"
+    )
+    fused = reciprocal_rank_fusion([[chunk], [chunk]])
+    assert (fused[0].parent_id, fused[0].group_id, fused[0].metadata) == ("manual", "manual#1", {"chunk_index": 1})
+
+
+def test_hybrid_parent_unit_stitches_sibling_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_quantization", "none")
+    service = VectorStoreService()
+    service.backend = NumpyVectorBackend(str(tmp_path / "store"))
+    service._initialized = True
+    rng = np.random.default_rng(1)
+    chunks = ["Trail runner shoe with a grippy outsole. ", "The outsole is rated for 500 km of trail."]
+    asyncio.run(service.backend.upsert([
+        DocumentRecord(
+            f"shoe#{i}",
+            text,
+            rng.standard_normal(settings.embedding_dimension).astype(np.float32),
+            metadata={"chunk_index": i, "chunk_count": 2, "chunk_start": sum(map(len, chunks[:i]))},
+            parent_id="shoe"
+        )
+        for i, text in enumerate(chunks)
+    ]))
+
+    async def vector_search(query, k, recall, filters):
+        return await service.backend.query(rng.standard_normal(settings.embedding_dimension), k)
+
+    monkeypatch.setattr(service, "_vector_search", vector_search)
+    monkeypatch.setattr(service, "result_cache", None)
+    documents = asyncio.run(service.query_documents("outsole", top_k=2, mode="hybrid", unit="parent", rerank=False))
+    # Both chunks matched; they come back once, as the whole document
+    assert documents == ["".join(chunks)]
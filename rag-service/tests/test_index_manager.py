@@ -0,0 +1,115 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from app.core.config import settings
+from app.services import index_manager as index_module
+from app.services.index_manager import VectorIndexManager
+
+
+class FakeCatalog:
+    """Stands in for the pg_class/pg_index rows every pre-fork worker reads"""
+
+    def __init__(self):
+        self.index_row = None
+        self.reads = 0
+        # Advisory build lock held by another worker
+        self.locked_elsewhere = False
+        self.rows = 5000
+        # Planner estimate; -1 until the table is first analyzed
+        self.reltuples = 5000
+        self.statements: list[str] = []
+
+    async def fetchrow(self, sql, *args):
+        self.reads += 1
+        return self.index_row
+
+    async def fetchval(self, sql, *args):
+        self.statements.append(sql)
+        if "pg_try_advisory_lock" in sql:
+            return not self.locked_elsewhere
+        if "reltuples" in sql:
+            return self.reltuples
+        return self.rows
+
+    async def execute(self, sql, *args):
+        return None
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    catalog = FakeCatalog()
+    monkeypatch.setattr(index_module, "database", catalog)
+    monkeypatch.setattr(settings, "vector_index_type", "hnsw")
+    monkeypatch.setattr(settings, "vector_quantization", "none")
+    return catalog
+
+
+def built_index_row():
+    return {"reloptions": ["m=16", "ef_construction=64"], "indisvalid": True, "size_bytes": 8192, "partial": True}
+
+
+def test_worker_picks_up_index_built_by_another_worker(catalog, monkeypatch):
+    # This worker started before the index existed and did not build it itself
+    worker = VectorIndexManager("data_embeddings")
+    asyncio.run(worker.refresh_status())
+    assert worker.search_settings(10, "balanced") == {}
+
+    # Another worker finishes the build; the status here is only a cached copy
+    catalog.index_row = built_index_row()
+    monkeypatch.setattr(settings, "vector_index_status_ttl_seconds", 60.0)
+    asyncio.run(worker.refresh_if_stale())
+    assert worker.search_settings(10, "balanced") == {}
+
+    # Once the TTL lapses the next query re-reads the catalog and uses the index
+    monkeypatch.setattr(settings, "vector_index_status_ttl_seconds", 0.0)
+    asyncio.run(worker.refresh_if_stale())
+    assert worker.search_settings(10, "balanced") == {"hnsw.ef_search": str(settings.hnsw_ef_search)}
+    assert worker.search_settings(10, "exact") == {"enable_indexscan": "off"}
+
+
+def test_fresh_status_is_not_reread(catalog, monkeypatch):
+    worker = VectorIndexManager("data_embeddings")
+    asyncio.run(worker.refresh_status())
+    monkeypatch.setattr(settings, "vector_index_status_ttl_seconds", 60.0)
+    reads = catalog.reads
+    for _ in range(5):
+        asyncio.run(worker.refresh_if_stale())
+    assert catalog.reads == reads
+
+
+def test_skipped_build_picks_up_the_other_workers_index(catalog, monkeypatch):
+    monkeypatch.setattr(settings, "vector_index_build_poll_seconds", 0.01)
+    monkeypatch.setattr(settings, "vector_index_status_ttl_seconds", 60.0)
+    worker = VectorIndexManager("data_embeddings")
+    catalog.locked_elsewhere = True
+
+    async def scenario():
+        await worker.refresh_status()
+        assert (await worker.rebuild())["skipped"]
+        assert worker.get_status()["building_elsewhere"]
+
+        # The other worker finishes and releases the lock; no TTL has to lapse here
+        catalog.index_row = built_index_row()
+        catalog.locked_elsewhere = False
+        await asyncio.wait_for(worker._follow_task, 1)
+
+    asyncio.run(scenario())
+    assert worker.get_status()["exists"] and not worker.get_status()["building_elsewhere"]
+    assert worker.search_settings(10, "balanced") == {"hnsw.ef_search": str(settings.hnsw_ef_search)}
+
+
+def test_optimize_reads_planner_statistics_not_count(catalog, monkeypatch):
+    worker = VectorIndexManager("data_embeddings")
+    catalog.index_row = built_index_row()
+    asyncio.run(worker.refresh_status())
+    asyncio.run(worker.optimize())
+    assert not any("COUNT(*)" in sql for sql in catalog.statements)
+
+    # Before the first ANALYZE there is no estimate; only then is the table counted
+    catalog.reltuples = -1
+    asyncio.run(worker.optimize())
+    assert any("COUNT(*)" in sql for sql in catalog.statements)
@@ -0,0 +1,68 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.numpy_vector_backend import NumpyVectorBackend
+from app.services.vector_backend import DocumentRecord
+
+
+@pytest.fixture(autouse=True)
+def quick_flush(monkeypatch):
+    monkeypatch.setattr(settings, "vector_quantization", "none")
+    monkeypatch.setattr(settings, "numpy_store_flush_seconds", 0.01)
+
+
+def records(count: int, offset: int = 0) -> list[DocumentRecord]:
+    rng = np.random.default_rng(offset)
+    return [
+        DocumentRecord(f"doc{offset + i}", f"text {offset + i}", rng.standard_normal(settings.embedding_dimension))
+        for i in range(count)
+    ]
+
+
+def test_close_waits_for_a_save_cancelled_mid_write(tmp_path):
+    directory = str(tmp_path / "store")
+    backend = NumpyVectorBackend(directory)
+    save = backend._save
+    finished = []
+
+    def slow_save(*args):
+        time.sleep(0.2)
+        save(*args)
+        finished.append(time.monotonic())
+
+    backend._save = slow_save
+
+    async def scenario():
+        await backend.initialize()
+        await backend.upsert(records(3))
+        # Let the background flush start writing, then shut down
+        await asyncio.sleep(0.05)
+        assert backend._saving is not None
+        await backend.close()
+        return time.monotonic()
+
+    closed_at = asyncio.run(scenario())
+    assert finished and finished[0] <= closed_at
+
+    reopened = NumpyVectorBackend(directory)
+    asyncio.run(reopened.initialize())
+    assert reopened._size == 3
+
+
+def test_writes_during_a_save_are_flushed_on_close(tmp_path):
+    directory = str(tmp_path / "store")
+    backend = NumpyVectorBackend(directory)
+
+    async def scenario():
+        await backend.initialize()
+        await backend.upsert(records(3))
+        await asyncio.sleep(0.015)
+        await backend.upsert(records(2, offset=3))
+        await backend.close()
+
+    asyncio.run(scenario())
+    reopened = NumpyVectorBackend(directory)
+    asyncio.run(reopened.initialize())
+    assert reopened._size == 5
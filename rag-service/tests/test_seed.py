@@ -0,0 +1,50 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from app.services.numpy_vector_backend import NumpyVectorBackend
+from app.services.vector_store_service import VectorStoreService
+
+
+class SharedStore(NumpyVectorBackend):
+    """A store whose seed lock may be held by another pre-fork worker"""
+
+    locked_elsewhere = False
+
+    @asynccontextmanager
+    async def exclusive(self, name):
+        yield not self.locked_elsewhere
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    service = VectorStoreService()
+    service.backend = SharedStore(str(tmp_path / "store"))
+    service._initialized = True
+    seeded = []
+
+    async def upsert_batches(batches, backend=None, on_batch=None):
+        seeded.append(batches)
+        return {"documents": len(batches)}
+
+    monkeypatch.setattr(service, "upsert_batches", upsert_batches)
+    service.seeded = seeded
+    return service
+
+
+def test_only_the_lock_holder_seeds(service):
+    service.backend.locked_elsewhere = True
+    assert asyncio.run(service.seed_catalog(["catalog"])) is None
+    assert service.seeded == []
+
+    service.backend.locked_elsewhere = False
+    assert asyncio.run(service.seed_catalog(["catalog"])) == {"documents": 1}
+    assert service.seeded == [["catalog"]]
+
+
+def test_a_store_seeded_meanwhile_is_left_alone(service, monkeypatch):
+    async def count(estimate=False):
+        return 12
+
+    monkeypatch.setattr(service.backend, "count", count)
+    assert asyncio.run(service.seed_catalog(["catalog"])) is None
+    assert service.seeded == []
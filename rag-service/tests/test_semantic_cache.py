@@ -0,0 +1,56 @@
+import asyncio
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services import vector_store_service as vector_store_module
+from app.services.vector_backend import SearchResult
+from app.services.vector_store_service import VectorStoreService
+from app.utils.semantic_cache import is_cacheable_query
+
+NEAR_MISSES = [
+    ("iphone 15 pro", "iphone 14 pro"),
+    ("pixel 8 case", "pixel 7 case"),
+    ("headphones under $200", "headphones under $300"),
+    ("two pack usb cables", "three pack usb cables"),
+]
+
+
+def test_cache_ships_disabled():
+    assert type(settings).model_fields["semantic_cache_enabled"].default is False
+
+
+@pytest.mark.parametrize("first,second", NEAR_MISSES)
+def test_numeric_queries_are_not_cacheable(first, second):
+    assert not is_cacheable_query(first) and not is_cacheable_query(second)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "semantic_cache_enabled", True)
+    monkeypatch.setattr(settings, "rerank_enabled", False)
+    service = VectorStoreService()
+    service._initialized = True
+
+    # Worst case: the embedding model cannot tell the queries apart at all
+    async def encode_single(query):
+        return np.ones(settings.embedding_dimension, dtype=np.float32)
+
+    async def vector_search(query, k, recall, filters):
+        return [SearchResult(node_id=query, text=f"results for {query}", score=1.0)]
+
+    monkeypatch.setattr(vector_store_module.embedding_service, "encode_single", encode_single)
+    monkeypatch.setattr(service, "_vector_search", vector_search)
+    return service
+
+
+@pytest.mark.parametrize("first,second", NEAR_MISSES)
+def test_near_miss_queries_get_their_own_results(service, first, second):
+    asyncio.run(service.query_documents(first, mode="vector", unit="chunk"))
+    assert asyncio.run(service.query_documents(second, mode="vector", unit="chunk")) == [f"results for {second}"]
+
+
+def test_paraphrases_without_numbers_still_hit(service):
+    asyncio.run(service.query_documents("wireless earbuds", mode="vector", unit="chunk"))
+    assert asyncio.run(service.query_documents("bluetooth earbuds", mode="vector", unit="chunk")) == [
+        "results for wireless earbuds"
+    ]